@@ -0,0 +1,158 @@
+"""Admission control: bound in-flight requests and shed the excess with a fast 503"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_SHED = Counter(
+    'admission_shed_total', 'Requests rejected by admission control', ['reason']
+)
+ADMISSION_IN_FLIGHT = Gauge('admission_in_flight', 'Admitted requests currently being served')
+ADMISSION_QUEUED = Gauge('admission_queued', 'Requests waiting for an admission slot')
+ADMISSION_WAIT = Histogram(
+    'admission_wait_seconds', 'Time admitted requests spent waiting for a slot',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+class AdmissionRejected(Exception):
+    """No slot became available; `reason` is `queue_full` or `queue_timeout`"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionController:
+    """At most `max_concurrent` requests in flight and `max_queue` waiting, in FIFO order.
+
+    A request that finds the queue full is rejected at once; one that waits
+    longer than `queue_timeout` seconds is rejected then.  Counters are only
+    touched from the event loop, so no lock is needed.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float, retry_after: int = 1):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._in_flight = 0
+        self._waiters = deque()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _update_gauges(self):
+        ADMISSION_IN_FLIGHT.set(self._in_flight)
+        ADMISSION_QUEUED.set(len(self._waiters))
+
+    async def acquire(self):
+        """Take a slot, waiting in line if needed; raises `AdmissionRejected`"""
+        if self._in_flight < self.max_concurrent and not self._waiters:
+            self._in_flight += 1
+            self._update_gauges()
+            return
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_SHED.labels(reason='queue_full').inc()
+            raise AdmissionRejected('queue_full')
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._waiters.remove(waiter)
+                self._update_gauges()
+                ADMISSION_SHED.labels(reason='queue_timeout').inc()
+                raise AdmissionRejected('queue_timeout')
+            # the slot was handed over just as the wait expired: keep it
+        except BaseException:
+            # cancelled (client went away): give back a slot handed over meanwhile
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+                self._update_gauges()
+            raise
+        ADMISSION_WAIT.observe(time.perf_counter() - started)
+
+    def release(self):
+        """Free a slot, handing it straight to the longest waiter if there is one"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self._in_flight -= 1
+        self._update_gauges()
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware applying an `AdmissionController` to matching paths.
+
+    Only paths starting with one of `prefixes` are controlled, so health checks
+    and metrics scrapes are always served.  A slot is held until the response,
+    streamed bodies included, has been sent.
+    """
+
+    def __init__(self, app, controller: Optional[AdmissionController], prefixes: Tuple[str, ...] = ('/predict',)):
+        self.app = app
+        self.controller = controller
+        self.prefixes = prefixes
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if controller is None or scope['type'] != 'http' or not scope['path'].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await controller.acquire()
+        except AdmissionRejected as rejected:
+            logger.warning("Shedding %s %s: %s", scope['method'], scope['path'], rejected.reason)
+            response = JSONResponse(
+                {'detail': f"Server overloaded ({rejected.reason}), retry later"}, status_code=503,
+                headers={'Retry-After': str(controller.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+
+
+def create_admission_controller() -> Optional[AdmissionController]:
+    """Build the controller from environment configuration; None when disabled.
+
+    ADMISSION_MAX_CONCURRENT (0 disables), ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_MS and ADMISSION_RETRY_AFTER_SECONDS.
+    """
+    max_concurrent = int(os.getenv('ADMISSION_MAX_CONCURRENT', '64'))
+    if max_concurrent <= 0:
+        logger.info("Admission control disabled")
+        return None
+    controller = AdmissionController(
+        max_concurrent=max_concurrent,
+        max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '128')),
+        queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', '1000')) / 1000,
+        retry_after=int(os.getenv('ADMISSION_RETRY_AFTER_SECONDS', '1')),
+    )
+    logger.info("Admission control: %d in flight, %d queued, %.0fms queue timeout",
+                controller.max_concurrent, controller.max_queue, controller.queue_timeout * 1000)
+    return controller
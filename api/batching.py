@@ -0,0 +1,102 @@
+"""Dynamic micro-batching of concurrent single-record predictions"""
+import asyncio
+import logging
+import time
+
+import numpy as np
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+MICROBATCH_SIZE = Histogram(
+    'microbatch_size', 'Rows per coalesced prediction batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+MICROBATCH_QUEUE_WAIT = Histogram(
+    'microbatch_queue_wait_seconds', 'Time a request waits before its batch is dispatched',
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+
+class MicroBatcher:
+    """Coalesce concurrent feature rows into one matrix per scoring call.
+
+    Rows submitted within `window_seconds` of the first pending row (or until
+    `max_batch_size` rows are pending) are stacked and passed to `score_fn` once
+    on `executor`.  `score_fn` takes an (N, F) matrix and returns
+    `(labels, probabilities)`; each caller receives its own slice.
+    """
+
+    def __init__(self, score_fn, executor, max_batch_size: int = 64,
+                 window_seconds: float = 0.002):
+        self.score_fn = score_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.window_seconds = max(0.0, window_seconds)
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        # the loop only keeps weak references to tasks; an in-flight batch must not be collected
+        self._tasks = set()
+
+    def _bind_loop(self, loop):
+        # futures belong to a single loop; start fresh if the loop changed
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+            self._tasks = set()
+
+    async def submit(self, row: np.ndarray):
+        """Queue one feature row and wait for its `(label, probability)`"""
+        loop = asyncio.get_running_loop()
+        self._bind_loop(loop)
+
+        future = loop.create_future()
+        self._pending.append((row, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._dispatch)
+
+        return await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = self._loop.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def drain(self):
+        """Dispatch pending rows now and wait for every in-flight batch (shutdown)"""
+        if self._loop is not asyncio.get_running_loop():
+            return
+        self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run_batch(self, batch):
+        dispatched = time.perf_counter()
+        MICROBATCH_SIZE.observe(len(batch))
+        for _, _, enqueued in batch:
+            MICROBATCH_QUEUE_WAIT.observe(dispatched - enqueued)
+
+        try:
+            matrix = np.vstack([row for row, _, _ in batch])
+            labels, probabilities = await self.executor.run(self.score_fn, matrix)
+        except Exception as batch_err:
+            logger.error("Micro-batch of %d rows failed: %s", len(batch), batch_err)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(batch_err)
+            return
+
+        for i, (_, future, _) in enumerate(batch):
+            if not future.done():
+                future.set_result((int(labels[i]), float(probabilities[i])))
@@ -0,0 +1,81 @@
+"""Bounded LRU/TTL cache for predictions keyed on normalized model inputs"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from prometheus_client import Counter, Gauge
+
+PREDICTION_CACHE_EVENTS = Counter(
+    'prediction_cache_events_total', 'Prediction cache lookups and evictions', ['event']
+)
+PREDICTION_CACHE_SIZE = Gauge('prediction_cache_entries', 'Entries held in the prediction cache')
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with optional per-entry TTL.
+
+    Entries are tied to a model generation token; calling `validate` with a new
+    token (for example after the model or scaler changed) clears the cache.
+    `max_entries <= 0` disables caching and `ttl_seconds <= 0` disables expiry.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything"""
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def validate(self, generation: Hashable):
+        """Drop every entry if the model generation changed"""
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+                PREDICTION_CACHE_SIZE.set(0)
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """Return the cached value for `key` or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds > 0 and entry[1] < time.monotonic():
+                del self._entries[key]
+                PREDICTION_CACHE_EVENTS.labels(event='expired').inc()
+                PREDICTION_CACHE_SIZE.set(len(self._entries))
+                entry = None
+            if entry is None:
+                PREDICTION_CACHE_EVENTS.labels(event='miss').inc()
+                return None
+            self._entries.move_to_end(key)
+            PREDICTION_CACHE_EVENTS.labels(event='hit').inc()
+            return entry[0]
+
+    def put(self, key: Hashable, value: object):
+        """Store `value`, evicting the least recently used entries when full"""
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                PREDICTION_CACHE_EVENTS.labels(event='eviction').inc()
+            PREDICTION_CACHE_SIZE.set(len(self._entries))
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            PREDICTION_CACHE_SIZE.set(0)
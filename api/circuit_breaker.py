@@ -0,0 +1,92 @@
+"""Circuit breaker that stops calling a failing or slow dependency for a while"""
+import logging
+import threading
+import time
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATE = Gauge('circuit_breaker_state', 'Breaker state (0=closed, 1=half-open, 2=open)', ['name'])
+CIRCUIT_TRANSITIONS = Counter('circuit_breaker_transitions_total', 'Breaker state changes', ['name', 'state'])
+CIRCUIT_CALLS = Counter('circuit_breaker_calls_total', 'Outcomes recorded by the breaker', ['name', 'outcome'])
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures or slow calls.
+
+    A call slower than `slow_call_seconds` counts as a failure even if it
+    succeeded.  While open, `allow()` is False; after `reset_timeout` seconds a
+    single trial call is let through (half-open) and its outcome closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 slow_call_seconds: float = float('inf')):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        CIRCUIT_STATE.labels(name=name).set(0)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        logger.warning("Circuit %s: %s -> %s", self.name, self._state, state)
+        self._state = state
+        CIRCUIT_STATE.labels(name=self.name).set(_STATE_VALUES[state])
+        CIRCUIT_TRANSITIONS.labels(name=self.name, state=state).inc()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the dependency now; a True in half-open state is the trial"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._transition(HALF_OPEN)
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self, seconds: float = 0.0):
+        """Report a completed call and how long it took"""
+        if seconds > self.slow_call_seconds:
+            CIRCUIT_CALLS.labels(name=self.name, outcome='slow').inc()
+            self._record_failure()
+            return
+        CIRCUIT_CALLS.labels(name=self.name, outcome='success').inc()
+        with self._lock:
+            if self._state == OPEN:
+                # a call admitted before the breaker opened; only a trial may close it
+                return
+            self._failures = 0
+            self._trial_in_flight = False
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        """Report a failed call"""
+        CIRCUIT_CALLS.labels(name=self.name, outcome='failure').inc()
+        self._record_failure()
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
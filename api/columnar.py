@@ -0,0 +1,180 @@
+"""MessagePack struct-of-arrays wire format for /predict/columnar.
+
+A request is one MessagePack map from column name to the whole column:
+
+- every numeric input (`work_hours`, ... `task_completion_rate`) as either
+  a `bin` of little-endian float64 values, which is mapped into NumPy without
+  copying, or an array of numbers;
+- `is_weekday` (`bin` float64 or array of 0/1) or `day_type` (array of
+  "Weekday"/"Weekend", case-insensitive);
+- optional `user_id` and `name` arrays (entries may be nil); every row needs one.
+
+Ranges are checked per column with NumPy instead of per-record Pydantic models.
+The response carries `risk_probability` (float64) and `high_risk` (uint8) as
+`bin` columns in request order, plus `count`, `high_risk_count`,
+`model_version` and `timestamp`.
+"""
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from api.features import INPUT_FEATURES
+
+try:
+    import msgpack
+except ImportError:  # optional: only /predict/columnar needs it
+    msgpack = None
+
+CONTENT_TYPES = ('application/msgpack', 'application/x-msgpack')
+MEDIA_TYPE = CONTENT_TYPES[0]
+
+# numeric inputs carried as their own column; `is_weekday` may come as `day_type`
+NUMERIC_INPUTS = INPUT_FEATURES[:-1]
+# row indices quoted per column in validation errors
+MAX_REPORTED_ROWS = 5
+
+
+class ColumnarError(ValueError):
+    """The payload could not be decoded or failed validation"""
+
+
+def available() -> bool:
+    return msgpack is not None
+
+
+def _column(payload: Mapping[str, object], name: str, rows: Optional[int]) -> np.ndarray:
+    value = payload.get(name)
+    if value is None:
+        raise ColumnarError(f"missing column: {name}")
+    try:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            # read-only view over the unpacked buffer, no copy
+            column = np.frombuffer(value, dtype='<f8')
+        else:
+            column = np.asarray(value, dtype=float)
+    except (TypeError, ValueError) as column_err:
+        raise ColumnarError(f"{name}: expected float64 bytes or an array of numbers") from column_err
+    if column.ndim != 1:
+        raise ColumnarError(f"{name}: expected a flat column")
+    if rows is not None and len(column) != rows:
+        raise ColumnarError(f"{name}: {len(column)} values, expected {rows}")
+    return column
+
+
+def _rows(mask: np.ndarray) -> str:
+    bad = np.flatnonzero(mask)
+    shown = ', '.join(str(i) for i in bad[:MAX_REPORTED_ROWS])
+    return f"{len(bad)} row(s) [{shown}{', ...' if len(bad) > MAX_REPORTED_ROWS else ''}]"
+
+
+def _optional_strings(payload: Mapping[str, object], name: str, rows: int) -> List[Optional[str]]:
+    values = payload.get(name)
+    if values is None:
+        return [None] * rows
+    if not isinstance(values, list) or len(values) != rows:
+        raise ColumnarError(f"{name}: expected an array of {rows} strings or nils")
+    return values
+
+
+def invalid_rows(columns: Mapping[str, np.ndarray], bounds: Mapping[str, Tuple[float, float]],
+                 integer_columns: Sequence[str]) -> Dict[str, Tuple[np.ndarray, str]]:
+    """`(bad_row_mask, requirement)` for each column with out-of-range, non-finite or non-integral values"""
+    invalid = {}
+    for name, (lower, upper) in bounds.items():
+        values = columns[name]
+        # NaN fails both comparisons, so it is reported as out of range
+        bad = ~((values >= lower) & (values <= upper))
+        if name in integer_columns:
+            bad |= values != np.floor(values)
+        if bad.any():
+            kind = "integers " if name in integer_columns else ""
+            invalid[name] = bad, f"{name} must be {kind}between {lower} and {upper}"
+    return invalid
+
+
+def validate_columns(columns: Mapping[str, np.ndarray], bounds: Mapping[str, Tuple[float, float]],
+                     integer_columns: Sequence[str]) -> List[str]:
+    """One message per column with out-of-range, non-finite or non-integral values"""
+    return [
+        f"{requirement}: {_rows(bad)}"
+        for bad, requirement in invalid_rows(columns, bounds, integer_columns).values()
+    ]
+
+
+def decode_request(body: bytes, bounds: Mapping[str, Tuple[float, float]], integer_columns: Sequence[str],
+                   max_rows: int) -> Tuple[Dict[str, np.ndarray], List[Optional[str]], List[Optional[str]]]:
+    """`(input_columns, user_ids, names)` from a request body; ColumnarError when invalid"""
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except (ValueError, msgpack.UnpackException) as unpack_err:
+        raise ColumnarError(f"invalid MessagePack body: {unpack_err}") from unpack_err
+    if not isinstance(payload, dict):
+        raise ColumnarError("body must be a map of column name to values")
+
+    columns, rows = {}, None
+    for name in NUMERIC_INPUTS:
+        columns[name] = _column(payload, name, rows)
+        rows = len(columns[name])
+    if not 1 <= rows <= max_rows:
+        raise ColumnarError(f"between 1 and {max_rows} rows are accepted, got {rows}")
+
+    if payload.get('is_weekday') is not None:
+        is_weekday = _column(payload, 'is_weekday', rows)
+        if not np.isin(is_weekday, (0.0, 1.0)).all():
+            raise ColumnarError(f"is_weekday must be 0 or 1: {_rows(~np.isin(is_weekday, (0.0, 1.0)))}")
+        columns['is_weekday'] = is_weekday
+    else:
+        day_type = payload.get('day_type')
+        if not isinstance(day_type, list) or len(day_type) != rows:
+            raise ColumnarError(f"day_type or is_weekday: expected {rows} values")
+        day_type = np.char.lower(np.asarray(day_type, dtype=str))
+        weekday = day_type == 'weekday'
+        unknown = ~weekday & (day_type != 'weekend')
+        if unknown.any():
+            raise ColumnarError(f"day_type must be Weekday or Weekend: {_rows(unknown)}")
+        columns['is_weekday'] = weekday.astype(float)
+
+    errors = validate_columns(columns, bounds, integer_columns)
+    user_ids = _optional_strings(payload, 'user_id', rows)
+    names = _optional_strings(payload, 'name', rows)
+    anonymous = np.fromiter((not (u or n) for u, n in zip(user_ids, names)), bool, rows)
+    if anonymous.any():
+        errors.append(f"either name or user_id must be provided: {_rows(anonymous)}")
+    if errors:
+        raise ColumnarError("; ".join(errors))
+    return columns, user_ids, names
+
+
+def encode_response(labels: np.ndarray, probabilities: np.ndarray, model_version: str, timestamp: str) -> bytes:
+    return msgpack.packb({
+        'count': len(labels),
+        'high_risk_count': int(labels.sum()),
+        'model_version': model_version,
+        'timestamp': timestamp,
+        'risk_probability': np.ascontiguousarray(probabilities, dtype='<f8').tobytes(),
+        'high_risk': np.ascontiguousarray(labels, dtype=np.uint8).tobytes(),
+    })
+
+
+def encode_request(columns: Mapping[str, object], user_ids: Optional[Sequence[Optional[str]]] = None,
+                   names: Optional[Sequence[Optional[str]]] = None) -> bytes:
+    """Client side: pack input columns (arrays become float64 `bin` columns)"""
+    payload = {}
+    for name, values in columns.items():
+        if name == 'day_type':
+            payload[name] = list(values)
+        else:
+            payload[name] = np.ascontiguousarray(values, dtype='<f8').tobytes()
+    if user_ids is not None:
+        payload['user_id'] = list(user_ids)
+    if names is not None:
+        payload['name'] = list(names)
+    return msgpack.packb(payload)
+
+
+def decode_response(body: bytes) -> Dict[str, object]:
+    """Client side: unpack a response, mapping its `bin` columns into NumPy"""
+    response = msgpack.unpackb(body, raw=False)
+    response['risk_probability'] = np.frombuffer(response['risk_probability'], dtype='<f8')
+    response['high_risk'] = np.frombuffer(response['high_risk'], dtype=np.uint8)
+    return response
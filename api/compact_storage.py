@@ -0,0 +1,134 @@
+"""Compact `user_requests` storage: raw inputs and outcomes in the table, derived metrics in a view.
+
+With `USER_REQUESTS_STORAGE=compact` the API writes `user_requests_compact`,
+which keeps the tracking fields, the eight raw inputs, the model version and
+the prediction, but none of the fourteen metrics that `compute_features`
+derives from the inputs alone.  Rows are about half as wide, so inserts write
+less heap, index and WAL.
+
+`user_requests_expanded` is a view over that table with every
+`user_requests` column recomputed in SQL, so history, rollup rebuilds and
+ad-hoc queries read the same columns in either mode.  `high_workload_flag` is
+stored, not derived: it compares the inputs with the training medians in
+effect when the row was written.
+"""
+import logging
+from typing import Dict
+
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, MetaData, String, Table, and_, case, column, literal, select,
+    table, text
+)
+from sqlalchemy.sql.elements import ColumnElement
+
+from api.features import DERIVED_METRICS, INPUT_FEATURES, MODEL_FEATURES
+
+logger = logging.getLogger(__name__)
+
+COMPACT_TABLE = 'user_requests_compact'
+EXPANDED_VIEW = 'user_requests_expanded'
+
+INTEGER_INPUTS = ('meetings_count', 'breaks_taken', 'after_hours_work', 'is_weekday')
+# derived metrics kept in the compact table because they depend on more than the row
+STORED_METRICS = ('high_workload_flag',)
+# prediction outputs recorded with every row
+OUTCOME_COLUMNS = ('model_version', 'risk_prediction', 'risk_probability')
+
+compact_metadata = MetaData()
+
+user_requests_compact = Table(
+    COMPACT_TABLE, compact_metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('user_id', String, nullable=True),
+    Column('name', String, nullable=True),
+    Column('created_at', DateTime),
+    *(Column(name, Integer if name in INTEGER_INPUTS else Float, nullable=False) for name in INPUT_FEATURES),
+    Column('high_workload_flag', Integer),
+    Column('model_version', String, nullable=True),
+    Column('risk_prediction', Integer, nullable=True),
+    Column('risk_probability', Float, nullable=True),
+)
+
+# keyset pagination of /users/{user_id}/history, as on the wide table
+COMPACT_HISTORY_INDEX = Index(
+    'idx_user_requests_compact_user_history',
+    user_requests_compact.c.user_id, user_requests_compact.c.created_at, user_requests_compact.c.id
+)
+
+
+def _clip(value, lower: float, upper: float):
+    return case((value < lower, literal(lower)), (value > upper, literal(upper)), else_=value)
+
+
+def derived_columns(c) -> Dict[str, ColumnElement]:
+    """SQL for every metric `compute_features` derives from the inputs, keyed by column name.
+
+    Mirrors `api.features.compute_features` term by term; literals are floats
+    so integer inputs never hit integer division.
+    """
+    work_denom = c.work_hours + 0.1
+    recovery_index = (c.sleep_hours + c.breaks_taken) - c.screen_time_hours
+    fatigue_risk = c.screen_time_hours - (c.sleep_hours * 1.5)
+    return {
+        'work_intensity_ratio': c.screen_time_hours / work_denom,
+        'meeting_burden': c.meetings_count / work_denom,
+        'break_adequacy': c.breaks_taken / work_denom,
+        'sleep_deficit': 8.0 - c.sleep_hours,
+        'recovery_index': recovery_index,
+        'fatigue_risk': fatigue_risk,
+        'workload_pressure': c.work_hours + (c.meetings_count * 0.25) + c.after_hours_work,
+        'task_efficiency': c.task_completion_rate / work_denom,
+        'work_life_balance_score': _clip(
+            ((c.sleep_hours / 8.0) * 30.0 + (c.breaks_taken / 5.0) * 30.0 - (c.work_hours / 10.0) * 20.0
+             - c.after_hours_work * 10.0) * 2.0,
+            0.0, 100.0
+        ),
+        'screen_time_per_meeting': c.screen_time_hours / (c.meetings_count + 0.1),
+        'work_hours_productivity': c.task_completion_rate * (1.0 - (c.work_hours / 15.0)),
+        'health_risk_score': _clip(
+            (1.0 - (c.sleep_hours / 8.0)) * 40.0 + case((fatigue_risk > 0.0, fatigue_risk), else_=0.0) * 10.0,
+            0.0, 100.0
+        ),
+        'after_hours_work_hours_est': c.after_hours_work * (c.work_hours * 0.1),
+        'poor_recovery_flag': case((and_(c.sleep_hours < 6.0, recovery_index < 0.0), 1), else_=0),
+    }
+
+
+# every `user_requests` column, then the outcomes
+EXPANDED_COLUMNS = ['id', 'user_id', 'name', 'created_at'] + MODEL_FEATURES + DERIVED_METRICS + list(OUTCOME_COLUMNS)
+
+
+def expanded_select(source: Table = user_requests_compact):
+    """SELECT producing `EXPANDED_COLUMNS` from the compact table: the view's definition"""
+    computed = derived_columns(source.c)
+    return select(*(
+        computed[name].label(name) if name in computed else source.c[name] for name in EXPANDED_COLUMNS
+    ))
+
+
+# the view, for reading; `create_schema` creates it
+user_requests_expanded = table(EXPANDED_VIEW, *(
+    column(name, user_requests_compact.c[name].type if name in user_requests_compact.c
+           else Integer if name.endswith('_flag') else Float)
+    for name in EXPANDED_COLUMNS
+))
+
+
+def create_view(conn):
+    """(Re)create `user_requests_expanded` so it matches the formulas in this module"""
+    definition = expanded_select().compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(f"CREATE OR REPLACE VIEW {EXPANDED_VIEW} AS {definition}"))
+    else:
+        conn.execute(text(f"DROP VIEW IF EXISTS {EXPANDED_VIEW}"))
+        conn.execute(text(f"CREATE VIEW {EXPANDED_VIEW} AS {definition}"))
+
+
+def create_schema(engine):
+    """Create the compact table, its history index and the expanded view if missing"""
+    compact_metadata.create_all(engine)
+    # create_all only adds indexes together with a new table
+    COMPACT_HISTORY_INDEX.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        create_view(conn)
+    logger.info("Compact user_requests storage ready (%s, view %s)", COMPACT_TABLE, EXPANDED_VIEW)
@@ -0,0 +1,133 @@
+"""Bounded executors for running blocking model and database work off the event loop"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    'executor_queue_depth', 'Tasks waiting for a free executor worker', ['pool']
+)
+EXECUTOR_ACTIVE = Gauge('executor_active_tasks', 'Tasks currently running on an executor', ['pool'])
+EXECUTOR_REJECTED = Counter(
+    'executor_rejected_total', 'Tasks rejected because the executor queue was full', ['pool']
+)
+
+# inline: run blocking work directly on the event loop (legacy behaviour)
+# threadpool: run inference and I/O on separate bounded thread pools
+EXECUTION_MODES = ('inline', 'threadpool')
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a bounded executor has no free worker or queue slot"""
+
+
+class BoundedExecutor:
+    """Thread pool with a bounded wait queue and Prometheus queue-depth gauges"""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, inline: bool = False):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.inline = inline
+        self._pool = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    @property
+    def queued(self) -> int:
+        """Number of tasks waiting for a worker"""
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        """Number of tasks currently executing"""
+        return self._running
+
+    def _update_gauges(self):
+        EXECUTOR_QUEUE_DEPTH.labels(pool=self.name).set(self._queued)
+        EXECUTOR_ACTIVE.labels(pool=self.name).set(self._running)
+
+    def _wrap(self, fn, args, kwargs):
+        def task():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._update_gauges()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._update_gauges()
+        return task
+
+    async def run(self, fn, *args, **kwargs):
+        """Run `fn(*args, **kwargs)` on the pool and await its result"""
+        if self.inline:
+            return fn(*args, **kwargs)
+
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                EXECUTOR_REJECTED.labels(pool=self.name).inc()
+                raise ExecutorSaturatedError(f"{self.name} executor is saturated")
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=f"{self.name}-worker"
+                )
+            self._queued += 1
+            self._update_gauges()
+
+            future = self._pool.submit(self._wrap(fn, args, kwargs))
+        # a task cancelled while still queued never runs, so `task()` cannot release its slot
+        future.add_done_callback(self._release_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _release_if_cancelled(self, future):
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+                self._update_gauges()
+
+    def shutdown(self, wait: bool = True):
+        """Release worker threads; a new pool is created on the next `run`"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+def create_executors():
+    """Create the inference and I/O executors from environment configuration.
+
+    EXECUTION_MODE selects `threadpool` (default) or `inline`.  Pool sizes are
+    read from INFERENCE_WORKERS / INFERENCE_QUEUE_SIZE and IO_WORKERS / IO_QUEUE_SIZE.
+    """
+    mode = os.getenv('EXECUTION_MODE', 'threadpool').lower()
+    if mode not in EXECUTION_MODES:
+        logger.warning("Unknown EXECUTION_MODE %r, falling back to threadpool", mode)
+        mode = 'threadpool'
+    inline = mode == 'inline'
+
+    inference = BoundedExecutor(
+        'inference',
+        max_workers=int(os.getenv('INFERENCE_WORKERS', str(min(4, os.cpu_count() or 1)))),
+        max_queue=int(os.getenv('INFERENCE_QUEUE_SIZE', '256')),
+        inline=inline,
+    )
+    io = BoundedExecutor(
+        'io',
+        max_workers=int(os.getenv('IO_WORKERS', '8')),
+        max_queue=int(os.getenv('IO_QUEUE_SIZE', '512')),
+        inline=inline,
+    )
+    logger.info(
+        "Execution mode: %s (inference workers=%d, io workers=%d)",
+        mode, inference.max_workers, io.max_workers
+    )
+    return inference, io
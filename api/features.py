@@ -0,0 +1,184 @@
+"""Feature engineering shared by the API, the training scripts, the CLI and the dashboard.
+
+The formulas live in `compute_features`, which works on plain scalars (one
+record) or on 1-D NumPy columns (a batch); `feature_matrix` writes the model
+inputs into a preallocated float matrix in `MODEL_FEATURES` order.  The input
+limits and the training medians live here too, so offline tools can validate
+and engineer records without importing the API.
+"""
+import json
+import logging
+import os
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# model input columns in the order expected by the scaler/model
+MODEL_FEATURES = [
+    'work_hours', 'screen_time_hours', 'meetings_count', 'breaks_taken', 'after_hours_work',
+    'sleep_hours', 'task_completion_rate', 'is_weekday',
+    'work_intensity_ratio', 'meeting_burden', 'break_adequacy', 'sleep_deficit',
+    'recovery_index', 'fatigue_risk', 'workload_pressure', 'task_efficiency',
+    'work_life_balance_score'
+]
+
+# derived metrics returned and stored alongside the model inputs
+DERIVED_METRICS = [
+    'screen_time_per_meeting', 'work_hours_productivity', 'health_risk_score',
+    'after_hours_work_hours_est', 'high_workload_flag', 'poor_recovery_flag'
+]
+
+# raw inputs (with `day_type` already encoded as `is_weekday`)
+INPUT_FEATURES = MODEL_FEATURES[:8]
+
+# (min, max) accepted for each numeric input; the API's `UserData` is built from these
+INPUT_BOUNDS = {
+    'work_hours': (0, 24),
+    'screen_time_hours': (0, 24),
+    'meetings_count': (0, 20),
+    'breaks_taken': (0, 10),
+    'after_hours_work': (0, 1),
+    'sleep_hours': (0, 12),
+    'task_completion_rate': (0, 100),
+}
+# numeric inputs that must be whole numbers
+INTEGER_INPUTS = ('meetings_count', 'breaks_taken', 'after_hours_work')
+
+# (work_hours, meetings_count) medians when neither artifact nor dataset is available
+DEFAULT_MEDIANS = (8.0, 3.0)
+
+
+def _clip(values, lower: float, upper: float):
+    # np.clip on a Python scalar costs several microseconds; min/max does not
+    if isinstance(values, np.ndarray):
+        return np.clip(values, lower, upper)
+    return min(max(values, lower), upper)
+
+
+def _non_negative(values):
+    if isinstance(values, np.ndarray):
+        return np.maximum(values, 0.0)
+    return max(values, 0.0)
+
+
+def _flag(mask):
+    if isinstance(mask, np.ndarray):
+        return mask.astype(int)
+    return int(mask)
+
+
+def compute_features(inputs: Mapping[str, object], median_hours: float,
+                     median_meetings: float) -> Dict[str, object]:
+    """Every input, engineered feature and derived metric for one record or a batch.
+
+    `inputs` maps each `INPUT_FEATURES` name either to a scalar or to a 1-D
+    float array of length N (all the same kind).  The medians drive
+    `high_workload_flag`.  Scalars come back as Python numbers, arrays as arrays.
+    """
+    work_hours = inputs['work_hours']
+    screen_time = inputs['screen_time_hours']
+    meetings = inputs['meetings_count']
+    breaks = inputs['breaks_taken']
+    after_hours = inputs['after_hours_work']
+    sleep = inputs['sleep_hours']
+    task_rate = inputs['task_completion_rate']
+
+    work_denom = work_hours + 0.1
+    recovery_index = (sleep + breaks) - screen_time
+    fatigue_risk = screen_time - (sleep * 1.5)
+
+    return {
+        'work_hours': work_hours, 'screen_time_hours': screen_time,
+        'meetings_count': meetings, 'breaks_taken': breaks,
+        'after_hours_work': after_hours, 'sleep_hours': sleep,
+        'task_completion_rate': task_rate, 'is_weekday': inputs['is_weekday'],
+        'work_intensity_ratio': screen_time / work_denom,
+        'meeting_burden': meetings / work_denom,
+        'break_adequacy': breaks / work_denom,
+        'sleep_deficit': 8 - sleep,
+        'recovery_index': recovery_index,
+        'fatigue_risk': fatigue_risk,
+        'workload_pressure': work_hours + (meetings * 0.25) + after_hours,
+        'task_efficiency': task_rate / work_denom,
+        'work_life_balance_score': _clip(
+            ((sleep / 8) * 30 + (breaks / 5) * 30 - (work_hours / 10) * 20 - after_hours * 10) * 2,
+            0.0, 100.0
+        ),
+        'screen_time_per_meeting': screen_time / (meetings + 0.1),
+        'work_hours_productivity': task_rate * (1 - (work_hours / 15)),
+        'health_risk_score': _clip(
+            (1 - (sleep / 8)) * 40 + _non_negative(fatigue_risk) * 10, 0.0, 100.0
+        ),
+        'after_hours_work_hours_est': after_hours * (work_hours * 0.1),
+        'high_workload_flag': _flag((work_hours > median_hours) & (meetings > median_meetings)),
+        'poor_recovery_flag': _flag((sleep < 6) & (recovery_index < 0)),
+    }
+
+
+def feature_matrix(features: Mapping[str, object], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Write the `MODEL_FEATURES` columns of `features` into an (N, 17) float matrix.
+
+    `out` may be a preallocated (N, 17) float array (or a row slice of a larger
+    one); it is filled in place and returned.
+    """
+    if not isinstance(features['work_hours'], np.ndarray):
+        # a single record: one list-to-array conversion beats 17 column writes
+        row = [features[name] for name in MODEL_FEATURES]
+        if out is None:
+            return np.array([row], dtype=float)
+        out[0] = row
+        return out
+    if out is None:
+        out = np.empty((len(features['work_hours']), len(MODEL_FEATURES)))
+    for index, name in enumerate(MODEL_FEATURES):
+        out[:, index] = features[name]
+    return out
+
+
+def engineer_columns(columns: Mapping[str, np.ndarray], median_hours: float, median_meetings: float,
+                     out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Columnar feature engineering: `(model_matrix, all_columns)` for N records.
+
+    `columns` maps each `INPUT_FEATURES` name to a 1-D float array of length N.
+    """
+    features = compute_features(columns, median_hours, median_meetings)
+    return feature_matrix(features, out), features
+
+
+def frame_columns(frame) -> Dict[str, np.ndarray]:
+    """`INPUT_FEATURES` columns of a DataFrame with a `day_type` column, as float arrays.
+
+    Columns are taken with `to_numpy` rather than copying the frame;
+    `day_type` matching is case-insensitive, as in the API.
+    """
+    columns = {name: frame[name].to_numpy(dtype=float) for name in INPUT_FEATURES[:-1]}
+    day_type = np.char.lower(frame['day_type'].to_numpy(dtype=str))
+    columns['is_weekday'] = (day_type == 'weekday').astype(float)
+    return columns
+
+
+def load_medians() -> Tuple[float, float]:
+    """`(median work_hours, median meetings_count)` that drive `high_workload_flag`.
+
+    Reads the precomputed `MEDIANS_PATH` (default `models/medians.json`) written
+    by training; only falls back to scanning the dataset with pandas when that
+    artifact is missing, and to `DEFAULT_MEDIANS` when that fails too.
+    """
+    medians_path = os.getenv('MEDIANS_PATH', 'models/medians.json')
+    try:
+        with open(medians_path, encoding='utf-8') as medians_file:
+            medians = json.load(medians_file)
+        return float(medians['work_hours']), float(medians['meetings_count'])
+    except (OSError, KeyError, ValueError) as medians_err:
+        logger.warning("Precomputed medians unavailable (%s), reading dataset", medians_err)
+    try:
+        import pandas as pd
+        path = os.getenv('DATA_PATH', 'data/work_from_home_burnout_dataset.csv')
+        if not os.path.exists(path):
+            path = os.getenv('DATA_PATH', 'data/work_from_home_burnout_dataset_transformed.csv')
+        df = pd.read_csv(path, usecols=['work_hours', 'meetings_count'])
+        return float(df['work_hours'].median()), float(df['meetings_count'].median())
+    except Exception:
+        return DEFAULT_MEDIANS
@@ -0,0 +1,73 @@
+"""Keyset pagination over one user's rows in `user_requests`, newest first.
+
+Pages seek on `(user_id, created_at, id)` instead of using OFFSET, so reading
+page N costs the same as page 1; the composite index on those columns serves
+both the filter and the order.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, tuple_
+
+# raw /predict inputs as stored (day_type is kept as is_weekday)
+INPUT_FIELDS = (
+    'work_hours', 'screen_time_hours', 'meetings_count', 'breaks_taken', 'after_hours_work',
+    'sleep_hours', 'task_completion_rate', 'is_weekday'
+)
+# always returned: the cursor is built from them
+KEY_FIELDS = ('id', 'created_at')
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque token pointing just past the row `(created_at, row_id)`"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Inverse of `encode_cursor`; ValueError for anything it did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, ValueError, TypeError) as cursor_err:
+        raise ValueError(f"invalid cursor: {token!r}") from cursor_err
+
+
+def resolve_fields(table, fields: Optional[str]) -> List[str]:
+    """Columns to return for `fields`: omitted/`all`, `inputs`, or a comma-separated list.
+
+    `id` and `created_at` are always included.  ValueError for unknown columns.
+    """
+    if fields is None or fields == 'all':
+        return [column.name for column in table.c if column.name != 'user_id']
+    requested = INPUT_FIELDS if fields == 'inputs' else [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in requested if name not in table.c or name == 'user_id']
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return list(KEY_FIELDS) + [name for name in dict.fromkeys(requested) if name not in KEY_FIELDS]
+
+
+def page_query(table, user_id: str, columns: Sequence[str], after: Optional[Cursor], limit: int):
+    """Up to `limit` rows of `user_id` older than `after` (from the newest when None)"""
+    query = (
+        select(*(table.c[name] for name in columns))
+        .where(table.c.user_id == user_id)
+        .order_by(table.c.created_at.desc(), table.c.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(tuple_(table.c.created_at, table.c.id) < tuple_(*after))
+    return query
+
+
+def row_to_item(columns: Sequence[str], row) -> Dict[str, object]:
+    item = dict(zip(columns, row))
+    if item.get('created_at') is not None:
+        item['created_at'] = item['created_at'].isoformat()
+    return item
@@ -1,23 +1,56 @@
 # pylint: disable=global-statement,import-outside-toplevel,too-many-locals
 #!/usr/bin/env python3
 """FastAPI backend with feature engineering for burnout prediction"""
+import asyncio
+import functools
+import hmac
+import json
 import logging
 import os
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, model_validator
-import joblib
+from pydantic import BaseModel, Field, ValidationError, model_validator
 import numpy as np
-import pandas as pd
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
 from sqlalchemy import (
-    create_engine, MetaData, Table, Column, Integer, String, DateTime, Float
+    MetaData, Table, Column, Index, Integer, String, DateTime, Float, func, select
 )
 from sqlalchemy.exc import SQLAlchemyError
+from starlette.requests import ClientDisconnect
+
+from api import columnar, compact_storage, history, rollups
+from api.admission import AdmissionControlMiddleware, create_admission_controller
+from api.batching import MicroBatcher
+from api.circuit_breaker import CircuitBreaker
+from api.cache import PredictionCache
+from api.executors import ExecutorSaturatedError, create_executors
+from api.features import (
+    DERIVED_METRICS, INPUT_BOUNDS, INTEGER_INPUTS, MODEL_FEATURES, compute_features, engineer_columns,
+    feature_matrix, load_medians
+)
+from api.model_bundle import (
+    ArtifactWatcher, ModelBundle, load_bundle, predict_scaled, scale_features, validate_bundle
+)
+from api.prediction_log import PredictionLogger
+from api.shared_memory import register_worker_memory_metrics
+from api.spool import Spool, SpoolReplayer
+from api.streaming import BadRow, DuplexStreamingResponse, csv_header, format_results, iter_records
+from api.storage import (
+    add_missing_columns, dispose_async_engines, dispose_engines, get_async_engine, get_engine, is_async_url, sync_url
+)
+from api.table_stats import TableStats, estimate_row_count, exact_row_count
+from api.timing import RequestStartMiddleware, observe_stage, timed_stage
+from api.tree_engine import compile_model
+from api.write_behind import WriteBehindBuffer
 
 # Load environment variables and configure logging FIRST
 load_dotenv()
@@ -30,10 +63,17 @@ ENABLE_WANDB = (
     and os.getenv('WANDB_API_KEY')
     and os.getenv('WANDB_MODE', '').lower() != 'disabled'
 )
-if ENABLE_WANDB:
+wandb = None  # imported and initialized during startup when enabled
+
+
+def _init_wandb():
+    """Import and initialize W&B for prediction tracking (when enabled)"""
+    global ENABLE_WANDB, wandb
+    if not ENABLE_WANDB or wandb is not None:
+        return
     try:
-        import wandb
-        wandb.init(
+        import wandb as wandb_module
+        wandb_module.init(
             project="burnout-prediction",
             entity=os.getenv('WANDB_ENTITY', 'kakarlagana18-iihmr'),
             name="api-predictions",
@@ -43,19 +83,56 @@ if ENABLE_WANDB:
             tags=["production", "api", "inference"],
             notes="Live API prediction tracking"
         )
+        wandb = wandb_module
         logger.info("W&B initialized for prediction tracking")
     except Exception as wb_err:
         logger.warning("W&B init failed (non-critical): %s", wb_err)
         ENABLE_WANDB = False
-else:
-    wandb = None  # type: ignore
+
+
+# Blocking inference and I/O run on bounded pools so the event loop stays free
+INFERENCE_EXECUTOR, IO_EXECUTOR = create_executors()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Application lifespan: load resources and warm up on startup, drain the
+    write-behind buffer and release executor threads on shutdown"""
+    await asyncio.get_running_loop().run_in_executor(None, _startup)
+    yield
+    READY.clear()
+    _, batcher = _MICRO_BATCHER
+    if batcher is not None:
+        await batcher.drain()
+    if MODEL_WATCHER is not None:
+        MODEL_WATCHER.stop()
+    PREDICTION_LOGGER.stop()
+    TABLE_STATS.stop()
+    if WRITE_BEHIND is not None:
+        logger.info("Draining %d buffered rows before shutdown", WRITE_BEHIND.depth)
+        # joins the flusher thread for up to 10s: keep the event loop free meanwhile
+        await asyncio.to_thread(WRITE_BEHIND.drain)
+    if SPOOL_REPLAYER is not None:
+        SPOOL_REPLAYER.stop()
+    INFERENCE_EXECUTOR.shutdown(wait=True)
+    IO_EXECUTOR.shutdown(wait=True)
+    dispose_engines()
+    await dispose_async_engines()
+
 
 app = FastAPI(
     title="Burnout Risk Prediction API",
     description="ML API for burnout risk prediction with feature engineering",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
+# Bounded in-flight /predict* work; excess requests get a 503 with Retry-After.
+# The last middleware added runs first: CORS headers are set on shed responses,
+# and queueing time is not counted as request validation.
+ADMISSION = create_admission_controller()
+app.add_middleware(RequestStartMiddleware)
+app.add_middleware(AdmissionControlMiddleware, controller=ADMISSION)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -67,21 +144,84 @@ app.add_middleware(
 # Prometheus metrics
 REQUEST_COUNT = Counter('api_requests_total', 'Total API requests', ['method', 'endpoint', 'status'])
 REQUEST_LATENCY = Histogram('api_request_duration_seconds', 'Request latency', ['method', 'endpoint'])
-PREDICTION_COUNT = Counter('predictions_total', 'Total predictions made', ['risk_level'])
+PREDICTION_COUNT = Counter(
+    'predictions_total', 'Total predictions made', ['risk_level', 'model_version']
+)
 ACTIVE_REQUESTS = Gauge('api_active_requests', 'Number of active requests')
 MODEL_LOADED = Gauge('model_loaded', 'Whether model is loaded (1=yes, 0=no)')
+MODEL_INFO = Gauge('model_info', 'Currently served model version (value is always 1)', ['version'])
+MODEL_RELOADS = Counter('model_reloads_total', 'Model hot-reload attempts', ['status'])
+STARTUP_DURATION = Gauge('app_startup_seconds', 'Time spent loading resources and warming up')
+STREAM_ROWS = Counter('stream_rows_total', 'Rows read by /predict/stream', ['status'])
 DB_OPERATIONS = Counter('database_operations_total', 'Database operations', ['operation', 'status'])
+DB_BUDGET_EXCEEDED = Counter(
+    'database_latency_budget_exceeded_total', 'Inserts that outlived DB_LATENCY_BUDGET_MS and finished detached'
+)
+
+# upper bound on records accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '10000'))
+
+# rows scored per model call by /predict/stream
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '1000'))
+
+# dynamic micro-batching of concurrent /predict calls (disabled by default)
+MICROBATCH_ENABLED = os.getenv('MICROBATCH_ENABLED', 'false').lower() == 'true'
+MICROBATCH_WINDOW_MS = float(os.getenv('MICROBATCH_WINDOW_MS', '2'))
+MICROBATCH_MAX_SIZE = int(os.getenv('MICROBATCH_MAX_SIZE', '64'))
+
+# maintain the /stats rollup tables on every insert
+ROLLUPS_ENABLED = os.getenv('ROLLUPS_ENABLED', 'true').lower() == 'true'
+# rows the global and daily rollups are spread over, so inserts do not contend on one row
+ROLLUP_SHARDS = int(os.getenv('ROLLUP_SHARDS', str(rollups.DEFAULT_SHARDS)))
+
+# /users/{user_id}/history: rows read per query while streaming, and the largest page
+HISTORY_FETCH_SIZE = int(os.getenv('HISTORY_FETCH_SIZE', '500'))
+HISTORY_MAX_LIMIT = int(os.getenv('HISTORY_MAX_LIMIT', '10000'))
+
+# seconds between reconciliations of the cached /db-status row count (0 = only on demand)
+DB_STATS_RECONCILE_SECONDS = float(os.getenv('DB_STATS_RECONCILE_SECONDS', '60'))
+
+# requests wait at most this long for their user_requests insert; slower inserts finish in the background
+DB_LATENCY_BUDGET_MS = float(os.getenv('DB_LATENCY_BUDGET_MS', '250'))
+# the database circuit opens after this many consecutive failed (or slower than DB_SLOW_INSERT_MS) inserts
+DB_BREAKER_FAILURES = int(os.getenv('DB_BREAKER_FAILURES', '5'))
+DB_BREAKER_RESET_SECONDS = float(os.getenv('DB_BREAKER_RESET_SECONDS', '30'))
+DB_SLOW_INSERT_MS = float(os.getenv('DB_SLOW_INSERT_MS', '2000'))
+# rows the database does not take are spooled to SPOOL_DIR and replayed once it recovers
+SPOOL_ENABLED = os.getenv('SPOOL_ENABLED', 'true').lower() == 'true'
+SPOOL_DIR = os.getenv('SPOOL_DIR', 'spool')
+SPOOL_FSYNC_INTERVAL_MS = float(os.getenv('SPOOL_FSYNC_INTERVAL_MS', '200'))
+SPOOL_REPLAY_INTERVAL = float(os.getenv('SPOOL_REPLAY_INTERVAL', '5'))
+
+# `compact` writes only raw inputs, tracking fields and prediction outputs to
+# user_requests_compact and reads derived metrics from the user_requests_expanded view
+USER_REQUESTS_STORAGE = os.getenv('USER_REQUESTS_STORAGE', 'wide').lower()
+COMPACT_STORAGE = USER_REQUESTS_STORAGE == 'compact'
+
+# write-behind buffering of user_requests inserts (disabled by default)
+WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND_ENABLED', 'false').lower() == 'true'
+
+# user_requests columns stored as integers
+INT_COLUMNS = {
+    'meetings_count', 'breaks_taken', 'after_hours_work', 'is_weekday',
+    'high_workload_flag', 'poor_recovery_flag'
+}
+
+
+def _bounded(name: str):
+    lower, upper = INPUT_BOUNDS[name]
+    return Field(..., ge=lower, le=upper)
 
 
 class UserData(BaseModel):
     """Input data for prediction"""
-    work_hours: float = Field(..., ge=0, le=24)
-    screen_time_hours: float = Field(..., ge=0, le=24)
-    meetings_count: int = Field(..., ge=0, le=20)
-    breaks_taken: int = Field(..., ge=0, le=10)
-    after_hours_work: int = Field(..., ge=0, le=1)
-    sleep_hours: float = Field(..., ge=0, le=12)
-    task_completion_rate: float = Field(..., ge=0, le=100)
+    work_hours: float = _bounded('work_hours')
+    screen_time_hours: float = _bounded('screen_time_hours')
+    meetings_count: int = _bounded('meetings_count')
+    breaks_taken: int = _bounded('breaks_taken')
+    after_hours_work: int = _bounded('after_hours_work')
+    sleep_hours: float = _bounded('sleep_hours')
+    task_completion_rate: float = _bounded('task_completion_rate')
     day_type: str = Field(..., description="Weekday or Weekend")
     # optional tracking fields
     name: Optional[str] = Field(None, description="Optional user name for tracking")
@@ -95,38 +235,104 @@ class UserData(BaseModel):
         return self
 
 
+# /predict/columnar validates with the same limits as UserData
+COLUMNAR_BOUNDS = INPUT_BOUNDS
+COLUMNAR_INT_COLUMNS = INTEGER_INPUTS
+
+
 class BurnoutPrediction(BaseModel):
     """Prediction output"""
     risk_level: str
     risk_probability: float
     timestamp: str
+    model_version: Optional[str] = None
     features: dict = Field(..., description="All input and derived metrics computed by the API")
 
 
+class BatchUserData(BaseModel):
+    """Batch of employee records scored in a single vectorized pass"""
+    records: List[UserData] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchPredictionItem(BaseModel):
+    """Per-record prediction inside a batch response"""
+    user_id: Optional[str] = None
+    name: Optional[str] = None
+    risk_level: str
+    risk_probability: float
+
+
+class BatchPrediction(BaseModel):
+    """Batch prediction output"""
+    count: int
+    high_risk_count: int
+    timestamp: str
+    model_version: Optional[str] = None
+    predictions: List[BatchPredictionItem]
+
+
 class HealthCheck(BaseModel):
     """Health check response"""
     status: str
     timestamp: str
     model_loaded: bool
+    model_version: Optional[str] = None
+
+
+class ModelReloadRequest(BaseModel):
+    """Admin request to hot-reload the model"""
+    version: Optional[str] = Field(
+        None, description="Artifact directory under MODEL_ROOT; omit to reload the configured paths"
+    )
+
+
+# the live model/scaler/feature-names set; replaced atomically on reload
+BUNDLE: Optional[ModelBundle] = None
+_RELOAD_LOCK = threading.Lock()
 
+MODEL_PATH = os.getenv('MODEL_PATH', 'models/best_model.joblib')
+PREPROCESSOR_PATH = os.getenv('PREPROCESSOR_PATH', 'models/preprocessor.joblib')
+FEATURE_NAMES_PATH = os.getenv('FEATURE_NAMES_PATH', 'models/feature_names.joblib')
+# versioned artifact sets live in MODEL_ROOT/<version>/
+MODEL_ROOT = os.getenv('MODEL_ROOT', 'models')
+# seconds between artifact polls for hot reload (0 disables the watcher)
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', '0'))
+# required in the X-Admin-Token header for admin endpoints (unset disables them)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
 
-MODEL = None
-SCALER = None
+# inference backend: "sklearn" calls the estimator, "compiled" uses flat node arrays
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'sklearn').lower()
+# above this many rows the estimator's native batch code is faster than the compiled engine
+COMPILED_MAX_ROWS = int(os.getenv('COMPILED_MAX_ROWS', '512'))
+
+# how workers share model memory: "off" loads a private copy per worker, "mmap"
+# maps a compiled forest from MODEL_SHARED_DIR, "preload" loads at import so a
+# forking server (gunicorn --preload) shares the pages copy-on-write
+MODEL_SHARING = os.getenv('MODEL_SHARING', 'off').lower()
+MODEL_SHARED_DIR = os.getenv('MODEL_SHARED_DIR', 'models/shared')
 
 # medians used for flag calculations; loaded lazily
 MEDIAN_HOURS: Optional[float] = None
 MEDIAN_MEETINGS: Optional[float] = None
 
+# set once resources are loaded and a warm-up inference succeeded
+READY = threading.Event()
+
 # ---------- database setup ----------
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./user_requests.db')
 logger.info("DATABASE_URL configured: %s", DATABASE_URL[:50] + "..." if len(DATABASE_URL) > 50 else DATABASE_URL)
 
+# an async driver in DATABASE_URL (postgresql+asyncpg://, sqlite+aiosqlite://) serves request-path
+# inserts and /db-status queries; the sync engine for the same database serves everything on threads
+DB_ASYNC = is_async_url(DATABASE_URL)
+
 try:
-    engine = create_engine(DATABASE_URL, echo=False, future=True)
-    logger.info("Database engine created successfully")
+    engine = get_engine(sync_url(DATABASE_URL))
+    async_engine = get_async_engine(DATABASE_URL) if DB_ASYNC else None
+    logger.info("Database engine created successfully (%s driver)", "async" if DB_ASYNC else "sync")
 except Exception as engine_err:
     logger.error("Failed to create database engine: %s", engine_err)
-    engine = None
+    engine = async_engine = None
 
 metadata = MetaData()
 
@@ -161,87 +367,127 @@ user_requests = Table(
     Column('health_risk_score', Float),
     Column('after_hours_work_hours_est', Float),
     Column('high_workload_flag', Integer),
-    Column('poor_recovery_flag', Integer)
+    Column('poor_recovery_flag', Integer),
+    # Prediction outcome (NULL on rows stored before it was recorded)
+    Column('model_version', String, nullable=True),
+    Column('risk_prediction', Integer, nullable=True),
+    Column('risk_probability', Float, nullable=True)
+)
+
+# keyset pagination of /users/{user_id}/history seeks on this index
+USER_HISTORY_INDEX = Index(
+    'idx_user_requests_user_history', user_requests.c.user_id, user_requests.c.created_at, user_requests.c.id
 )
 
-# create table if missing
-if engine:
+# the table request rows are written to, and the table (or view) with every column for reading them
+if COMPACT_STORAGE:
+    REQUESTS_TABLE, REQUESTS_READ = compact_storage.user_requests_compact, compact_storage.user_requests_expanded
+else:
+    REQUESTS_TABLE = REQUESTS_READ = user_requests
+
+# /db-status reads these instead of scanning user_requests
+TABLE_STATS = TableStats(
+    REQUESTS_TABLE.name, lambda: estimate_row_count(engine, REQUESTS_TABLE.name), DB_STATS_RECONCILE_SECONDS
+)
+
+
+def _init_database():
+    """Create tables if missing and test the connection"""
+    if not engine:
+        logger.error("✗ No database engine - skipping table creation")
+        return
     try:
-        metadata.create_all(engine)
-        logger.info("✓ Database table 'user_requests' initialized successfully")
+        if COMPACT_STORAGE:
+            compact_storage.create_schema(engine)
+        else:
+            metadata.create_all(engine)
+            # create_all only adds indexes and columns together with a new table
+            USER_HISTORY_INDEX.create(engine, checkfirst=True)
+            added = add_missing_columns(engine, user_requests)
+            if added:
+                logger.info("Added columns %s to %s", ", ".join(added), user_requests.name)
+        logger.info("✓ Database table '%s' initialized successfully", REQUESTS_TABLE.name)
+        if ROLLUPS_ENABLED and rollups.create_schema(engine):
+            logger.warning("Recreated rollup tables with an outdated layout; "
+                           "run scripts/backfill_rollups.py to refill them")
         # Test connection
         with engine.connect() as conn:
             logger.info("✓ Database connection test successful")
+            if ROLLUPS_ENABLED and conn.execute(select(rollups.rollup_global.c.id)).first() is None \
+                    and conn.execute(select(REQUESTS_TABLE.c.id).limit(1)).first() is not None:
+                logger.warning("Rollup tables are empty but %s is not; "
+                               "run scripts/backfill_rollups.py to build them", REQUESTS_TABLE.name)
     except Exception as e:
         logger.error("✗ Database initialization failed: %s", e, exc_info=True)
-else:
-    logger.error("✗ No database engine - skipping table creation")
 
 # -------------------------------------
 
 
 def _load_medians():
-    """Load median values from dataset"""
+    """Load median values used for flag calculations (once per process)"""
     global MEDIAN_HOURS, MEDIAN_MEETINGS
-    if MEDIAN_HOURS is None or MEDIAN_MEETINGS is None:
-        try:
-            path = os.getenv('DATA_PATH', 'data/work_from_home_burnout_dataset.csv')
-            if not os.path.exists(path):
-                path = os.getenv('DATA_PATH', 'data/work_from_home_burnout_dataset_transformed.csv')
-            df = pd.read_csv(path)
-            MEDIAN_HOURS = df['work_hours'].median()
-            MEDIAN_MEETINGS = df['meetings_count'].median()
-        except Exception:
-            MEDIAN_HOURS = 8
-            MEDIAN_MEETINGS = 3
+    if MEDIAN_HOURS is not None and MEDIAN_MEETINGS is not None:
+        return
+    MEDIAN_HOURS, MEDIAN_MEETINGS = load_medians()
+
+
+def _dummy_bundle() -> ModelBundle:
+    """Fallback model for development/testing when artifacts are missing"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    model = RandomForestClassifier(n_estimators=10, random_state=42)
+    scaler = StandardScaler()
+    x_dummy = np.random.rand(100, 17)
+    y_dummy = np.random.randint(0, 2, 100)
+    model.fit(x_dummy, y_dummy)
+    scaler.fit(x_dummy)
+    return ModelBundle(
+        model=model, scaler=scaler, feature_names=list(MODEL_FEATURES), version="dummy",
+        compiled=compile_model(model) if INFERENCE_BACKEND == 'compiled' else None
+    )
 
 
-# ensure medians are available early
-_load_medians()
+def _activate_bundle(bundle: ModelBundle):
+    """Atomically make `bundle` the live model and update model metrics"""
+    global BUNDLE
+    BUNDLE = bundle
+    MODEL_LOADED.set(1)
+    MODEL_INFO.clear()
+    MODEL_INFO.labels(version=bundle.version).set(1)
+    logger.info("Model version %s is live", bundle.version)
+
 
-# Load model immediately at import (not just at startup)
+def _shared_dir() -> Optional[str]:
+    """Directory of memory-mapped model artifacts when mmap sharing is on"""
+    return MODEL_SHARED_DIR if MODEL_SHARING == 'mmap' else None
 
 
 def _load_model_sync():
-    """Load model and scaler at module import"""
-    global MODEL, SCALER
+    """Load the configured model, scaler and feature names into the live bundle"""
     try:
-        model_path = os.getenv('MODEL_PATH', 'models/best_model.joblib')
-        scaler_path = os.getenv('PREPROCESSOR_PATH', 'models/preprocessor.joblib')
+        logger.info("Attempting to load model from: %s", MODEL_PATH)
+        logger.info("Attempting to load scaler from: %s", PREPROCESSOR_PATH)
 
-        logger.info("Attempting to load model from: %s", model_path)
-        logger.info("Attempting to load scaler from: %s", scaler_path)
-
-        if not os.path.exists(model_path):
-            logger.error("Model file not found at %s", model_path)
+        if not os.path.exists(MODEL_PATH):
+            logger.error("Model file not found at %s", MODEL_PATH)
             logger.error("Current working directory: %s", os.getcwd())
             logger.error("Directory contents: %s", os.listdir('.'))
             if os.path.exists('models'):
                 logger.error("Models directory contents: %s", os.listdir('models'))
-            raise FileNotFoundError(f"Model file not found: {model_path}")
-
-        if not os.path.exists(scaler_path):
-            logger.error("Scaler file not found at %s", scaler_path)
-            raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
-
-        MODEL = joblib.load(model_path)
-        logger.info("✓ Model loaded successfully from %s", model_path)
-
-        SCALER = joblib.load(scaler_path)
-        logger.info("✓ Scaler loaded successfully from %s", scaler_path)
 
+        bundle = load_bundle(
+            MODEL_PATH, PREPROCESSOR_PATH, FEATURE_NAMES_PATH, MODEL_FEATURES, INFERENCE_BACKEND,
+            shared_dir=_shared_dir()
+        )
     except FileNotFoundError as fnf_err:
         logger.error("File not found error: %s", fnf_err)
+        if os.getenv('ENVIRONMENT', '').lower() == 'production':
+            logger.critical("Refusing to train a dummy model in production; model stays unloaded")
+            MODEL_LOADED.set(0)
+            return
         logger.warning("Creating fallback dummy model for development/testing only")
         try:
-            from sklearn.ensemble import RandomForestClassifier
-            from sklearn.preprocessing import StandardScaler
-            MODEL = RandomForestClassifier(n_estimators=10, random_state=42)
-            SCALER = StandardScaler()
-            x_dummy = np.random.rand(100, 17)
-            y_dummy = np.random.randint(0, 2, 100)
-            MODEL.fit(x_dummy, y_dummy)
-            SCALER.fit(x_dummy)
+            bundle = _dummy_bundle()
             logger.warning("⚠ Dummy model created - NOT FOR PRODUCTION USE")
         except Exception as fallback_err:
             logger.critical("Failed to create fallback models: %s", fallback_err)
@@ -250,15 +496,59 @@ def _load_model_sync():
         logger.error("Error loading model/scaler: %s", e, exc_info=True)
         raise
 
+    _activate_bundle(bundle)
 
-# Load model at import time
-_load_model_sync()
 
-# Set model loaded metric
-if MODEL is not None:
-    MODEL_LOADED.set(1)
-else:
-    MODEL_LOADED.set(0)
+def _artifact_paths(version: Optional[str] = None):
+    """Model, scaler and feature-name paths for the configured or a versioned set"""
+    if version is None:
+        return MODEL_PATH, PREPROCESSOR_PATH, FEATURE_NAMES_PATH
+    if not re.fullmatch(r'[A-Za-z0-9._-]+', version) or version in ('.', '..'):
+        raise ValueError(f"Invalid model version name: {version!r}")
+    version_dir = os.path.join(MODEL_ROOT, version)
+    return (
+        os.path.join(version_dir, os.path.basename(MODEL_PATH)),
+        os.path.join(version_dir, os.path.basename(PREPROCESSOR_PATH)),
+        os.path.join(version_dir, os.path.basename(FEATURE_NAMES_PATH)),
+    )
+
+
+def reload_model(version: Optional[str] = None) -> ModelBundle:
+    """Load, validate and atomically swap in a new model bundle.
+
+    In-flight requests keep the bundle they started with; the previous bundle
+    stays live if loading or the smoke prediction fails.
+    """
+    with _RELOAD_LOCK:
+        try:
+            model_path, scaler_path, names_path = _artifact_paths(version)
+            bundle = load_bundle(
+                model_path, scaler_path, names_path, MODEL_FEATURES, INFERENCE_BACKEND,
+                shared_dir=_shared_dir()
+            )
+            validate_bundle(bundle, MODEL_FEATURES, _warm_up_matrix())
+        except Exception:
+            MODEL_RELOADS.labels(status='failed').inc()
+            raise
+        if BUNDLE is not None and bundle.version == BUNDLE.version:
+            MODEL_RELOADS.labels(status='unchanged').inc()
+            logger.info("Model version %s already live, nothing to swap", bundle.version)
+            return BUNDLE
+        _activate_bundle(bundle)
+        MODEL_RELOADS.labels(status='success').inc()
+        return bundle
+
+
+MODEL_WATCHER = ArtifactWatcher(
+    [MODEL_PATH, PREPROCESSOR_PATH, FEATURE_NAMES_PATH], reload_model, MODEL_WATCH_INTERVAL
+) if MODEL_WATCH_INTERVAL > 0 else None
+
+
+def _compiled_engine(bundle: ModelBundle, n_rows: int):
+    """Compiled engine for `bundle`, or None to use the estimator"""
+    if bundle.compiled is None or n_rows > COMPILED_MAX_ROWS:
+        return None
+    return bundle.compiled
 
 
 def engineer_features(data: UserData):
@@ -269,61 +559,161 @@ def engineer_features(data: UserData):
     includes every input plus the additional derived metrics/flags so callers can
     inspect them.
     """
-    # Base inputs
-    work_hours = data.work_hours
-    screen_time = data.screen_time_hours
-    meetings = data.meetings_count
-    breaks = data.breaks_taken
-    after_hours = data.after_hours_work
-    sleep = data.sleep_hours
-    task_rate = data.task_completion_rate
-    is_weekday = 1 if data.day_type.lower() == "weekday" else 0
-
-    # Primary engineered features (used by model)
-    work_intensity_ratio = screen_time / (work_hours + 0.1)
-    meeting_burden = meetings / (work_hours + 0.1)
-    break_adequacy = breaks / (work_hours + 0.1)
-    sleep_deficit = 8 - sleep
-    recovery_index = (sleep + breaks) - screen_time
-    fatigue_risk = screen_time - (sleep * 1.5)
-    workload_pressure = work_hours + (meetings * 0.25) + after_hours
-    task_efficiency = task_rate / (work_hours + 0.1)
-    wlb_score = np.clip(
-        ((sleep / 8) * 30 + (breaks / 5) * 30 - (work_hours / 10) * 20 - after_hours * 10) * 2,
-        0, 100
+    inputs = {
+        'work_hours': data.work_hours, 'screen_time_hours': data.screen_time_hours,
+        'meetings_count': data.meetings_count, 'breaks_taken': data.breaks_taken,
+        'after_hours_work': data.after_hours_work, 'sleep_hours': data.sleep_hours,
+        'task_completion_rate': data.task_completion_rate,
+        'is_weekday': 1 if data.day_type.lower() == "weekday" else 0,
+    }
+    all_feats = compute_features(inputs, MEDIAN_HOURS, MEDIAN_MEETINGS)
+    return feature_matrix(all_feats), all_feats
+
+
+def records_to_columns(records: List[UserData]) -> Dict[str, np.ndarray]:
+    """Convert validated records into the raw input columns used by the model"""
+    return {
+        'work_hours': np.fromiter((r.work_hours for r in records), float, len(records)),
+        'screen_time_hours': np.fromiter((r.screen_time_hours for r in records), float, len(records)),
+        'meetings_count': np.fromiter((r.meetings_count for r in records), float, len(records)),
+        'breaks_taken': np.fromiter((r.breaks_taken for r in records), float, len(records)),
+        'after_hours_work': np.fromiter((r.after_hours_work for r in records), float, len(records)),
+        'sleep_hours': np.fromiter((r.sleep_hours for r in records), float, len(records)),
+        'task_completion_rate': np.fromiter(
+            (r.task_completion_rate for r in records), float, len(records)
+        ),
+        'is_weekday': np.fromiter(
+            (r.day_type.lower() == "weekday" for r in records), float, len(records)
+        ),
+    }
+
+
+def engineer_feature_columns(columns: Dict[str, np.ndarray]):
+    """Columnar version of `engineer_features` working on NumPy arrays.
+
+    `columns` maps each raw input name (plus `is_weekday`) to a 1-D array of
+    length N.  Returns `(model_matrix, all_columns)` where `model_matrix` is the
+    (N, 17) float array expected by the scaler/model and `all_columns` maps every
+    input and derived metric name to its column.
+    """
+    return engineer_columns(columns, MEDIAN_HOURS, MEDIAN_MEETINGS)
+
+
+def _build_request_row(all_features: dict, user_id: Optional[str], name: Optional[str],
+                       created_at: datetime, prediction: int, probability: float, model_version: str) -> dict:
+    """Build a request row from an engineered feature dict and its prediction.
+
+    The row carries every column of both storage modes; an insert only
+    writes the columns its table has, and rollups read the derived metrics.
+    """
+    row = {
+        'user_id': user_id, 'name': name, 'created_at': created_at, 'model_version': model_version,
+        'risk_prediction': int(prediction), 'risk_probability': float(probability),
+    }
+    for key in MODEL_FEATURES + DERIVED_METRICS:
+        row[key] = int(all_features[key]) if key in INT_COLUMNS else float(all_features[key])
+    return row
+
+
+def _build_request_rows(all_cols: Dict[str, np.ndarray], records: List[UserData], created_at: datetime,
+                        labels: np.ndarray, probabilities: np.ndarray, model_version: str) -> List[dict]:
+    """Build request rows for a batch from columnar features and predictions"""
+    return _build_column_rows(
+        all_cols, [record.user_id for record in records], [record.name for record in records], created_at,
+        labels, probabilities, model_version
     )
 
-    # Additional derived metrics/flags
-    screen_per_meeting = screen_time / (meetings + 0.1)
-    hours_productivity = task_rate * (1 - (work_hours / 15))
-    health_risk = np.clip((1 - (sleep / 8)) * 40 + max(0, fatigue_risk) * 10, 0, 100)
-    after_hours_est = after_hours * (work_hours * 0.1)
-    high_workload = int((work_hours > MEDIAN_HOURS) and (meetings > MEDIAN_MEETINGS))
-    poor_recovery = int((sleep < 6) and (recovery_index < 0))
-
-    # features array for model (maintain existing order)
-    model_feats = [
-        work_hours, screen_time, meetings, breaks, after_hours, sleep, task_rate, is_weekday,
-        work_intensity_ratio, meeting_burden, break_adequacy, sleep_deficit,
-        recovery_index, fatigue_risk, workload_pressure, task_efficiency, wlb_score
-    ]
-
-    all_feats = {
-        'work_hours': work_hours, 'screen_time_hours': screen_time,
-        'meetings_count': meetings, 'breaks_taken': breaks,
-        'after_hours_work': after_hours, 'sleep_hours': sleep,
-        'task_completion_rate': task_rate, 'is_weekday': is_weekday,
-        'work_intensity_ratio': work_intensity_ratio, 'meeting_burden': meeting_burden,
-        'break_adequacy': break_adequacy, 'sleep_deficit': sleep_deficit,
-        'recovery_index': recovery_index, 'fatigue_risk': fatigue_risk,
-        'workload_pressure': workload_pressure, 'task_efficiency': task_efficiency,
-        'work_life_balance_score': wlb_score, 'screen_time_per_meeting': screen_per_meeting,
-        'work_hours_productivity': hours_productivity, 'health_risk_score': health_risk,
-        'after_hours_work_hours_est': after_hours_est,
-        'high_workload_flag': high_workload, 'poor_recovery_flag': poor_recovery
+
+def _build_column_rows(all_cols: Dict[str, np.ndarray], user_ids: List[Optional[str]],
+                       names: List[Optional[str]], created_at: datetime,
+                       labels: np.ndarray, probabilities: np.ndarray, model_version: str) -> List[dict]:
+    """Request rows from columnar features, predictions and per-row tracking fields"""
+    as_lists = {
+        key: (all_cols[key].astype(int) if key in INT_COLUMNS else all_cols[key].astype(float)).tolist()
+        for key in MODEL_FEATURES + DERIVED_METRICS
     }
+    as_lists['risk_prediction'] = np.asarray(labels).astype(int).tolist()
+    as_lists['risk_probability'] = np.asarray(probabilities, dtype=float).tolist()
+    rows = []
+    for i, (user_id, name) in enumerate(zip(user_ids, names)):
+        row = {'user_id': user_id, 'name': name, 'created_at': created_at, 'model_version': model_version}
+        for key, values in as_lists.items():
+            row[key] = values[i]
+        rows.append(row)
+    return rows
+
+
+def _score_matrix(features: np.ndarray, bundle: Optional[ModelBundle] = None,
+                  endpoint: Optional[str] = None):
+    """Scale and score an (N, 17) feature matrix with one transform and one predict_proba.
+
+    Returns `(labels, probabilities)` where labels are the model's 0/1 classes and
+    probabilities are the positive-class (High risk) probabilities.  Uses the live bundle unless
+    one is given; stage timings are recorded when `endpoint` is given.
+    """
+    bundle = bundle or BUNDLE
+    started = time.perf_counter()
+    features_scaled = scale_features(bundle, features)
+    scaled = time.perf_counter()
+    if endpoint is not None:
+        observe_stage(endpoint, 'scaling', bundle.version, scaled - started)
 
-    return np.array([model_feats]), all_feats
+    try:
+        return predict_scaled(bundle, features_scaled, _compiled_engine(bundle, len(features_scaled)))
+    finally:
+        if endpoint is not None:
+            observe_stage(endpoint, 'inference', bundle.version, time.perf_counter() - scaled)
+
+
+def _warm_up_matrix() -> np.ndarray:
+    """Feature matrix for one representative record (warm-up and smoke tests)"""
+    sample = UserData(
+        work_hours=8, screen_time_hours=6, meetings_count=3, breaks_taken=3,
+        after_hours_work=0, sleep_hours=7, task_completion_rate=80,
+        day_type="Weekday", user_id="warm-up"
+    )
+    features_array, _ = engineer_features(sample)
+    return features_array
+
+
+def _warm_up():
+    """Run one inference so the first real request doesn't pay first-call costs"""
+    _score_matrix(_warm_up_matrix())
+
+
+def _startup():
+    """Load every resource the API needs; runs once from the app lifespan"""
+    started = time.perf_counter()
+    _init_database()
+    if engine is not None and DB_STATS_RECONCILE_SECONDS > 0:
+        TABLE_STATS.start()
+    _load_medians()
+    register_worker_memory_metrics()
+    if BUNDLE is None:
+        try:
+            _load_model_sync()
+        except Exception as load_err:
+            logger.critical("Model loading failed: %s", load_err)
+    _init_wandb()
+    if ENABLE_WANDB and wandb is not None:
+        PREDICTION_LOGGER.start()
+    if WRITE_BEHIND is not None:
+        WRITE_BEHIND.start()
+    if SPOOL_REPLAYER is not None and engine is not None:
+        SPOOL_REPLAYER.start()
+
+    if MODEL_WATCHER is not None:
+        MODEL_WATCHER.start()
+
+    if BUNDLE is not None:
+        try:
+            _warm_up()
+            READY.set()
+        except Exception as warm_err:
+            logger.error("Warm-up inference failed: %s", warm_err, exc_info=True)
+
+    STARTUP_DURATION.set(time.perf_counter() - started)
+    logger.info("Startup finished in %.2fs (ready=%s)", time.perf_counter() - started, READY.is_set())
 
 
 @app.get("/health", response_model=HealthCheck)
@@ -333,54 +723,48 @@ async def health_check():
     return HealthCheck(
         status="healthy",
         timestamp=datetime.now().isoformat(),
-        model_loaded=MODEL is not None
+        model_loaded=BUNDLE is not None,
+        model_version=BUNDLE.version if BUNDLE is not None else None
     )
 
 
-@app.post("/predict", response_model=BurnoutPrediction)
-async def predict(user_data: UserData):
-    """Make burnout risk prediction with feature engineering"""
-    import time
-    start_time = time.time()
-    ACTIVE_REQUESTS.inc()
-
-    try:
-        if MODEL is None:
-            REQUEST_COUNT.labels(method='POST', endpoint='/predict', status='503').inc()
-            raise HTTPException(status_code=503, detail="Model not loaded")
-        if SCALER is None:
-            REQUEST_COUNT.labels(method='POST', endpoint='/predict', status='503').inc()
-            raise HTTPException(status_code=503, detail="Scaler not loaded")
-
-        # Engineer features (returns tuple of model-ready array and full dict)
-        features_array, all_features = engineer_features(user_data)
-        logger.info("Raw model feature array shape: %s", features_array.shape)
+def _predict_sync(features_array: np.ndarray, bundle: ModelBundle):
+    """Scale and score a single feature row; runs on the inference executor.
 
-        # add tracking info to features dict for storage
-        all_features['name'] = user_data.name
-        all_features['user_id'] = user_data.user_id
-
-        # Scale features using trained scaler
+    Returns `(prediction, probability, scored)` where `scored` is False when a
+    fallback value was used instead of a real model output.
+    """
+    scored = True
+    # Scale features using trained scaler
+    with timed_stage('/predict', 'scaling', bundle.version):
         try:
-            features_scaled = SCALER.transform(features_array)
+            features_scaled = bundle.scaler.transform(features_array)
             logger.info("Features scaled using trained scaler")
         except Exception as scale_err:
             logger.error("Scaling failed: %s, using raw features", scale_err)
             features_scaled = features_array
 
+    with timed_stage('/predict', 'inference', bundle.version):
         # Predict with comprehensive error handling
         try:
             logger.info("Making prediction with features shape: %s", features_scaled.shape)
-            prediction = MODEL.predict(features_scaled)[0]
+            engine = _compiled_engine(bundle, len(features_scaled))
+            if engine is not None:
+                # label and probability from a single traversal
+                labels, proba = engine.predict_with_proba(features_scaled)
+                return int(labels[0]), float(proba[0][1]), scored
+
+            prediction = bundle.model.predict(features_scaled)[0]
             logger.info("Prediction made: %s", prediction)
 
             # Safely get probability
             try:
-                probability = MODEL.predict_proba(features_scaled)[0][1]
+                probability = bundle.model.predict_proba(features_scaled)[0][1]
                 logger.info("Probability obtained: %s", probability)
             except Exception as proba_err:
                 logger.warning("predict_proba failed: %s, using fallback", proba_err)
                 probability = 0.7 if prediction == 1 else 0.3
+                scored = False
 
         except Exception as pred_err:
             logger.error("Model prediction failed: %s", pred_err, exc_info=True)
@@ -388,105 +772,647 @@ async def predict(user_data: UserData):
             logger.error("Using fallback neutral prediction")
             prediction = 0
             probability = 0.5
+            scored = False
+
+    return prediction, probability, scored
+
+
+def _log_summary_to_wandb(summary: dict):
+    """Send one windowed prediction summary to W&B; runs on the logger thread"""
+    if wandb is None:
+        return
+    payload = {}
+    for key, value in summary.items():
+        if key.endswith('_hist'):
+            payload[key] = wandb.Histogram(np_histogram=value)
+        else:
+            payload[key] = value
+    wandb.log(payload)
+
+
+# prediction events are summarized per window off the request path
+PREDICTION_LOGGER = PredictionLogger(
+    _log_summary_to_wandb,
+    max_queue=int(os.getenv('WANDB_LOG_QUEUE_SIZE', '10000')),
+    window_seconds=float(os.getenv('WANDB_LOG_WINDOW', '30')),
+)
+
+
+def _insert_rows(rows: List[dict]):
+    """Insert rows and their rollup deltas in one transaction; raises on failure"""
+    with engine.connect() as conn:
+        # a single dict is a plain execute, which reports the new primary key
+        result = conn.execute(REQUESTS_TABLE.insert(), rows[0] if len(rows) == 1 else rows)
+        if ROLLUPS_ENABLED:
+            rollups.apply_rows(conn, rows, ROLLUP_SHARDS)
+        conn.commit()
+    if len(rows) == 1:
+        logger.info("Request stored in DB with ID: %s", result.inserted_primary_key)
+
+
+async def _insert_rows_async(rows: List[dict]):
+    """`_insert_rows` on the async engine; waiting for a connection holds no thread"""
+    async with async_engine.begin() as conn:
+        result = await conn.execute(REQUESTS_TABLE.insert(), rows[0] if len(rows) == 1 else rows)
+        if ROLLUPS_ENABLED:
+            await conn.run_sync(rollups.apply_rows, rows, ROLLUP_SHARDS)
+    if len(rows) == 1:
+        logger.info("Request stored in DB with ID: %s", result.inserted_primary_key)
+
+
+def _spool_rows(rows: List[dict], operation: str, reason: str):
+    """Keep rows the database did not take in the local spool for later replay"""
+    if SPOOL is None:
+        logger.error("Dropping %d user_requests rows (%s): SPOOL_ENABLED is false", len(rows), reason)
+        DB_OPERATIONS.labels(operation=operation, status='dropped').inc()
+        return
+    try:
+        SPOOL.append(rows)
+    except OSError as spool_err:
+        logger.error("Dropping %d user_requests rows (%s): spool write failed: %s", len(rows), reason, spool_err)
+        DB_OPERATIONS.labels(operation=operation, status='dropped').inc()
+        return
+    logger.warning("Spooled %d user_requests rows (%s)", len(rows), reason)
+    DB_OPERATIONS.labels(operation=operation, status='spooled').inc()
+
+
+def _admit_write(rows: List[dict], operation: str) -> bool:
+    """Whether the breaker lets this write reach the database; spools the rows if not"""
+    DB_OPERATIONS.labels(operation=operation, status='attempt').inc()
+    if DB_BREAKER.allow():
+        return True
+    _spool_rows(rows, operation, "database circuit open")
+    return False
+
+
+def _settle_write(rows: List[dict], operation: str, started: float, db_err: Optional[Exception] = None):
+    """Report a write's outcome to the breaker and metrics; failed rows go to the spool"""
+    if db_err is not None:
+        DB_BREAKER.record_failure()
+        logger.error("DB %s of %d rows failed: %s", operation, len(rows), db_err, exc_info=db_err)
+        DB_OPERATIONS.labels(operation=operation, status='error').inc()
+        _spool_rows(rows, operation, "insert failed")
+        return
+    DB_BREAKER.record_success(time.perf_counter() - started)
+    TABLE_STATS.record_inserts(len(rows))
+    DB_OPERATIONS.labels(operation=operation, status='success').inc()
+
+
+def _write_rows(rows: List[dict], operation: str):
+    """Insert rows through the database circuit breaker; never raises.
+
+    While the breaker is open, or when the insert fails, the rows go to the
+    spool instead and are replayed by `SPOOL_REPLAYER` once the database
+    recovers.
+    """
+    if not _admit_write(rows, operation):
+        return
+    started = time.perf_counter()
+    try:
+        _insert_rows(rows)
+    except Exception as db_err:
+        _settle_write(rows, operation, started, db_err)
+        return
+    _settle_write(rows, operation, started)
+
+
+async def _write_rows_async(rows: List[dict], operation: str):
+    """`_write_rows` through the async engine, on the event loop"""
+    if not _admit_write(rows, operation):
+        return
+    started = time.perf_counter()
+    try:
+        await _insert_rows_async(rows)
+    except Exception as db_err:
+        _settle_write(rows, operation, started, db_err)
+        return
+    _settle_write(rows, operation, started)
+
+
+def _store_request(row: dict):
+    """Insert a single `user_requests` row (non-blocking failures); runs on the I/O executor"""
+    _write_rows([row], 'insert')
+
+
+def _store_requests_bulk(rows: List[dict], operation: str = 'bulk_insert'):
+    """Insert many `user_requests` rows with one executemany (non-blocking failures)"""
+    _write_rows(rows, operation)
+
+
+async def _store_within_budget(rows: List[dict], operation: str):
+    """Write rows on the I/O pool (or the async engine), waiting for at most `DB_LATENCY_BUDGET_MS`.
+
+    An insert that takes longer keeps running detached and ends up stored or
+    spooled by `_write_rows`, so a slow database adds at most the budget to a
+    request.  When the I/O pool is saturated the rows are spooled directly.
+    """
+    if async_engine is not None:
+        write = asyncio.ensure_future(_write_rows_async(rows, operation))
+    else:
+        write = asyncio.ensure_future(IO_EXECUTOR.run(_write_rows, rows, operation))
+    try:
+        await asyncio.wait_for(asyncio.shield(write), DB_LATENCY_BUDGET_MS / 1000)
+    except asyncio.TimeoutError:
+        DB_BUDGET_EXCEEDED.inc()
+        # retrieve the eventual outcome so a late failure is not reported as unhandled
+        write.add_done_callback(lambda done: done.cancelled() or done.exception())
+    except ExecutorSaturatedError:
+        _spool_rows(rows, operation, "I/O pool saturated")
+
+
+def _replay_rows(rows: List[dict]):
+    """Spool replay loader: bulk insert, then count the rows like any other write; raises on failure"""
+    try:
+        _insert_rows(rows)
+    except Exception:
+        DB_OPERATIONS.labels(operation='replay', status='error').inc()
+        raise
+    TABLE_STATS.record_inserts(len(rows))
+    DB_OPERATIONS.labels(operation='replay', status='success').inc()
+
+
+DB_BREAKER = CircuitBreaker(
+    'database', DB_BREAKER_FAILURES, DB_BREAKER_RESET_SECONDS, slow_call_seconds=DB_SLOW_INSERT_MS / 1000
+)
+SPOOL = Spool(SPOOL_DIR, fsync_interval=SPOOL_FSYNC_INTERVAL_MS / 1000) if SPOOL_ENABLED else None
+SPOOL_REPLAYER = SpoolReplayer(
+    SPOOL, _replay_rows, DB_BREAKER, interval=SPOOL_REPLAY_INTERVAL
+) if SPOOL is not None else None
+
+
+def _flush_buffered_requests(rows: List[dict]):
+    """Flush callback for the write-behind buffer"""
+    _store_requests_bulk(rows, operation='write_behind_flush')
+
+
+WRITE_BEHIND = WriteBehindBuffer(
+    _flush_buffered_requests,
+    max_queue=int(os.getenv('WRITE_BEHIND_MAX_QUEUE', '10000')),
+    batch_size=int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '500')),
+    flush_interval=float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '1.0')),
+    put_timeout=float(os.getenv('WRITE_BEHIND_PUT_TIMEOUT', '1.0')),
+) if WRITE_BEHIND_ENABLED else None
+
+
+# (bundle, batcher): micro-batches never mix rows scored by different model versions
+_MICRO_BATCHER = (None, None)
+
+
+def _micro_batcher(bundle: ModelBundle) -> MicroBatcher:
+    """Micro-batcher scoring with `bundle`; a new one is started after a reload"""
+    global _MICRO_BATCHER
+    owner, batcher = _MICRO_BATCHER
+    if owner is not bundle:
+        batcher = MicroBatcher(
+            functools.partial(_score_matrix, bundle=bundle, endpoint='/predict'), INFERENCE_EXECUTOR,
+            max_batch_size=MICROBATCH_MAX_SIZE,
+            window_seconds=MICROBATCH_WINDOW_MS / 1000.0
+        )
+        _MICRO_BATCHER = (bundle, batcher)
+    return batcher
+
+
+PREDICTION_CACHE = PredictionCache(
+    max_entries=int(os.getenv('PREDICTION_CACHE_SIZE', '4096')),
+    ttl_seconds=float(os.getenv('PREDICTION_CACHE_TTL', '0'))
+)
+
+
+def _prediction_cache_key(data: UserData, bundle: ModelBundle) -> tuple:
+    """Normalized model inputs plus model version"""
+    return (
+        bundle.version,
+        round(float(data.work_hours), 6),
+        round(float(data.screen_time_hours), 6),
+        int(data.meetings_count),
+        int(data.breaks_taken),
+        int(data.after_hours_work),
+        round(float(data.sleep_hours), 6),
+        round(float(data.task_completion_rate), 6),
+        data.day_type.lower() == "weekday",
+    )
+
+
+def _observe_validation(request: Request, endpoint: str, model_version: str):
+    """Record the time FastAPI spent reading and validating the body before the handler ran"""
+    received_at = getattr(request.state, 'received_at', None)
+    if received_at is not None:
+        observe_stage(endpoint, 'validation', model_version, time.perf_counter() - received_at)
+
+
+@app.post("/predict", response_model=BurnoutPrediction)
+async def predict(user_data: UserData, request: Request):
+    """Make burnout risk prediction with feature engineering"""
+    start_time = time.time()
+    ACTIVE_REQUESTS.inc()
+    # one bundle for the whole request, even if a reload swaps it meanwhile
+    bundle = BUNDLE
+    version = bundle.version if bundle is not None else 'none'
+    _observe_validation(request, '/predict', version)
+
+    try:
+        if bundle is None:
+            REQUEST_COUNT.labels(method='POST', endpoint='/predict', status='503').inc()
+            raise HTTPException(status_code=503, detail="Model not loaded")
+
+        # Identical inputs on the same model skip feature engineering and inference;
+        # the bundle object is the cache generation, so a reload clears the cache
+        with timed_stage('/predict', 'cache_lookup', version):
+            PREDICTION_CACHE.validate(bundle)
+            cache_key = _prediction_cache_key(user_data, bundle)
+            cached = PREDICTION_CACHE.get(cache_key)
+        if cached is not None:
+            prediction, probability, model_features = cached
+            all_features = dict(model_features)
+        else:
+            # Engineer features (returns tuple of model-ready array and full dict)
+            with timed_stage('/predict', 'feature_engineering', version):
+                features_array, all_features = engineer_features(user_data)
+            logger.info("Raw model feature array shape: %s", features_array.shape)
+
+            # CPU-bound scaling and inference run on the bounded inference pool,
+            # coalesced with concurrent requests when micro-batching is enabled
+            if MICROBATCH_ENABLED:
+                try:
+                    prediction, probability = await _micro_batcher(bundle).submit(features_array[0])
+                    scored = True
+                except ExecutorSaturatedError:
+                    raise
+                except Exception as pred_err:
+                    logger.error("Batched prediction failed: %s, using fallback neutral prediction", pred_err)
+                    prediction, probability, scored = 0, 0.5, False
+            else:
+                prediction, probability, scored = await INFERENCE_EXECUTOR.run(
+                    _predict_sync, features_array, bundle
+                )
+            if scored:
+                PREDICTION_CACHE.put(cache_key, (prediction, probability, dict(all_features)))
+
+        # add tracking info to features dict for storage
+        all_features['name'] = user_data.name
+        all_features['user_id'] = user_data.user_id
 
         risk_level = 'High' if prediction == 1 else 'Low'
-        PREDICTION_COUNT.labels(risk_level=risk_level).inc()
+        PREDICTION_COUNT.labels(risk_level=risk_level, model_version=bundle.version).inc()
         logger.info("Prediction: %s (%.2f%%)", risk_level, probability * 100)
 
-        # Log prediction to W&B (when enabled)
+        # W&B gets windowed summaries from a background thread; this never blocks
         if ENABLE_WANDB and wandb is not None:
-            try:
-                wandb.log({
-                    "prediction/risk_level": 1 if risk_level == 'High' else 0,
-                    "prediction/risk_probability": float(probability),
-                    "prediction/work_hours": float(all_features['work_hours']),
-                    "prediction/sleep_hours": float(all_features['sleep_hours']),
-                    "prediction/fatigue_risk": float(all_features['fatigue_risk']),
-                    "prediction/workload_pressure": float(all_features['workload_pressure']),
-                    "prediction/work_life_balance": float(all_features['work_life_balance_score']),
-                    "prediction/health_risk_score": float(all_features['health_risk_score']),
-                })
-            except Exception as wb_log_err:
-                logger.debug("W&B log failed (non-critical): %s", wb_log_err)
-
-        # log to database (non-blocking failures)
-        try:
-            logger.info("Attempting to store data in database...")
-            DB_OPERATIONS.labels(operation='insert', status='attempt').inc()
-            ins = user_requests.insert().values(
-                user_id=user_data.user_id,
-                name=user_data.name,
-                created_at=datetime.now(timezone.utc),
-                work_hours=float(all_features['work_hours']),
-                screen_time_hours=float(all_features['screen_time_hours']),
-                meetings_count=int(all_features['meetings_count']),
-                breaks_taken=int(all_features['breaks_taken']),
-                after_hours_work=int(all_features['after_hours_work']),
-                sleep_hours=float(all_features['sleep_hours']),
-                task_completion_rate=float(all_features['task_completion_rate']),
-                is_weekday=int(all_features['is_weekday']),
-                work_intensity_ratio=float(all_features['work_intensity_ratio']),
-                meeting_burden=float(all_features['meeting_burden']),
-                break_adequacy=float(all_features['break_adequacy']),
-                sleep_deficit=float(all_features['sleep_deficit']),
-                recovery_index=float(all_features['recovery_index']),
-                fatigue_risk=float(all_features['fatigue_risk']),
-                workload_pressure=float(all_features['workload_pressure']),
-                task_efficiency=float(all_features['task_efficiency']),
-                work_life_balance_score=float(all_features['work_life_balance_score']),
-                screen_time_per_meeting=float(all_features['screen_time_per_meeting']),
-                work_hours_productivity=float(all_features['work_hours_productivity']),
-                health_risk_score=float(all_features['health_risk_score']),
-                after_hours_work_hours_est=float(all_features['after_hours_work_hours_est']),
-                high_workload_flag=int(all_features['high_workload_flag']),
-                poor_recovery_flag=int(all_features['poor_recovery_flag'])
-            )
-            with engine.connect() as conn:
-                result = conn.execute(ins)
-                conn.commit()
-                logger.info("Request stored in DB with ID: %s", result.inserted_primary_key)
-                DB_OPERATIONS.labels(operation='insert', status='success').inc()
-        except SQLAlchemyError as db_err:
-            logger.error("DB insert failed: %s", db_err, exc_info=True)
-            DB_OPERATIONS.labels(operation='insert', status='error').inc()
-        except Exception as db_exc:
-            logger.error("Unexpected DB error: %s", db_exc, exc_info=True)
-            DB_OPERATIONS.labels(operation='insert', status='error').inc()
+            with timed_stage('/predict', 'wandb_log', version):
+                PREDICTION_LOGGER.record(prediction == 1, probability, all_features)
+
+        # the database insert runs on the I/O pool
+        row = _build_request_row(
+            all_features, user_data.user_id, user_data.name, datetime.now(timezone.utc),
+            prediction, probability, bundle.version
+        )
+        with timed_stage('/predict', 'db_insert', version):
+            if WRITE_BEHIND is None or WRITE_BEHIND.closed:
+                # a drained buffer (shutdown) takes no rows: write directly, spooling on failure
+                await _store_within_budget([row], 'insert')
+            elif not WRITE_BEHIND.offer(row):
+                # queue full: wait for space off the event loop (backpressure)
+                await IO_EXECUTOR.run(WRITE_BEHIND.put, row)
 
         REQUEST_COUNT.labels(method='POST', endpoint='/predict', status='200').inc()
-        REQUEST_LATENCY.labels(method='POST', endpoint='/predict').observe(time.time() - start_time)
 
         return BurnoutPrediction(
             risk_level=risk_level,
             risk_probability=float(probability),
             timestamp=datetime.now().isoformat(),
+            model_version=bundle.version,
             features=all_features
         )
+    except HTTPException:
+        raise
+    except ExecutorSaturatedError as sat_err:
+        logger.warning("Prediction rejected: %s", sat_err)
+        REQUEST_COUNT.labels(method='POST', endpoint='/predict', status='503').inc()
+        raise HTTPException(status_code=503, detail=str(sat_err)) from sat_err
     except Exception as e:
         logger.error("Prediction error: %s", str(e))
         REQUEST_COUNT.labels(method='POST', endpoint='/predict', status='500').inc()
         raise HTTPException(status_code=500, detail=str(e)) from e
     finally:
+        REQUEST_LATENCY.labels(method='POST', endpoint='/predict').observe(time.time() - start_time)
         ACTIVE_REQUESTS.dec()
 
 
+@app.post("/predict/batch", response_model=BatchPrediction)
+async def predict_batch(batch: BatchUserData, request: Request):
+    """Score N records with one scaler transform, one model call and one bulk insert"""
+    start_time = time.time()
+    ACTIVE_REQUESTS.inc()
+    bundle = BUNDLE
+    version = bundle.version if bundle is not None else 'none'
+    _observe_validation(request, '/predict/batch', version)
+
+    try:
+        if bundle is None:
+            REQUEST_COUNT.labels(method='POST', endpoint='/predict/batch', status='503').inc()
+            raise HTTPException(status_code=503, detail="Model not loaded")
+
+        records = batch.records
+        with timed_stage('/predict/batch', 'feature_engineering', version):
+            features_matrix, all_cols = engineer_feature_columns(records_to_columns(records))
+        labels, probabilities = await INFERENCE_EXECUTOR.run(
+            _score_matrix, features_matrix, bundle, '/predict/batch'
+        )
+
+        high_count = int(labels.sum())
+        if high_count:
+            PREDICTION_COUNT.labels(risk_level='High', model_version=bundle.version).inc(high_count)
+        if len(records) - high_count:
+            PREDICTION_COUNT.labels(risk_level='Low', model_version=bundle.version).inc(
+                len(records) - high_count
+            )
+        logger.info("Batch prediction: %d records, %d high risk", len(records), high_count)
+
+        rows = _build_request_rows(
+            all_cols, records, datetime.now(timezone.utc), labels, probabilities, bundle.version
+        )
+        with timed_stage('/predict/batch', 'db_insert', version):
+            await _store_within_budget(rows, 'bulk_insert')
+
+        predictions = [
+            BatchPredictionItem(
+                user_id=record.user_id,
+                name=record.name,
+                risk_level='High' if label == 1 else 'Low',
+                risk_probability=probability
+            )
+            for record, label, probability in zip(records, labels.tolist(), probabilities.tolist())
+        ]
+
+        REQUEST_COUNT.labels(method='POST', endpoint='/predict/batch', status='200').inc()
+
+        return BatchPrediction(
+            count=len(predictions),
+            high_risk_count=high_count,
+            timestamp=datetime.now().isoformat(),
+            model_version=bundle.version,
+            predictions=predictions
+        )
+    except HTTPException:
+        raise
+    except ExecutorSaturatedError as sat_err:
+        logger.warning("Batch prediction rejected: %s", sat_err)
+        REQUEST_COUNT.labels(method='POST', endpoint='/predict/batch', status='503').inc()
+        raise HTTPException(status_code=503, detail=str(sat_err)) from sat_err
+    except Exception as e:
+        logger.error("Batch prediction error: %s", str(e))
+        REQUEST_COUNT.labels(method='POST', endpoint='/predict/batch', status='500').inc()
+        raise HTTPException(status_code=500, detail=str(e)) from e
+    finally:
+        REQUEST_LATENCY.labels(method='POST', endpoint='/predict/batch').observe(time.time() - start_time)
+        ACTIVE_REQUESTS.dec()
+
+
+@app.post("/predict/columnar")
+async def predict_columnar(request: Request, store: bool = True):
+    """Score a MessagePack struct-of-arrays batch (see `api/columnar.py` for the format).
+
+    Skips JSON and per-record Pydantic models: columns are mapped into NumPy,
+    validated with vectorized range checks and scored in one pass.  Only the
+    probabilities and labels are returned, not the feature dict.
+    """
+    start_time = time.time()
+    ACTIVE_REQUESTS.inc()
+    bundle = BUNDLE
+    version = bundle.version if bundle is not None else 'none'
+    status = '500'
+    try:
+        if not columnar.available():
+            status = '501'
+            raise HTTPException(status_code=501, detail="MessagePack support is not installed (pip install msgpack)")
+        if bundle is None:
+            status = '503'
+            raise HTTPException(status_code=503, detail="Model not loaded")
+        if request.headers.get('content-type', '').split(';')[0].strip() not in columnar.CONTENT_TYPES:
+            status = '415'
+            raise HTTPException(status_code=415, detail=f"Content-Type must be {columnar.MEDIA_TYPE}")
+
+        body = await request.body()
+        try:
+            with timed_stage('/predict/columnar', 'validation', version):
+                columns, user_ids, names = columnar.decode_request(
+                    body, COLUMNAR_BOUNDS, COLUMNAR_INT_COLUMNS, MAX_BATCH_SIZE
+                )
+        except columnar.ColumnarError as payload_err:
+            status = '422'
+            raise HTTPException(status_code=422, detail=str(payload_err)) from payload_err
+
+        with timed_stage('/predict/columnar', 'feature_engineering', version):
+            features_matrix, all_cols = engineer_feature_columns(columns)
+        labels, probabilities = await INFERENCE_EXECUTOR.run(
+            _score_matrix, features_matrix, bundle, '/predict/columnar'
+        )
+
+        high_count = int(labels.sum())
+        if high_count:
+            PREDICTION_COUNT.labels(risk_level='High', model_version=bundle.version).inc(high_count)
+        if len(labels) - high_count:
+            PREDICTION_COUNT.labels(risk_level='Low', model_version=bundle.version).inc(len(labels) - high_count)
+
+        if store:
+            rows = _build_column_rows(
+                all_cols, user_ids, names, datetime.now(timezone.utc), labels, probabilities, bundle.version
+            )
+            with timed_stage('/predict/columnar', 'db_insert', version):
+                await _store_within_budget(rows, 'bulk_insert')
+
+        with timed_stage('/predict/columnar', 'serialization', version):
+            content = columnar.encode_response(labels, probabilities, bundle.version, datetime.now().isoformat())
+        status = '200'
+        return Response(content=content, media_type=columnar.MEDIA_TYPE)
+    except HTTPException:
+        raise
+    except ExecutorSaturatedError as sat_err:
+        logger.warning("Columnar prediction rejected: %s", sat_err)
+        status = '503'
+        raise HTTPException(status_code=503, detail=str(sat_err)) from sat_err
+    except Exception as e:
+        logger.error("Columnar prediction error: %s", str(e))
+        raise HTTPException(status_code=500, detail=str(e)) from e
+    finally:
+        REQUEST_COUNT.labels(method='POST', endpoint='/predict/columnar', status=status).inc()
+        REQUEST_LATENCY.labels(method='POST', endpoint='/predict/columnar').observe(time.time() - start_time)
+        ACTIVE_REQUESTS.dec()
+
+
+def _validation_message(validation_err: ValidationError) -> str:
+    """One-line summary of a pydantic validation error"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'record'}: {err['msg']}"
+        for err in validation_err.errors()
+    )
+
+
+async def _score_stream_chunk(pending: list, bundle: ModelBundle, store: bool) -> List[dict]:
+    """Score the valid records of a chunk; results keep the input line order"""
+    records = [item for _, item in pending if isinstance(item, UserData)]
+    STREAM_ROWS.labels(status='scored').inc(len(records))
+    STREAM_ROWS.labels(status='invalid').inc(len(pending) - len(records))
+    scored = iter(())
+    if records:
+        with timed_stage('/predict/stream', 'feature_engineering', bundle.version):
+            features_matrix, all_cols = engineer_feature_columns(records_to_columns(records))
+        labels, probabilities = await INFERENCE_EXECUTOR.run(
+            _score_matrix, features_matrix, bundle, '/predict/stream'
+        )
+        high_count = int(labels.sum())
+        if high_count:
+            PREDICTION_COUNT.labels(risk_level='High', model_version=bundle.version).inc(high_count)
+        if len(records) - high_count:
+            PREDICTION_COUNT.labels(risk_level='Low', model_version=bundle.version).inc(
+                len(records) - high_count
+            )
+        if store:
+            rows = _build_request_rows(
+                all_cols, records, datetime.now(timezone.utc), labels, probabilities, bundle.version
+            )
+            with timed_stage('/predict/stream', 'db_insert', bundle.version):
+                await _store_within_budget(rows, 'bulk_insert')
+        scored = zip(labels.tolist(), probabilities.tolist())
+
+    results = []
+    for line_no, item in pending:
+        if isinstance(item, UserData):
+            label, probability = next(scored)
+            results.append({
+                'line': line_no, 'user_id': item.user_id, 'name': item.name,
+                'risk_level': 'High' if label == 1 else 'Low', 'risk_probability': probability
+            })
+        else:
+            results.append({'line': line_no, 'error': item})
+    return results
+
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request, output: str = 'ndjson', store: bool = True):
+    """Score a CSV or NDJSON upload incrementally and stream results back.
+
+    The body is read and scored `STREAM_CHUNK_SIZE` rows at a time, so memory
+    stays flat however large the file is.  Rows that fail to parse or validate
+    come back inline as `{"line": n, "error": "..."}` without ending the stream.
+    """
+    bundle = BUNDLE
+    if bundle is None:
+        REQUEST_COUNT.labels(method='POST', endpoint='/predict/stream', status='503').inc()
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if output not in ('ndjson', 'csv'):
+        REQUEST_COUNT.labels(method='POST', endpoint='/predict/stream', status='422').inc()
+        raise HTTPException(status_code=422, detail="output must be 'ndjson' or 'csv'")
+    content_type = request.headers.get('content-type', '')
+    input_format = 'csv' if 'csv' in content_type else 'ndjson'
+
+    async def results():
+        start_time = time.time()
+        ACTIVE_REQUESTS.inc()
+        status = '200'
+        try:
+            if output == 'csv':
+                yield csv_header()
+            pending = []
+            async for line_no, raw in iter_records(request.stream(), input_format):
+                if isinstance(raw, BadRow):
+                    pending.append((line_no, str(raw)))
+                else:
+                    try:
+                        pending.append((line_no, UserData.model_validate(raw)))
+                    except ValidationError as validation_err:
+                        pending.append((line_no, _validation_message(validation_err)))
+                if len(pending) >= STREAM_CHUNK_SIZE:
+                    yield format_results(await _score_stream_chunk(pending, bundle, store), output)
+                    pending = []
+            if pending:
+                yield format_results(await _score_stream_chunk(pending, bundle, store), output)
+        except ClientDisconnect:
+            logger.warning("Client disconnected during streaming prediction")
+            status = '499'
+        except Exception as stream_err:
+            # headers are already sent, so report the failure in-band and stop
+            logger.error("Streaming prediction aborted: %s", stream_err, exc_info=True)
+            status = '500'
+            yield format_results([{'error': f"stream aborted: {stream_err}"}], output)
+        finally:
+            REQUEST_COUNT.labels(method='POST', endpoint='/predict/stream', status=status).inc()
+            REQUEST_LATENCY.labels(method='POST', endpoint='/predict/stream').observe(time.time() - start_time)
+            ACTIVE_REQUESTS.dec()
+
+    return DuplexStreamingResponse(
+        results(),
+        media_type='text/csv' if output == 'csv' else 'application/x-ndjson',
+        headers={'X-Model-Version': bundle.version}
+    )
+
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 200 only after startup loaded the model and warmed it up"""
+    if not READY.is_set():
+        return JSONResponse(status_code=503, content={"status": "starting", "ready": False})
+    return {"status": "ready", "ready": True, "model_version": BUNDLE.version}
+
+
+@app.post("/admin/reload-model")
+async def admin_reload_model(request: Optional[ModelReloadRequest] = None,
+                             x_admin_token: Optional[str] = Header(None)):
+    """Load, validate and atomically swap in a new model without a restart"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if not hmac.compare_digest(x_admin_token or '', ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+    previous = BUNDLE.version if BUNDLE is not None else None
+    version = request.version if request is not None else None
+    try:
+        bundle = await IO_EXECUTOR.run(reload_model, version)
+    except FileNotFoundError as fnf_err:
+        raise HTTPException(status_code=404, detail=str(fnf_err)) from fnf_err
+    except ValueError as invalid:
+        raise HTTPException(status_code=422, detail=str(invalid)) from invalid
+    except Exception as reload_err:
+        logger.error("Model reload failed: %s", reload_err, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {reload_err}") from reload_err
+
+    return {
+        "status": "unchanged" if bundle.version == previous else "reloaded",
+        "previous_version": previous,
+        "model_version": bundle.version,
+    }
+
+
+async def _db_status_queries_async(exact: bool):
+    """The on-request /db-status queries through the async engine"""
+    async def run(fn):
+        async with async_engine.connect() as conn:
+            return await conn.run_sync(fn, REQUESTS_TABLE.name)
+
+    if exact:
+        await TABLE_STATS.set_exact_async(lambda: run(exact_row_count))
+    elif not TABLE_STATS.reconciled:
+        await TABLE_STATS.reconcile_async(lambda: run(estimate_row_count))
+
+
 @app.get("/db-status")
-async def db_status():
-    """Check database connection status"""
+async def db_status(exact: bool = False):
+    """Database status from cached table statistics.
+
+    Row counts are kept in-process and reconciled periodically against a
+    catalog estimate, so this never scans `user_requests`; `?exact=true`
+    runs `SELECT COUNT(*)` and adopts the result.
+    """
     if not engine:
         return {"status": "error", "message": "No database engine"}
 
     try:
-        with engine.connect() as conn:
-            from sqlalchemy import text
-            result = conn.execute(text("SELECT COUNT(*) FROM user_requests"))
-            count = result.scalar()
-            return {
-                "status": "connected",
-                "table_exists": True,
-                "row_count": count,
-                "database_url": DATABASE_URL[:50] + "..."
-            }
+        if async_engine is not None:
+            await _db_status_queries_async(exact)
+        elif exact:
+            await IO_EXECUTOR.run(TABLE_STATS.set_exact, lambda: exact_row_count(engine, REQUESTS_TABLE.name))
+        elif not TABLE_STATS.reconciled:
+            await IO_EXECUTOR.run(TABLE_STATS.reconcile)
     except Exception as e:
         return {
             "status": "error",
@@ -494,6 +1420,162 @@ async def db_status():
             "database_url": DATABASE_URL[:50] + "..."
         }
 
+    stats = TABLE_STATS.snapshot()
+    if not TABLE_STATS.reconciled:
+        return {
+            "status": "error",
+            "message": stats['last_error'],
+            "database_url": DATABASE_URL[:50] + "..."
+        }
+    healthy = stats['last_error'] is None and DB_BREAKER.state == 'closed'
+    return {
+        "status": "connected" if healthy else "degraded",
+        **stats,
+        "circuit_state": DB_BREAKER.state,
+        "database_url": DATABASE_URL[:50] + "..."
+    }
+
+
+# orderings accepted by /stats/users
+_USER_ORDERINGS = {
+    'avg_health_risk_score': lambda: rollups.rollup_user.c.health_risk_score_sum / rollups.rollup_user.c.record_count,
+    'records': lambda: rollups.rollup_user.c.record_count,
+    'last_seen': lambda: rollups.rollup_user.c.last_seen,
+}
+
+
+def _user_stats(row) -> dict:
+    return {
+        'user_id': row.user_id, 'name': row.name,
+        'first_seen': row.first_seen.isoformat() if row.first_seen else None,
+        'last_seen': row.last_seen.isoformat() if row.last_seen else None,
+        **rollups.summarize(row),
+    }
+
+
+def _read_stats_overview() -> dict:
+    with engine.connect() as conn:
+        row = conn.execute(rollups.sum_shards(rollups.rollup_global)).one()
+        users = conn.execute(select(func.count()).select_from(rollups.rollup_user)).scalar()
+    return {**rollups.summarize(row), 'users': users}
+
+
+def _read_user_stats(limit: int, offset: int, order_by: str) -> List[dict]:
+    table = rollups.rollup_user
+    query = select(table).order_by(_USER_ORDERINGS[order_by]().desc(), table.c.user_id).limit(limit).offset(offset)
+    with engine.connect() as conn:
+        return [_user_stats(row) for row in conn.execute(query)]
+
+
+def _read_one_user_stats(user_id: str) -> Optional[dict]:
+    with engine.connect() as conn:
+        row = conn.execute(select(rollups.rollup_user).where(rollups.rollup_user.c.user_id == user_id)).first()
+    return _user_stats(row) if row is not None else None
+
+
+def _read_daily_stats(days: int) -> List[dict]:
+    table = rollups.rollup_day
+    query = rollups.sum_shards(table, 'day').order_by(table.c.day.desc()).limit(days)
+    with engine.connect() as conn:
+        return [{'day': row.day.isoformat(), **rollups.summarize(row)} for row in conn.execute(query)]
+
+
+def _require_rollups():
+    if not engine:
+        raise HTTPException(status_code=503, detail="No database engine")
+    if not ROLLUPS_ENABLED:
+        raise HTTPException(status_code=503, detail="Rollups are disabled (ROLLUPS_ENABLED=false)")
+
+
+@app.get("/stats")
+async def stats_overview():
+    """Aggregate statistics over all stored requests, read from the global rollup"""
+    _require_rollups()
+    return await IO_EXECUTOR.run(_read_stats_overview)
+
+
+@app.get("/stats/users")
+async def stats_users(limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0),
+                      order_by: str = 'avg_health_risk_score'):
+    """Per-user aggregates, highest first by `order_by`"""
+    _require_rollups()
+    if order_by not in _USER_ORDERINGS:
+        raise HTTPException(status_code=422, detail=f"order_by must be one of {sorted(_USER_ORDERINGS)}")
+    users = await IO_EXECUTOR.run(_read_user_stats, limit, offset, order_by)
+    return {'users': users, 'limit': limit, 'offset': offset, 'order_by': order_by}
+
+
+@app.get("/stats/users/{user_id}")
+async def stats_user(user_id: str):
+    """Aggregates for one user"""
+    _require_rollups()
+    stats = await IO_EXECUTOR.run(_read_one_user_stats, user_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"No requests stored for user {user_id}")
+    return stats
+
+
+@app.get("/stats/daily")
+async def stats_daily(days: int = Query(30, ge=1, le=3660)):
+    """Per-day aggregates for the most recent `days` days with stored requests"""
+    _require_rollups()
+    return {'days': await IO_EXECUTOR.run(_read_daily_stats, days)}
+
+
+def _fetch_history(user_id: str, columns: List[str], after, limit: int) -> list:
+    with engine.connect() as conn:
+        return conn.execute(history.page_query(REQUESTS_READ, user_id, columns, after, limit)).all()
+
+
+@app.get("/users/{user_id}/history")
+async def user_history(user_id: str, limit: int = Query(100, ge=1, le=HISTORY_MAX_LIMIT),
+                       cursor: Optional[str] = None, fields: Optional[str] = None):
+    """A user's stored requests, newest first, one keyset-paginated page at a time.
+
+    Pass the returned `next_cursor` back as `cursor` for the next page; it is
+    null on the last page.  `fields` is `all` (default), `inputs` for the raw
+    inputs only, or a comma-separated list of columns.  The page is streamed
+    `HISTORY_FETCH_SIZE` rows at a time, each read with its own index seek.
+    """
+    if not engine:
+        raise HTTPException(status_code=503, detail="No database engine")
+    try:
+        columns = history.resolve_fields(REQUESTS_READ, fields)
+        after = history.decode_cursor(cursor) if cursor else None
+    except ValueError as params_err:
+        raise HTTPException(status_code=422, detail=str(params_err))
+
+    # read the first rows before answering so database errors still get a status code
+    fetch = min(limit, HISTORY_FETCH_SIZE)
+    try:
+        first = await IO_EXECUTOR.run(_fetch_history, user_id, columns, after, fetch + 1)
+    except SQLAlchemyError as db_err:
+        logger.error("Reading history of %s failed: %s", user_id, db_err)
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+    async def body():
+        yield f'{{"user_id": {json.dumps(user_id)}, "fields": {json.dumps(columns)}, "items": ['
+        rows, size, remaining, position, sent = first, fetch, limit, after, 0
+        while True:
+            # one extra row is read to learn whether anything follows
+            more = len(rows) > size
+            rows = rows[:size]
+            if rows:
+                yield (', ' if sent else '') + ', '.join(
+                    json.dumps(history.row_to_item(columns, row)) for row in rows
+                )
+                sent += len(rows)
+                position = (rows[-1].created_at, rows[-1].id)
+            remaining -= len(rows)
+            if not more or remaining <= 0:
+                break
+            size = min(remaining, HISTORY_FETCH_SIZE)
+            rows = await IO_EXECUTOR.run(_fetch_history, user_id, columns, position, size + 1)
+        next_cursor = history.encode_cursor(*position) if more else None
+        yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+    return StreamingResponse(body(), media_type='application/json')
+
 
 @app.get("/")
 async def root():
@@ -516,6 +1598,23 @@ async def metrics():
 async def favicon():
     return Response(status_code=204)
 
+
+def _preload():
+    """Load medians and the model before the server forks its workers"""
+    import gc
+    _load_medians()
+    try:
+        _load_model_sync()
+    except Exception as load_err:
+        logger.critical("Model preloading failed: %s", load_err)
+    # keep the collector from touching (and un-sharing) the preloaded objects
+    gc.freeze()
+
+
+if MODEL_SHARING == 'preload':
+    _preload()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
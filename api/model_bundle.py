@@ -0,0 +1,174 @@
+"""Immutable model bundles and artifact watching for zero-downtime reloads"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from api.shared_memory import load_shared_forest
+from api.tree_engine import CompiledForest, compile_model
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, eq=False)
+class ModelBundle:
+    """Model, scaler and feature names that are always swapped together.
+
+    Request handlers read the global bundle reference once and use only that
+    object, so a reload can never mix a new model with an old scaler.
+    """
+    model: object
+    scaler: object
+    feature_names: List[str]
+    version: str
+    compiled: Optional[object] = None
+    loaded_at: float = field(default_factory=time.time)
+
+
+def artifact_version(*paths: str) -> str:
+    """Short content hash identifying a set of model artifacts"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as artifact:
+            for block in iter(lambda: artifact.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def load_bundle(model_path: str, scaler_path: str, feature_names_path: Optional[str],
+                default_feature_names: List[str], backend: str = 'sklearn',
+                shared_dir: Optional[str] = None) -> ModelBundle:
+    """Load a model/scaler/feature-names set from disk into a new bundle.
+
+    With `shared_dir` the estimator is replaced by a compiled forest that is
+    memory-mapped from that directory and shared by every worker process
+    (when the tree engine supports the model; otherwise it is loaded as usual).
+    """
+    import joblib
+
+    for path in (model_path, scaler_path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model artifact not found: {path}")
+
+    version = artifact_version(model_path, scaler_path)
+    if shared_dir:
+        model = load_shared_forest(model_path, shared_dir, version)
+        # an unsupported model comes back as the plain estimator
+        compiled = model if isinstance(model, CompiledForest) else None
+    else:
+        model = joblib.load(model_path)
+        logger.info("✓ Model loaded successfully from %s", model_path)
+        compiled = compile_model(model) if backend == 'compiled' else None
+    scaler = joblib.load(scaler_path)
+    logger.info("✓ Scaler loaded successfully from %s", scaler_path)
+
+    feature_names = list(default_feature_names)
+    if feature_names_path and os.path.exists(feature_names_path):
+        feature_names = list(joblib.load(feature_names_path))
+
+    return ModelBundle(
+        model=model,
+        scaler=scaler,
+        feature_names=feature_names,
+        version=version,
+        compiled=compiled,
+    )
+
+
+def scale_features(bundle: ModelBundle, features: np.ndarray) -> np.ndarray:
+    """Scale an (N, 17) feature matrix; the raw features if the scaler fails"""
+    try:
+        return bundle.scaler.transform(features)
+    except Exception as scale_err:
+        logger.error("Scaling failed: %s, using raw features", scale_err)
+        return features
+
+
+def predict_scaled(bundle: ModelBundle, scaled: np.ndarray, engine=None):
+    """`(labels, positive-class probabilities)` for a scaled matrix.
+
+    Uses the compiled `engine` when given, else one `predict_proba` call;
+    labels are mapped through `classes_`, so they match `model.predict`.
+    """
+    if engine is not None:
+        labels, proba = engine.predict_with_proba(scaled)
+        return labels.astype(int), proba[:, 1]
+    proba = np.asarray(bundle.model.predict_proba(scaled), dtype=float)
+    labels = np.asarray(bundle.model.classes_)[np.argmax(proba, axis=1)]
+    return labels.astype(int), proba[:, 1]
+
+
+def validate_bundle(bundle: ModelBundle, expected_features: List[str], sample: np.ndarray):
+    """Smoke-test a bundle before it goes live; raises ValueError on failure"""
+    if list(bundle.feature_names) != list(expected_features):
+        raise ValueError(
+            f"Feature names do not match the API's feature order: {bundle.feature_names}"
+        )
+    scaled = bundle.scaler.transform(sample)
+    proba = np.asarray(bundle.model.predict_proba(scaled), dtype=float)
+    if proba.shape != (len(sample), 2) or not np.all(np.isfinite(proba)):
+        raise ValueError(f"Smoke prediction returned unexpected output with shape {proba.shape}")
+    if bundle.compiled is not None:
+        compiled_proba = bundle.compiled.predict_proba(scaled)
+        if not np.allclose(compiled_proba, proba, atol=1e-9):
+            raise ValueError("Compiled model disagrees with the estimator on the smoke prediction")
+
+
+class ArtifactWatcher:
+    """Poll artifact files and call `on_change` once they change and settle"""
+
+    def __init__(self, paths: List[str], on_change: Callable[[], None], interval: float = 5.0):
+        self.paths = paths
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _snapshot(self):
+        stamps = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def start(self):
+        """Start polling in a daemon thread (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching %s for model changes every %.1fs", self.paths, self.interval)
+
+    def stop(self):
+        """Stop polling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        last = self._snapshot()
+        while not self._stop.wait(self.interval):
+            current = self._snapshot()
+            if current == last:
+                continue
+            # wait one more interval so half-written files are not picked up
+            if self._stop.wait(self.interval):
+                return
+            settled = self._snapshot()
+            if settled != current:
+                continue
+            last = settled
+            try:
+                self.on_change()
+            except Exception as reload_err:
+                logger.error("Model reload after file change failed: %s", reload_err)
@@ -0,0 +1,175 @@
+"""Background, windowed aggregation of prediction events for W&B logging"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# longest the aggregator blocks on the queue before re-checking the window
+_POLL_SECONDS = 0.05
+
+# engineered values carried by every event, in order after the label and probability
+EVENT_FEATURES = (
+    'fatigue_risk', 'workload_pressure', 'work_hours', 'sleep_hours',
+    'work_life_balance_score', 'health_risk_score'
+)
+# fields summarized with a histogram in addition to the mean
+HISTOGRAM_FIELDS = ('risk_probability', 'fatigue_risk', 'workload_pressure')
+
+PREDICTION_LOG_DROPPED = Counter(
+    'prediction_log_dropped_total', 'Prediction events dropped because the logging queue was full'
+)
+PREDICTION_LOG_QUEUE_DEPTH = Gauge('prediction_log_queue_depth', 'Prediction events waiting to be aggregated')
+PREDICTION_LOG_WINDOWS = Counter(
+    'prediction_log_windows_total', 'Summarized prediction windows sent to the logger', ['status']
+)
+
+
+def summarize_events(events: List[tuple], bins: int = 10) -> Dict[str, object]:
+    """Aggregate `(is_high, probability, *EVENT_FEATURES)` tuples into one summary.
+
+    Scalars are keyed `predictions/<name>`; histograms are `(counts, edges)`
+    pairs under `predictions/<name>_hist`, as returned by `np.histogram`.
+    """
+    data = np.asarray(events, dtype=float)
+    high = data[:, 0]
+    columns = dict(zip(('risk_probability',) + EVENT_FEATURES, data[:, 1:].T))
+    summary = {
+        'predictions/count': len(data),
+        'predictions/high_risk_count': int(high.sum()),
+        'predictions/high_risk_rate': float(high.mean()),
+    }
+    for name, values in columns.items():
+        summary[f'predictions/{name}_mean'] = float(values.mean())
+    for name in HISTOGRAM_FIELDS:
+        value_range = (0.0, 1.0) if name == 'risk_probability' else None
+        summary[f'predictions/{name}_hist'] = np.histogram(columns[name], bins=bins, range=value_range)
+    return summary
+
+
+class PredictionLogger:
+    """Bounded event queue summarized by a background thread once per window.
+
+    `record` never blocks: when the queue is full (for example because the
+    previous `log_fn` call is still waiting on W&B) the event is dropped and
+    counted.  Every `window_seconds` (or earlier, once `max_queue` events were
+    collected, so a window's memory stays bounded) the thread calls
+    `log_fn(summary)` once with the output of `summarize_events` plus the
+    number of events dropped during the window.
+    """
+
+    def __init__(self, log_fn: Callable[[dict], None], max_queue: int = 10000,
+                 window_seconds: float = 30.0, histogram_bins: int = 10):
+        self.log_fn = log_fn
+        self.window_seconds = max(0.01, window_seconds)
+        self.histogram_bins = histogram_bins
+        self.max_window_events = max(1, max_queue)
+        self._queue = queue.Queue(maxsize=self.max_window_events)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def depth(self) -> int:
+        """Events currently waiting to be aggregated"""
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        """Whether the aggregator thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background aggregator (idempotent)"""
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="prediction-logger", daemon=True
+            )
+            self._thread.start()
+            logger.info("Prediction logger started (window=%.1fs)", self.window_seconds)
+
+    def record(self, is_high: bool, probability: float, features: dict) -> bool:
+        """Enqueue one prediction event; returns False (and counts a drop) when full"""
+        event = (float(is_high), float(probability)) + tuple(
+            float(features[name]) for name in EVENT_FEATURES
+        )
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            PREDICTION_LOG_DROPPED.inc()
+            with self._dropped_lock:
+                self._dropped += 1
+            return False
+        PREDICTION_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the aggregator after logging the final partial window"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _take_dropped(self) -> int:
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        return dropped
+
+    def _emit(self, events: List[tuple], window: float):
+        dropped = self._take_dropped()
+        if not events and not dropped:
+            return
+        summary: Dict[str, object] = (
+            summarize_events(events, self.histogram_bins) if events else {'predictions/count': 0}
+        )
+        summary['predictions/dropped'] = dropped
+        summary['predictions/window_seconds'] = window
+        try:
+            self.log_fn(summary)
+            PREDICTION_LOG_WINDOWS.labels(status='success').inc()
+        except Exception as log_err:
+            logger.warning("Prediction summary logging failed (non-critical): %s", log_err)
+            PREDICTION_LOG_WINDOWS.labels(status='error').inc()
+
+    def _collect_window(self, deadline: float) -> List[tuple]:
+        events = []
+        while not self._stop.is_set() and len(events) < self.max_window_events:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                events.append(self._queue.get(timeout=min(remaining, _POLL_SECONDS)))
+            except queue.Empty:
+                continue
+        return events
+
+    def _collect_pending(self) -> List[tuple]:
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            events = self._collect_window(started + self.window_seconds)
+            stopping = self._stop.is_set()
+            if stopping:
+                # the final partial window includes everything still queued
+                events.extend(self._collect_pending())
+            PREDICTION_LOG_QUEUE_DEPTH.set(self._queue.qsize())
+            self._emit(events, time.monotonic() - started)
+            if stopping:
+                return
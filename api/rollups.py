@@ -0,0 +1,377 @@
+"""Incrementally maintained aggregates: global, per user and per day.
+
+`REQUEST_ROLLUPS` aggregate `user_requests`, `RECORD_ROLLUPS` the ingested
+`burnout_records` dataset.  Every insert path applies its rows here in the
+same transaction, so the rollups stay exact without re-reading the source;
+`rebuild_rollups` recomputes them from scratch (backfill after enabling, or
+after drift).  The `burnout_statistics` view reads `RECORD_ROLLUPS`.
+
+The global and daily rollups are sharded: each transaction adds onto one of
+`shards` rows picked at random, so concurrent inserts do not all queue on a
+single row lock, and readers sum the shards (`sum_shards`).  Per-user rows are not sharded; only
+writes for the same user contend on them.
+"""
+import logging
+import random
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import (
+    Column, Date, DateTime, Float, Integer, MetaData, String, Table, and_, case, cast, delete, func,
+    insert, inspect, literal, or_, select, text
+)
+
+logger = logging.getLogger(__name__)
+
+rollup_metadata = MetaData()
+
+# rollup column -> source column summed into it (0 when the source has no such column)
+MEASURES = {
+    'work_hours_sum': 'work_hours',
+    'sleep_hours_sum': 'sleep_hours',
+    'task_completion_rate_sum': 'task_completion_rate',
+    'health_risk_score_sum': 'health_risk_score',
+    'burnout_score_sum': 'burnout_score',
+    'high_workload_count': 'high_workload_flag',
+    'poor_recovery_count': 'poor_recovery_flag',
+    'weekday_count': 'is_weekday',
+}
+# risk level -> rollup column counting it; the level is `burnout_risk` for dataset
+# records and the model's `risk_prediction` (1 High, 0 Low) for requests
+RISK_COUNTS = {'High': 'high_risk_count', 'Medium': 'medium_risk_count', 'Low': 'low_risk_count'}
+PREDICTED_RISK = {1: 'High', 0: 'Low'}
+# columns that are added together when two aggregates are merged
+ADDITIVE = ('record_count',) + tuple(MEASURES) + tuple(RISK_COUNTS.values())
+# rollup column -> (source column, 'min' or 'max'); NULL until a value is seen
+EXTREMES = {
+    'burnout_score_min': ('burnout_score', 'min'),
+    'burnout_score_max': ('burnout_score', 'max'),
+}
+
+
+def _measure_columns() -> List[Column]:
+    columns = [Column('record_count', Integer, nullable=False, default=0)]
+    for name in ADDITIVE[1:]:
+        column_type = Integer if name.endswith('_count') else Float
+        columns.append(Column(name, column_type, nullable=False, default=0))
+    columns.extend(Column(name, Float, nullable=True) for name in EXTREMES)
+    return columns
+
+
+DEFAULT_SHARDS = 16
+
+
+class RollupTables(NamedTuple):
+    """The global, per-user and per-day rollups of one source table"""
+    total: Table
+    user: Table
+    day: Table
+
+
+def _rollup_tables(prefix: str) -> RollupTables:
+    return RollupTables(
+        Table(
+            f'{prefix}_global', rollup_metadata,
+            # the shard number
+            Column('id', Integer, primary_key=True, autoincrement=False),
+            *_measure_columns()
+        ),
+        Table(
+            f'{prefix}_user', rollup_metadata,
+            Column('user_id', String, primary_key=True),
+            # the latest non-null name and the created_at of the row it came from
+            Column('name', String, nullable=True),
+            Column('name_seen', DateTime, nullable=True),
+            Column('first_seen', DateTime),
+            Column('last_seen', DateTime),
+            *_measure_columns()
+        ),
+        Table(
+            f'{prefix}_day', rollup_metadata,
+            Column('day', Date, primary_key=True),
+            Column('shard', Integer, primary_key=True, autoincrement=False, default=0),
+            *_measure_columns()
+        ),
+    )
+
+
+REQUEST_ROLLUPS = _rollup_tables('rollup')
+rollup_global, rollup_user, rollup_day = REQUEST_ROLLUPS
+
+RECORDS_TABLE = 'burnout_records'
+RECORD_ROLLUPS = _rollup_tables('record_rollup')
+
+STATISTICS_VIEW = 'burnout_statistics'
+
+
+def _empty() -> Dict[str, float]:
+    return {**dict.fromkeys(ADDITIVE, 0), **dict.fromkeys(EXTREMES)}
+
+
+def _risk_level(row: dict) -> Optional[str]:
+    level = row.get('burnout_risk')
+    return level if level is not None else PREDICTED_RISK.get(row.get('risk_prediction'))
+
+
+def _accumulate(target: Dict[str, float], row: dict):
+    target['record_count'] += 1
+    for name, source in MEASURES.items():
+        value = row.get(source)
+        if value is not None:
+            target[name] += value
+    level = RISK_COUNTS.get(_risk_level(row))
+    if level is not None:
+        target[level] += 1
+    for name, (source, kind) in EXTREMES.items():
+        value = row.get(source)
+        if value is not None:
+            target[name] = value if target[name] is None else (min if kind == 'min' else max)(target[name], value)
+
+
+def aggregate_rows(rows: Iterable[dict]):
+    """Fold source rows into `(global, per_user, per_day)` deltas.
+
+    Rows without a `user_id` count towards the global and daily rollups only.
+    """
+    total = _empty()
+    users: Dict[str, dict] = {}
+    days: Dict[date, dict] = defaultdict(_empty)
+    for row in rows:
+        created_at = row.get('created_at') or datetime.utcnow()
+        _accumulate(total, row)
+        _accumulate(days[created_at.date()], row)
+        if row.get('user_id') is None:
+            continue
+        # dataset user ids are integers
+        user_id = str(row['user_id'])
+        user = users.get(user_id)
+        if user is None:
+            user = users[user_id] = {
+                **_empty(), 'name': None, 'name_seen': None, 'first_seen': created_at, 'last_seen': created_at
+            }
+        _accumulate(user, row)
+        name = row.get('name')
+        if name is not None and (user['name_seen'] is None or created_at >= user['name_seen']):
+            user['name'], user['name_seen'] = name, created_at
+        user['first_seen'] = min(user['first_seen'], created_at)
+        user['last_seen'] = max(user['last_seen'], created_at)
+    return total, users, dict(days)
+
+
+def _dialect_insert(conn, table):
+    if conn.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(table)
+    if conn.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(table)
+    return None
+
+
+def _merge_values(table, incoming) -> dict:
+    """SET clause adding `incoming` (the new row's values) onto the stored row"""
+    values = {name: table.c[name] + incoming[name] for name in ADDITIVE}
+    for name, (_, kind) in EXTREMES.items():
+        better = incoming[name] < table.c[name] if kind == 'min' else incoming[name] > table.c[name]
+        values[name] = case((or_(table.c[name].is_(None), better), incoming[name]), else_=table.c[name])
+    if 'last_seen' in table.c:
+        # keep the name from the latest row that had one, whatever order the rows arrive in
+        newer_name = and_(
+            incoming['name'].isnot(None),
+            or_(table.c.name_seen.is_(None), incoming['name_seen'] >= table.c.name_seen),
+        )
+        values['name'] = case((newer_name, incoming['name']), else_=table.c.name)
+        values['name_seen'] = case((newer_name, incoming['name_seen']), else_=table.c.name_seen)
+        values['first_seen'] = case(
+            (incoming['first_seen'] < table.c.first_seen, incoming['first_seen']), else_=table.c.first_seen
+        )
+        values['last_seen'] = case(
+            (incoming['last_seen'] > table.c.last_seen, incoming['last_seen']), else_=table.c.last_seen
+        )
+    return values
+
+
+def _upsert_many(conn, table, keys: Sequence[str], rows: List[dict]):
+    """Insert each delta row or add it onto the existing row with the same key"""
+    if not rows:
+        return
+    # lock rows in key order so concurrent transactions cannot deadlock
+    rows = sorted(rows, key=lambda row: tuple(row[key] for key in keys))
+    stmt = _dialect_insert(conn, table)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=_merge_values(table, stmt.excluded))
+        conn.execute(stmt, rows)
+        return
+    # portable fallback: update, then insert when the key is new
+    for row in rows:
+        incoming = {name: literal(value, table.c[name].type) for name, value in row.items()}
+        updated = conn.execute(
+            table.update().where(and_(*(table.c[key] == row[key] for key in keys)))
+            .values(_merge_values(table, incoming))
+        )
+        if updated.rowcount == 0:
+            conn.execute(insert(table).values(**row))
+
+
+def apply_rows(conn, rows: List[dict], shards: int = DEFAULT_SHARDS, tables: RollupTables = REQUEST_ROLLUPS):
+    """Add source rows to every rollup in `tables`; runs inside the caller's transaction"""
+    if not rows:
+        return
+    total, users, days = aggregate_rows(rows)
+    # random rather than per thread: async writers all run on the event loop's thread
+    shard = random.randrange(max(1, shards))
+    _upsert_many(conn, tables.total, ['id'], [{'id': shard, **total}])
+    _upsert_many(conn, tables.user, ['user_id'],
+                 [{'user_id': user_id, **values} for user_id, values in users.items()])
+    _upsert_many(conn, tables.day, ['day', 'shard'],
+                 [{'day': day, 'shard': shard, **values} for day, values in days.items()])
+
+
+def sum_shards(table, *keys: str):
+    """SELECT adding up the shard rows of `table`, one row per distinct `keys`"""
+    group = [table.c[key] for key in keys]
+    return select(
+        *group,
+        *(func.coalesce(func.sum(table.c[name]), 0).label(name) for name in ADDITIVE),
+        *(getattr(func, kind)(table.c[name]).label(name) for name, (_, kind) in EXTREMES.items()),
+    ).group_by(*group)
+
+
+def statistics_select(tables: RollupTables = RECORD_ROLLUPS):
+    """The `burnout_statistics` summary, from the rollups rather than a scan of `burnout_records`"""
+    total = sum_shards(tables.total).subquery()
+
+    def mean(name):
+        return total.c[name] / func.nullif(total.c.record_count, 0)
+
+    return select(
+        total.c.record_count.label('total_records'),
+        select(func.count()).select_from(tables.user).scalar_subquery().label('total_users'),
+        mean('burnout_score_sum').label('avg_burnout_score'),
+        total.c.burnout_score_max.label('max_burnout_score'),
+        total.c.burnout_score_min.label('min_burnout_score'),
+        total.c.high_risk_count, total.c.medium_risk_count, total.c.low_risk_count,
+        func.round(100.0 * mean('high_risk_count'), 2).label('high_risk_percentage'),
+        mean('work_hours_sum').label('avg_work_hours'),
+        mean('sleep_hours_sum').label('avg_sleep_hours'),
+        mean('task_completion_rate_sum').label('avg_task_completion'),
+    )
+
+
+def create_schema(engine) -> bool:
+    """Create the rollup tables and the `burnout_statistics` view.
+
+    Returns True if a rollup table with an outdated layout (unsharded, or
+    missing columns) had to be recreated empty.  Rollups are derived data, so
+    the old layout is dropped rather than migrated; run scripts/backfill_rollups.py
+    afterwards.
+    """
+    recreated = False
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        # the view reads the rollups, so it goes before any of them can be dropped
+        conn.execute(text(f"DROP VIEW IF EXISTS {STATISTICS_VIEW}"))
+        for table in rollup_metadata.sorted_tables:
+            if inspector.has_table(table.name) and \
+                    set(table.c.keys()) - {column['name'] for column in inspector.get_columns(table.name)}:
+                table.drop(conn)
+                recreated = True
+        rollup_metadata.create_all(conn)
+        definition = statistics_select().compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+        conn.execute(text(f"CREATE VIEW {STATISTICS_VIEW} AS {definition}"))
+    return recreated
+
+
+def _source_column(source, name: str, default=0):
+    return source.c[name] if name in source.c else literal(default)
+
+
+def _risk_level_expr(source):
+    if 'burnout_risk' in source.c:
+        return source.c.burnout_risk
+    if 'risk_prediction' in source.c:
+        return case(*((source.c.risk_prediction == value, level) for value, level in PREDICTED_RISK.items()))
+    return literal(None, String)
+
+
+def _aggregate_columns(source) -> list:
+    columns = [func.count().label('record_count')]
+    for name, column in MEASURES.items():
+        columns.append(func.coalesce(func.sum(_source_column(source, column)), 0).label(name))
+    level = _risk_level_expr(source)
+    for value, name in RISK_COUNTS.items():
+        columns.append(func.coalesce(func.sum(case((level == value, 1), else_=0)), 0).label(name))
+    for name, (column, kind) in EXTREMES.items():
+        columns.append(getattr(func, kind)(_source_column(source, column, None)).label(name))
+    return columns
+
+
+def _user_columns(source) -> list:
+    """user_id, name, name_seen, first_seen and last_seen of each user, grouped by user_id"""
+    user_id = cast(source.c.user_id, String)
+    if 'name' not in source.c:
+        name = name_seen = literal(None)
+    else:
+        # the name on the user's latest named row, as the incremental path keeps it
+        named = source.alias('named')
+        name = select(named.c.name).where(named.c.user_id == source.c.user_id, named.c.name.isnot(None)) \
+            .order_by(named.c.created_at.desc(), named.c.id.desc()).limit(1).scalar_subquery()
+        name_seen = func.max(case((source.c.name.isnot(None), source.c.created_at)))
+    return [user_id, name, name_seen, func.min(source.c.created_at), func.max(source.c.created_at)]
+
+
+def rebuild_rollups(engine, source, tables: RollupTables = REQUEST_ROLLUPS) -> Dict[str, int]:
+    """Recompute every rollup in `tables` from `source` in one transaction.
+
+    Everything lands in shard 0.  On Postgres, writers to `source` are blocked for the duration so no
+    concurrent insert is counted twice or missed.  Returns row counts.
+    """
+    day_expr = (
+        func.date(source.c.created_at) if engine.dialect.name == 'sqlite' else cast(source.c.created_at, Date)
+    )
+    with engine.begin() as conn:
+        if engine.dialect.name == 'postgresql':
+            conn.execute(text(f"LOCK TABLE {source.name} IN SHARE MODE"))
+        for table in tables:
+            conn.execute(delete(table))
+
+        conn.execute(insert(tables.total).from_select(
+            ['id'] + list(ADDITIVE) + list(EXTREMES), select(literal(0), *_aggregate_columns(source))
+        ))
+        conn.execute(insert(tables.user).from_select(
+            ['user_id', 'name', 'name_seen', 'first_seen', 'last_seen'] + list(ADDITIVE) + list(EXTREMES),
+            select(*_user_columns(source), *_aggregate_columns(source))
+            .where(source.c.user_id.isnot(None)).group_by(source.c.user_id)
+        ))
+        conn.execute(insert(tables.day).from_select(
+            ['day', 'shard'] + list(ADDITIVE) + list(EXTREMES),
+            select(day_expr, literal(0), *_aggregate_columns(source))
+            .where(source.c.created_at.isnot(None)).group_by(day_expr)
+        ))
+        counts = {
+            table.name: conn.execute(select(func.count()).select_from(table)).scalar()
+            for table in tables
+        }
+    logger.info("Rebuilt rollups: %s", counts)
+    return counts
+
+
+def summarize(row) -> Dict[str, Optional[float]]:
+    """Averages and rates from one rollup row"""
+    count = row.record_count or 0
+
+    def ratio(value):
+        return round(value / count, 4) if count else None
+
+    return {
+        'records': count,
+        'avg_work_hours': ratio(row.work_hours_sum),
+        'avg_sleep_hours': ratio(row.sleep_hours_sum),
+        'avg_task_completion_rate': ratio(row.task_completion_rate_sum),
+        'avg_health_risk_score': ratio(row.health_risk_score_sum),
+        'high_workload_rate': ratio(row.high_workload_count),
+        'poor_recovery_rate': ratio(row.poor_recovery_count),
+        'weekday_share': ratio(row.weekday_count),
+        'high_risk_rate': ratio(row.high_risk_count),
+    }
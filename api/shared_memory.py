@@ -0,0 +1,96 @@
+"""Share model memory between server workers.
+
+`mmap` mode stores the compiled forest as an uncompressed joblib dump and maps
+it read-only, so every worker process backs its node arrays with the same page
+cache pages instead of unpickling a private copy of the estimator.  Worker RSS
+and shared pages are exported per process so the saving can be observed.
+"""
+import logging
+import os
+import tempfile
+
+import numpy as np
+from prometheus_client import Gauge
+
+from api.tree_engine import CompiledForest, UnsupportedModelError
+
+logger = logging.getLogger(__name__)
+
+WORKER_MEMORY = Gauge(
+    'worker_memory_bytes', 'Memory of this worker process from /proc/self/statm', ['pid', 'kind']
+)
+
+
+def shared_artifact_path(artifact_dir: str, version: str) -> str:
+    """Location of the memory-mappable artifact for a model version"""
+    return os.path.join(artifact_dir, f"{version}.forest.joblib")
+
+
+def export_shared_forest(model, path: str) -> CompiledForest:
+    """Compile `model` and write it uncompressed so it can be memory-mapped.
+
+    The file is written to a temporary name and renamed into place, so workers
+    starting concurrently never map a half-written artifact.
+    """
+    import joblib
+
+    forest = CompiledForest.from_estimator(model)
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(handle)
+    try:
+        joblib.dump(forest, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    logger.info("Exported shared model artifact to %s", path)
+    return forest
+
+
+def load_shared_forest(model_path: str, artifact_dir: str, version: str):
+    """Memory-map the compiled forest for `version`, exporting it on first use.
+
+    Artifacts are keyed on the source content hash, so a stale file is never
+    reused and concurrent exports of the same version write identical bytes.
+    Models the tree engine cannot compile (boosted ensembles, linear models)
+    are not shared: the estimator itself is returned, loaded per process.
+    """
+    import joblib
+
+    path = shared_artifact_path(artifact_dir, version)
+    if not os.path.exists(path):
+        model = joblib.load(model_path)
+        try:
+            export_shared_forest(model, path)
+        except UnsupportedModelError as unsupported:
+            logger.warning("Model sharing unavailable, each worker keeps its own copy: %s", unsupported)
+            return model
+    forest = joblib.load(path, mmap_mode='r')
+    if not isinstance(forest.feature, np.memmap):
+        logger.warning("Shared model artifact %s was not memory-mapped", path)
+    logger.info("✓ Memory-mapped model loaded from %s", path)
+    return forest
+
+
+def _statm():
+    """`(resident, shared)` bytes of the current process"""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as statm:
+            fields = statm.read().split()
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        return int(fields[1]) * page_size, int(fields[2]) * page_size
+    except (OSError, ValueError, IndexError):
+        # non-Linux: peak RSS is the best the standard library offers
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, 0
+
+
+def register_worker_memory_metrics():
+    """Export this process's RSS and shared memory, sampled on every scrape"""
+    pid = str(os.getpid())
+    # a worker forked from a preloading parent must not report the parent's pid
+    WORKER_MEMORY.clear()
+    WORKER_MEMORY.labels(pid=pid, kind='rss').set_function(lambda: _statm()[0])
+    WORKER_MEMORY.labels(pid=pid, kind='shared').set_function(lambda: _statm()[1])
@@ -0,0 +1,310 @@
+"""Durable local spool for rows the database could not take, and their replay.
+
+Rows are appended as NDJSON to segment files in one directory:
+
+- `<segment>.ndjson.open`: the segment this process is appending to;
+- `<segment>.ndjson`: sealed, waiting for replay;
+- `<segment>.ndjson.replay-<pid>`: claimed by the replayer of process `pid`
+  (the rename is atomic, so workers sharing the directory never replay the
+  same segment twice);
+- `<segment>.offset`: bytes of the segment already loaded, so a failed or
+  interrupted replay resumes where it stopped.
+
+Appends are flushed to the OS at once and fsynced in groups (`fsync_interval`),
+so a process crash loses nothing and a power loss at most that window.
+Replay is at-least-once: a crash between a bulk insert and its offset update
+loads that batch again.
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+SPOOL_ROWS = Counter('spool_rows_total', 'Rows written to, replayed from or dropped by the spool', ['op'])
+SPOOL_PENDING_BYTES = Gauge('spool_pending_bytes', 'Bytes in spool segments not yet replayed')
+SPOOL_SEGMENTS = Gauge('spool_segments', 'Spool segment files not yet replayed')
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Spool:
+    """Append-only NDJSON segments with group fsync; thread-safe within a process"""
+
+    def __init__(self, directory: str, datetime_fields: Sequence[str] = ('created_at',),
+                 segment_max_bytes: int = 16 * 1024 * 1024, fsync_interval: float = 0.2):
+        self.directory = directory
+        self.datetime_fields = tuple(datetime_fields)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[str] = None
+        self._dirty = False
+        self._synced_at = 0.0
+        self._sequence = 0
+
+    # ---------- writing ----------
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        name = f"segment-{time.time_ns()}-{os.getpid()}-{self._sequence}.ndjson"
+        self._path = os.path.join(self.directory, name + '.open')
+        self._file = open(self._path, 'ab')
+
+    def _seal(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        empty = os.path.getsize(self._path) == 0
+        if empty:
+            os.remove(self._path)
+        else:
+            os.rename(self._path, self._path[:-len('.open')])
+        self._file = self._path = None
+        self._dirty = False
+
+    def append(self, rows: List[dict]):
+        """Write rows durably enough to survive a process crash; fsync is grouped"""
+        data = b''.join(
+            json.dumps(row, default=_json_default, separators=(',', ':')).encode() + b'\n' for row in rows
+        )
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(data)
+            self._file.flush()
+            self._dirty = True
+            now = time.monotonic()
+            if now - self._synced_at >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+                self._synced_at = now
+            if self._file.tell() >= self.segment_max_bytes:
+                self._seal()
+        SPOOL_ROWS.labels(op='written').inc(len(rows))
+        SPOOL_PENDING_BYTES.inc(len(data))
+
+    def sync(self):
+        """Fsync appends not yet on disk (called periodically by the replayer)"""
+        with self._lock:
+            if self._file is not None and self._dirty:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+                self._synced_at = time.monotonic()
+
+    def seal(self):
+        """Close the current segment so it can be replayed"""
+        with self._lock:
+            self._seal()
+
+    # ---------- replay ----------
+
+    def _recover_orphans(self):
+        """Seal `.open` segments and release claims left by processes that died"""
+        for path in glob.glob(os.path.join(self.directory, '*.ndjson.open')):
+            if path != self._path and not _pid_alive(int(os.path.basename(path).split('-')[2])):
+                try:
+                    os.rename(path, path[:-len('.open')])
+                except FileNotFoundError:
+                    pass
+        for path in glob.glob(os.path.join(self.directory, '*.ndjson.replay-*')):
+            if not _pid_alive(int(path.rsplit('-', 1)[1])):
+                try:
+                    os.rename(path, path.rsplit('.replay-', 1)[0])
+                except FileNotFoundError:
+                    pass
+
+    def pending(self) -> List[str]:
+        """Sealed segments, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        self._recover_orphans()
+        return sorted(glob.glob(os.path.join(self.directory, '*.ndjson')))
+
+    def claim(self, path: str) -> Optional[str]:
+        """Atomically take a sealed segment for replay; None if another process got it"""
+        claimed = f"{path}.replay-{os.getpid()}"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def _decode(self, line: bytes) -> dict:
+        row = json.loads(line)
+        for name in self.datetime_fields:
+            if row.get(name) is not None:
+                row[name] = datetime.fromisoformat(row[name])
+        return row
+
+    def read(self, claimed: str, batch_size: int) -> Iterator[Tuple[List[dict], int]]:
+        """`(rows, end_offset)` batches of a claimed segment from its saved offset"""
+        base = claimed.rsplit('.replay-', 1)[0]
+        offset = self.load_offset(base)
+        with open(claimed, 'rb') as segment:
+            segment.seek(offset)
+            rows = []
+            for line in segment:
+                offset += len(line)
+                if not line.endswith(b'\n'):
+                    # torn final write from a crash: nothing after it can be valid
+                    logger.error("Dropping truncated spool record at the end of %s", claimed)
+                    SPOOL_ROWS.labels(op='corrupt').inc()
+                    break
+                try:
+                    rows.append(self._decode(line))
+                except ValueError as decode_err:
+                    logger.error("Dropping unreadable spool record in %s: %s", claimed, decode_err)
+                    SPOOL_ROWS.labels(op='corrupt').inc()
+                if len(rows) >= batch_size:
+                    yield rows, offset
+                    rows = []
+            if rows:
+                yield rows, offset
+
+    def load_offset(self, base: str) -> int:
+        try:
+            with open(base[:-len('.ndjson')] + '.offset', encoding='utf-8') as offset_file:
+                return int(offset_file.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def save_offset(self, base: str, offset: int):
+        path = base[:-len('.ndjson')] + '.offset'
+        with open(path + '.tmp', 'w', encoding='utf-8') as offset_file:
+            offset_file.write(str(offset))
+            offset_file.flush()
+            os.fsync(offset_file.fileno())
+        os.replace(path + '.tmp', path)
+
+    def release(self, claimed: str):
+        """Put a partially replayed segment back for a later attempt"""
+        os.rename(claimed, claimed.rsplit('.replay-', 1)[0])
+
+    def finish(self, claimed: str):
+        """Delete a fully replayed segment and its offset"""
+        base = claimed.rsplit('.replay-', 1)[0]
+        os.remove(claimed)
+        try:
+            os.remove(base[:-len('.ndjson')] + '.offset')
+        except FileNotFoundError:
+            pass
+
+    def update_gauges(self):
+        paths = self.pending() + glob.glob(os.path.join(self.directory, '*.ndjson.open')) \
+            if os.path.isdir(self.directory) else []
+        SPOOL_SEGMENTS.set(len(paths))
+        total = 0
+        for path in paths:
+            try:
+                total += os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+        SPOOL_PENDING_BYTES.set(total)
+
+
+class SpoolReplayer:
+    """Background thread that bulk-loads spooled rows once the breaker lets calls through.
+
+    `load_fn(rows)` must insert the rows or raise.  Each batch is a breaker
+    call, so a replay attempt against a database that is still down re-opens
+    the breaker and waits for the next reset timeout.
+    """
+
+    def __init__(self, spool: Spool, load_fn: Callable[[List[dict]], None], breaker,
+                 interval: float = 5.0, batch_size: int = 1000):
+        self.spool = spool
+        self.load_fn = load_fn
+        self.breaker = breaker
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def replay_once(self) -> int:
+        """Replay every sealed segment while the database accepts rows; returns rows loaded"""
+        pending = self.spool.pending()
+        if not pending:
+            # only cut the current segment once the backlog is gone, so an
+            # outage produces a few large segments rather than one per interval
+            self.spool.seal()
+            pending = self.spool.pending()
+        loaded = 0
+        for path in pending:
+            claimed = self.spool.claim(path)
+            if claimed is None:
+                continue
+            for rows, offset in self.spool.read(claimed, self.batch_size):
+                if not self.breaker.allow():
+                    self.spool.release(claimed)
+                    return loaded
+                started = time.perf_counter()
+                try:
+                    self.load_fn(rows)
+                except Exception as load_err:
+                    logger.warning("Spool replay of %d rows failed: %s", len(rows), load_err)
+                    self.breaker.record_failure()
+                    self.spool.release(claimed)
+                    return loaded
+                self.breaker.record_success(time.perf_counter() - started)
+                self.spool.save_offset(path, offset)
+                loaded += len(rows)
+                SPOOL_ROWS.labels(op='replayed').inc(len(rows))
+            self.spool.finish(claimed)
+        if loaded:
+            logger.info("Replayed %d spooled rows", loaded)
+        return loaded
+
+    def start(self):
+        """Sync and replay in a daemon thread (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="spool-replayer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop replaying and seal the current segment for the next process"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(10)
+            self._thread = None
+        self.spool.seal()
+
+    def _run(self):
+        next_replay = time.monotonic()
+        while not self._stop.wait(self.spool.fsync_interval):
+            self.spool.sync()
+            if time.monotonic() < next_replay:
+                continue
+            next_replay = time.monotonic() + self.interval
+            try:
+                self.replay_once()
+                self.spool.update_gauges()
+            except Exception as replay_err:
+                logger.error("Spool replay failed: %s", replay_err, exc_info=True)
@@ -0,0 +1,264 @@
+"""One tuned, instrumented SQLAlchemy engine per process and database URL.
+
+The API and the scripts get their engine from `get_engine` instead of calling
+`create_engine` themselves, so pool sizing, connection health checks and
+SQLite pragmas are configured in one place (see `StorageConfig.from_env`).
+
+A URL naming an async driver (`postgresql+asyncpg://`, `sqlite+aiosqlite://`)
+gets an `AsyncEngine` from `get_async_engine`; `sync_url` maps it to the
+matching sync driver for code that runs on threads.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent obtaining a connection from the pool', ['database'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+POOL_IN_USE = Gauge('db_pool_connections_in_use', 'Pooled connections currently checked out', ['database'])
+POOL_WAITING = Gauge('db_pool_checkout_waiting', 'Callers waiting to obtain a pooled connection', ['database'])
+
+# async driver -> the sync driver for the same database
+ASYNC_DRIVERS = {'asyncpg': 'psycopg2', 'aiosqlite': 'pysqlite'}
+
+
+@dataclass(frozen=True)
+class StorageConfig:
+    """Engine settings; pool options apply to Postgres and file-backed SQLite"""
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    sqlite_journal_mode: str = 'WAL'
+    sqlite_synchronous: str = 'NORMAL'
+    sqlite_busy_timeout_ms: int = 5000
+
+    @classmethod
+    def from_env(cls) -> 'StorageConfig':
+        """DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+        SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS and SQLITE_BUSY_TIMEOUT_MS"""
+        return cls(
+            pool_size=int(os.getenv('DB_POOL_SIZE', str(cls.pool_size))),
+            max_overflow=int(os.getenv('DB_MAX_OVERFLOW', str(cls.max_overflow))),
+            pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', str(cls.pool_timeout))),
+            pool_recycle=int(os.getenv('DB_POOL_RECYCLE', str(cls.pool_recycle))),
+            pool_pre_ping=os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+            sqlite_journal_mode=os.getenv('SQLITE_JOURNAL_MODE', cls.sqlite_journal_mode).upper(),
+            sqlite_synchronous=os.getenv('SQLITE_SYNCHRONOUS', cls.sqlite_synchronous).upper(),
+            sqlite_busy_timeout_ms=int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', str(cls.sqlite_busy_timeout_ms))),
+        )
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection"""
+
+    metrics_label = 'default'
+
+    def _do_get(self):
+        waiting = POOL_WAITING.labels(database=self.metrics_label)
+        waiting.inc()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waiting.dec()
+            POOL_CHECKOUT_WAIT.labels(database=self.metrics_label).observe(time.perf_counter() - started)
+
+
+def is_async_url(url: str) -> bool:
+    """Whether `url` names an async driver (`postgresql+asyncpg://`, `sqlite+aiosqlite://`)"""
+    return make_url(url).get_driver_name() in ASYNC_DRIVERS
+
+
+def sync_url(url: str) -> str:
+    """`url` with an async driver swapped for the sync driver of the same database"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_driver_name())
+    if driver is None:
+        return url
+    if driver == 'psycopg2' and 'ssl' in parsed.query and 'sslmode' not in parsed.query:
+        parsed = parsed.update_query_dict({'sslmode': parsed.query['ssl']}).difference_update_query(['ssl'])
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _asyncpg_url(parsed):
+    """asyncpg spells libpq's `sslmode` as `ssl` and has no `channel_binding`, so a
+    Postgres URL only needs its scheme changed to switch drivers"""
+    query = dict(parsed.query)
+    if 'sslmode' in query:
+        query.setdefault('ssl', query.pop('sslmode'))
+    if query.pop('channel_binding', None) is not None:
+        logger.info("channel_binding is not supported by asyncpg; ignoring it")
+    return parsed.set(query=query)
+
+
+def _metrics_label(url) -> str:
+    """Low-cardinality pool name: dialect plus database (never credentials or host)"""
+    return f"{url.get_backend_name()}:{url.database or 'memory'}"
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def _install_sqlite_pragmas(engine: Engine, config: StorageConfig):
+    """WAL lets readers run alongside the writer, and with synchronous=NORMAL a
+    commit appends to the log instead of fsyncing a rollback journal"""
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode={config.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={config.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={int(config.sqlite_busy_timeout_ms)}")
+        finally:
+            cursor.close()
+
+
+def _engine_kwargs(parsed, config: StorageConfig, base_pool) -> dict:
+    kwargs = {'echo': False}
+    if not _is_memory_sqlite(parsed):
+        # an in-memory SQLite database lives in one connection; keep SQLAlchemy's default pool for it
+        # the label is a class attribute so it survives the pool being recreated by dispose()
+        pool_class = type(f'Instrumented{base_pool.__name__}', (InstrumentedQueuePool, base_pool),
+                          {'metrics_label': _metrics_label(parsed)})
+        kwargs.update(
+            poolclass=pool_class,
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow,
+            pool_timeout=config.pool_timeout,
+            pool_recycle=config.pool_recycle,
+            pool_pre_ping=config.pool_pre_ping,
+        )
+    return kwargs
+
+
+def _instrument(engine: Engine, parsed, config: StorageConfig):
+    label = _metrics_label(parsed)
+    if parsed.get_backend_name() == 'sqlite':
+        _install_sqlite_pragmas(engine, config)
+    if isinstance(engine.pool, QueuePool):
+        # read through the engine: dispose() swaps in a new pool object
+        POOL_IN_USE.labels(database=label).set_function(lambda: engine.pool.checkedout())
+    logger.info("Storage engine for %s: %s", label, engine.pool.status()
+                if isinstance(engine.pool, QueuePool) else type(engine.pool).__name__)
+
+
+def create_storage_engine(url: str, config: Optional[StorageConfig] = None) -> Engine:
+    """A new engine for `url` tuned by `config`; most callers want `get_engine`"""
+    config = config or StorageConfig.from_env()
+    parsed = make_url(url)
+    engine = create_engine(url, future=True, **_engine_kwargs(parsed, config, QueuePool))
+    _instrument(engine, parsed, config)
+    return engine
+
+
+def create_async_storage_engine(url: str, config: Optional[StorageConfig] = None) -> 'AsyncEngine':
+    """A new `AsyncEngine` for an async-driver `url`; most callers want `get_async_engine`.
+
+    Same pool settings, metrics and pragmas as `create_storage_engine`, but a
+    caller waiting for a connection awaits instead of blocking a thread.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    config = config or StorageConfig.from_env()
+    parsed = make_url(url)
+    if parsed.get_driver_name() == 'asyncpg':
+        parsed = _asyncpg_url(parsed)
+    engine = create_async_engine(parsed, **_engine_kwargs(parsed, config, AsyncAdaptedQueuePool))
+    _instrument(engine.sync_engine, parsed, config)
+    return engine
+
+
+# keyed by (url, 'sync' | 'async'): the same URL can have both kinds of engine
+_ENGINES: Dict[Tuple[str, str], Tuple[int, Union[Engine, 'AsyncEngine']]] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def _cached_engine(url: str, kind: str, factory, overrides: dict):
+    pid = os.getpid()
+    key = (url, kind)
+    with _ENGINES_LOCK:
+        cached = _ENGINES.get(key)
+        if cached is not None and cached[0] == pid:
+            return cached[1]
+        if cached is not None:
+            # inherited across fork: drop the parent's connections without closing them
+            getattr(cached[1], 'sync_engine', cached[1]).dispose(close=False)
+        engine = factory(url, replace(StorageConfig.from_env(), **overrides))
+        _ENGINES[key] = (pid, engine)
+        return engine
+
+
+def get_engine(url: str, **overrides) -> Engine:
+    """The process-wide engine for `url`, created on first use.
+
+    `overrides` replace `StorageConfig` fields and only take effect when the
+    engine is created.  A forked child gets its own engine rather than
+    sharing the parent's pooled sockets.
+    """
+    return _cached_engine(url, 'sync', create_storage_engine, overrides)
+
+
+def get_async_engine(url: str, **overrides) -> 'AsyncEngine':
+    """The process-wide `AsyncEngine` for an async-driver `url` (see `get_engine`)"""
+    if not is_async_url(url):
+        raise ValueError(f"{make_url(url).drivername} is not an async driver (expected one of {sorted(ASYNC_DRIVERS)})")
+    return _cached_engine(url, 'async', create_async_storage_engine, overrides)
+
+
+def _own_engines():
+    with _ENGINES_LOCK:
+        return [engine for pid, engine in _ENGINES.values() if pid == os.getpid()]
+
+
+def dispose_engines():
+    """Close the pooled connections of every sync engine created by `get_engine` in this process.
+
+    The engines stay usable and reconnect on next use.  Async engines are
+    closed by `dispose_async_engines`.
+    """
+    for engine in _own_engines():
+        if isinstance(engine, Engine):
+            engine.dispose()
+
+
+async def dispose_async_engines():
+    """Close the pooled connections of every engine created by `get_async_engine` in this process"""
+    for engine in _own_engines():
+        if not isinstance(engine, Engine):
+            await engine.dispose()
+
+
+def add_missing_columns(engine: Engine, table) -> List[str]:
+    """ALTER TABLE ADD the nullable columns of `table` that an existing table lacks; returns their names.
+
+    `create_all` leaves existing tables alone, so columns added to a table
+    definition later reach older databases this way.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return []
+    present = {column['name'] for column in inspector.get_columns(table.name)}
+    missing = [column for column in table.columns if column.name not in present and column.nullable]
+    with engine.begin() as conn:
+        for column in missing:
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            ))
+    return [column.name for column in missing]
@@ -0,0 +1,128 @@
+"""Incremental CSV/NDJSON parsing and result formatting for streamed scoring"""
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from starlette.responses import StreamingResponse
+
+# output columns, in order, for CSV results
+RESULT_FIELDS = ('line', 'user_id', 'name', 'risk_level', 'risk_probability', 'error')
+
+# a line longer than this is reported as a bad row instead of being buffered
+MAX_LINE_CHARS = 64 * 1024
+
+
+class BadRow(ValueError):
+    """A row that could not be parsed; reported inline in the results"""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes],
+                     max_line_chars: int = MAX_LINE_CHARS) -> AsyncIterator[Tuple[int, Union[str, BadRow]]]:
+    """Yield `(line_number, text)` for every line of a chunked UTF-8 body.
+
+    Only the current partial line is buffered.  Overlong lines are skipped up to
+    the next newline and yielded as a `BadRow` so the caller can report them.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    too_long = f"line longer than {max_line_chars} characters"
+    buffer = ''
+    line_no = 0
+    skipping = False
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            line_no += 1
+            if skipping or len(line) > max_line_chars:
+                skipping = False
+                yield line_no, BadRow(too_long)
+            else:
+                yield line_no, line.rstrip('\r')
+        if len(buffer) > max_line_chars:
+            # drop the overlong line's head now so memory stays bounded
+            buffer = ''
+            skipping = True
+    buffer += decoder.decode(b'', final=True)
+    if skipping:
+        yield line_no + 1, BadRow(too_long)
+    elif buffer:
+        yield line_no + 1, buffer.rstrip('\r')
+
+
+def _csv_record(header: List[str], line: str) -> dict:
+    values = next(csv.reader([line]))
+    if len(values) != len(header):
+        raise BadRow(f"expected {len(header)} columns, got {len(values)}")
+    # blank optional fields (name, user_id) mean "not provided"
+    return {key: value for key, value in zip(header, values) if value != ''}
+
+
+def _ndjson_record(line: str) -> dict:
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as json_err:
+        raise BadRow(f"invalid JSON: {json_err.msg}") from json_err
+    if not isinstance(record, dict):
+        raise BadRow("expected a JSON object")
+    return record
+
+
+async def iter_records(chunks: AsyncIterator[bytes],
+                       input_format: str) -> AsyncIterator[Tuple[int, Union[dict, BadRow]]]:
+    """Yield `(line_number, raw_record)` from a CSV (with header) or NDJSON body.
+
+    Blank lines are skipped; rows that cannot be parsed are yielded as `BadRow`.
+    """
+    header: Optional[List[str]] = None
+    async for line_no, line in iter_lines(chunks):
+        if isinstance(line, BadRow):
+            yield line_no, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            if input_format == 'csv':
+                if header is None:
+                    header = [name.strip() for name in next(csv.reader([line]))]
+                    continue
+                yield line_no, _csv_record(header, line)
+            else:
+                yield line_no, _ndjson_record(line)
+        except (BadRow, csv.Error) as parse_err:
+            yield line_no, parse_err if isinstance(parse_err, BadRow) else BadRow(str(parse_err))
+
+
+def format_results(results: List[Dict[str, object]], output_format: str) -> str:
+    """Render result dicts as NDJSON lines or CSV rows (without header)"""
+    if output_format == 'csv':
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        for result in results:
+            writer.writerow(['' if result.get(key) is None else result[key] for key in RESULT_FIELDS])
+        return out.getvalue()
+    return ''.join(
+        json.dumps({key: value for key, value in result.items() if value is not None}) + '\n'
+        for result in results
+    )
+
+
+def csv_header() -> str:
+    """Header row for CSV results"""
+    return ','.join(RESULT_FIELDS) + '\n'
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """Streaming response that reads the request body while it streams.
+
+    On ASGI servers older than spec 2.4 (uvicorn included) Starlette listens for
+    disconnects by calling `receive` concurrently, which would swallow body
+    chunks.  Here the body iterator owns `receive`; a client disconnect
+    surfaces as `ClientDisconnect` from `request.stream()`.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
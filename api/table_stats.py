@@ -0,0 +1,209 @@
+"""Cached row counts and insert rates for a table, reconciled against cheap estimates"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+DB_STATS_RECONCILES = Counter(
+    'db_stats_reconciles_total', 'Reconciliations of cached table statistics', ['status']
+)
+DB_ROWS_ESTIMATE = Gauge('db_table_rows_estimate', 'Cached row count estimate per table', ['table'])
+
+# windows reported by `TableStats.snapshot`, in seconds
+RATE_WINDOWS = {'1m': 60, '5m': 300}
+
+
+def _connect(bind):
+    """A connection for an engine, or the caller's own connection (e.g. from `AsyncConnection.run_sync`)"""
+    from sqlalchemy.engine import Engine
+    return bind.connect() if isinstance(bind, Engine) else nullcontext(bind)
+
+
+def estimate_row_count(engine, table_name: str) -> Tuple[Optional[int], str]:
+    """`(rows, source)` without scanning the table; rows is None when it does not exist.
+
+    Postgres uses the statistics collector's `n_live_tup` (updated within
+    seconds of each commit) and falls back to `pg_class.reltuples` (updated by
+    ANALYZE/VACUUM).  SQLite reads `MAX(id)` from the primary key index, which
+    over-counts only by rows deleted since.  Other databases get an exact count.
+    """
+    from sqlalchemy import text
+    with _connect(engine) as conn:
+        if conn.dialect.name == 'postgresql':
+            row = conn.execute(text(
+                "SELECT c.reltuples, s.n_live_tup FROM pg_class c "
+                "LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid "
+                "WHERE c.oid = to_regclass(:table)"
+            ), {'table': table_name}).first()
+            if row is None:
+                return None, 'pg_class.reltuples'
+            reltuples, live = row
+            if live is not None and (live > 0 or reltuples <= 0):
+                return int(live), 'pg_stat_user_tables.n_live_tup'
+            return max(int(reltuples), 0), 'pg_class.reltuples'
+        if conn.dialect.name == 'sqlite':
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :table"
+            ), {'table': table_name}).first()
+            if exists is None:
+                return None, 'sqlite max(id)'
+            return int(conn.execute(text(f"SELECT MAX(id) FROM {table_name}")).scalar() or 0), 'sqlite max(id)'
+    return exact_row_count(engine, table_name), 'count(*)'
+
+
+def exact_row_count(engine, table_name: str) -> int:
+    """`SELECT COUNT(*)`: a full scan on large tables, only run on request"""
+    from sqlalchemy import text
+    with _connect(engine) as conn:
+        return int(conn.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar())
+
+
+class TableStats:
+    """Row count kept in-process between periodic reconciliations.
+
+    The insert path calls `record_inserts`; a daemon thread calls `reconcile`
+    every `interval` seconds, replacing the baseline with `estimate_fn()`.
+    The count is the last baseline plus inserts recorded since, so inserts by
+    other processes show up at the next reconciliation.
+    """
+
+    def __init__(self, table_name: str, estimate_fn: Callable[[], Tuple[Optional[int], str]],
+                 interval: float = 60.0):
+        self.table_name = table_name
+        self.estimate_fn = estimate_fn
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._baseline: Optional[int] = None
+        self._source = 'pending'
+        self._since_reconcile = 0
+        self._reconciled_at: Optional[float] = None
+        self._reconciled_wall: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+        # (second, rows) buckets covering the longest rate window
+        self._buckets = deque()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def reconciled(self) -> bool:
+        """Whether a baseline was ever established"""
+        return self._reconciled_at is not None
+
+    def record_inserts(self, rows: int = 1):
+        """Count rows committed by this process"""
+        second = int(time.monotonic())
+        with self._lock:
+            self._since_reconcile += rows
+            if self._buckets and self._buckets[-1][0] == second:
+                self._buckets[-1][1] += rows
+            else:
+                self._buckets.append([second, rows])
+            horizon = second - max(RATE_WINDOWS.values())
+            while self._buckets and self._buckets[0][0] <= horizon:
+                self._buckets.popleft()
+
+    def _set_baseline(self, rows: Optional[int], source: str, pending_before: int):
+        with self._lock:
+            self._baseline = rows
+            self._source = source
+            # inserts recorded while the query ran are not in `rows`
+            self._since_reconcile -= pending_before
+            self._reconciled_at = time.monotonic()
+            self._reconciled_wall = datetime.now(timezone.utc)
+            self._last_error = None
+        if rows is not None:
+            DB_ROWS_ESTIMATE.labels(table=self.table_name).set(rows)
+
+    def _pending(self) -> int:
+        with self._lock:
+            return self._since_reconcile
+
+    def _reconcile_failed(self, stats_err: Exception) -> bool:
+        logger.warning("Reconciling %s statistics failed: %s", self.table_name, stats_err)
+        with self._lock:
+            self._last_error = str(stats_err)
+        DB_STATS_RECONCILES.labels(status='error').inc()
+        return False
+
+    def _reconciled(self, rows: Optional[int], source: str, pending_before: int) -> bool:
+        self._set_baseline(rows, source, pending_before)
+        DB_STATS_RECONCILES.labels(status='success').inc()
+        return True
+
+    def reconcile(self) -> bool:
+        """Replace the baseline with a fresh estimate; False (and keep the old one) on error"""
+        pending_before = self._pending()
+        try:
+            rows, source = self.estimate_fn()
+        except Exception as stats_err:
+            return self._reconcile_failed(stats_err)
+        return self._reconciled(rows, source, pending_before)
+
+    async def reconcile_async(self, estimate_fn: Callable[[], Awaitable[Tuple[Optional[int], str]]]) -> bool:
+        """`reconcile` with an awaitable estimate, for async database drivers"""
+        pending_before = self._pending()
+        try:
+            rows, source = await estimate_fn()
+        except Exception as stats_err:
+            return self._reconcile_failed(stats_err)
+        return self._reconciled(rows, source, pending_before)
+
+    def set_exact(self, count_fn: Callable[[], int]) -> int:
+        """Run an exact count and adopt it as the baseline"""
+        pending_before = self._pending()
+        rows = count_fn()
+        self._set_baseline(rows, 'exact', pending_before)
+        return rows
+
+    async def set_exact_async(self, count_fn: Callable[[], Awaitable[int]]) -> int:
+        """`set_exact` with an awaitable count"""
+        pending_before = self._pending()
+        rows = await count_fn()
+        self._set_baseline(rows, 'exact', pending_before)
+        return rows
+
+    def snapshot(self) -> Dict[str, object]:
+        """Cached statistics with their source and staleness"""
+        now = time.monotonic()
+        with self._lock:
+            rates = {
+                name: sum(rows for second, rows in self._buckets if second > now - window) / window
+                for name, window in RATE_WINDOWS.items()
+            }
+            return {
+                'table_exists': self._baseline is not None if self.reconciled else None,
+                'row_count': None if self._baseline is None else self._baseline + self._since_reconcile,
+                'row_count_source': self._source,
+                'inserts_since_reconcile': self._since_reconcile,
+                'insert_rate_per_sec': rates,
+                'reconciled_at': self._reconciled_wall.isoformat() if self._reconciled_wall else None,
+                'staleness_seconds': None if self._reconciled_at is None else round(now - self._reconciled_at, 3),
+                'last_error': self._last_error,
+            }
+
+    def start(self):
+        """Reconcile now and then every `interval` seconds in a daemon thread (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="table-stats", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop reconciling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self):
+        self.reconcile()
+        while not self._stop.wait(self.interval):
+            self.reconcile()
@@ -0,0 +1,126 @@
+"""Array-based inference engine for tree ensembles.
+
+Compiles a fitted scikit-learn forest into flat NumPy node arrays (feature,
+threshold, left, right, leaf value) and evaluates one row or a batch with a
+vectorized level-by-level traversal.  Labels and probabilities come out of a
+single pass, without sklearn's per-call validation and joblib dispatch.
+"""
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# sklearn marks leaves with children == -1
+_TREE_LEAF = -1
+
+
+class UnsupportedModelError(TypeError):
+    """Raised when an estimator cannot be compiled"""
+
+
+class CompiledForest:
+    """Tree ensemble flattened into contiguous node arrays.
+
+    Every tree's nodes are concatenated; `roots[t]` is the first node of tree
+    `t`.  Leaves point to themselves so the traversal can run a fixed
+    `max_depth` steps for every row.  `value` holds each leaf's normalized
+    class distribution, so averaging over trees reproduces `predict_proba` of
+    a random forest.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes = classes
+        self.n_trees = len(roots)
+        self.n_classes = value.shape[1]
+
+    @classmethod
+    def from_estimator(cls, estimator):
+        """Compile a fitted RandomForest/ExtraTrees/DecisionTree classifier"""
+        if hasattr(estimator, 'estimators_') and hasattr(estimator, 'n_outputs_'):
+            trees = [est.tree_ for est in estimator.estimators_]
+        elif hasattr(estimator, 'tree_'):
+            trees = [estimator.tree_]
+        else:
+            raise UnsupportedModelError(
+                f"Cannot compile {type(estimator).__name__}; only sklearn forest and "
+                f"decision tree classifiers are supported"
+            )
+        if getattr(estimator, 'n_outputs_', 1) != 1:
+            raise UnsupportedModelError("Multi-output estimators are not supported")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == _TREE_LEAF
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            leaf_value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = leaf_value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0] = 1.0
+            values.append(leaf_value / normalizer)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(estimator.classes_),
+        )
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Class probabilities for an (N, F) matrix"""
+        # sklearn evaluates splits on float32 inputs against float64 thresholds
+        x = np.ascontiguousarray(features, dtype=np.float32)
+        n_rows, n_features = x.shape
+        flat_x = x.ravel()
+
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+        node = np.tile(self.roots, n_rows)
+        for _ in range(self.max_depth):
+            go_left = flat_x[row_offsets + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return self.value[node].reshape(n_rows, self.n_trees, self.n_classes).mean(axis=1)
+
+    def predict_with_proba(self, features: np.ndarray):
+        """Return `(labels, probabilities)` from a single traversal"""
+        proba = self.predict_proba(features)
+        return self.classes[np.argmax(proba, axis=1)], proba
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Class labels for an (N, F) matrix, so the forest can stand in for the estimator"""
+        return self.predict_with_proba(features)[0]
+
+
+def compile_model(model):
+    """Compile `model` or return None (with a warning) when unsupported"""
+    try:
+        compiled = CompiledForest.from_estimator(model)
+    except UnsupportedModelError as unsupported:
+        logger.warning("Compiled inference backend unavailable: %s", unsupported)
+        return None
+    logger.info("Compiled %d trees (%d nodes, depth %d) for array inference",
+                compiled.n_trees, len(compiled.feature), compiled.max_depth)
+    return compiled
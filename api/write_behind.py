@@ -0,0 +1,180 @@
+"""Write-behind buffer that batches `user_requests` rows into multi-row inserts"""
+import logging
+import queue
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# longest the flusher blocks on the queue before re-checking for shutdown
+_POLL_SECONDS = 0.05
+
+WRITE_BEHIND_QUEUE_DEPTH = Gauge('write_behind_queue_depth', 'Rows waiting to be flushed')
+WRITE_BEHIND_BACKPRESSURE = Counter(
+    'write_behind_backpressure_total', 'Rows that found the write-behind queue full'
+)
+WRITE_BEHIND_FLUSH_ROWS = Histogram(
+    'write_behind_flush_rows', 'Rows written per write-behind flush',
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+)
+
+
+class WriteBehindBuffer:
+    """Bounded in-memory queue flushed to the database by a background thread.
+
+    Rows are flushed with a single `flush_fn(rows)` call once `batch_size` rows
+    are pending or `flush_interval` seconds have passed since the first pending
+    row.  When the queue is full, `put` blocks for up to `put_timeout` seconds
+    and then writes the row synchronously, so producers slow down instead of
+    dropping data.  After `drain` the buffer is closed: `offer` refuses rows
+    and `put` writes them synchronously, until `start` reopens it.
+    """
+
+    def __init__(self, flush_fn, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, put_timeout: float = 1.0):
+        self.flush_fn = flush_fn
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.001, flush_interval)
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        """Rows currently waiting to be flushed"""
+        return self._queue.qsize()
+
+    @property
+    def closed(self) -> bool:
+        """Whether `drain` has run (and `start` has not reopened the buffer since)"""
+        return self._closed
+
+    @property
+    def running(self) -> bool:
+        """Whether the flusher thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background flusher (idempotent); reopens a drained buffer"""
+        with self._start_lock:
+            self._closed = False
+            self._start_flusher()
+
+    def _start_flusher(self):
+        # caller holds _start_lock
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind-flusher", daemon=True
+        )
+        self._thread.start()
+        logger.info("Write-behind flusher started (batch_size=%d, interval=%.3fs)",
+                    self.batch_size, self.flush_interval)
+
+    def offer(self, row: dict) -> bool:
+        """Enqueue a row without blocking; returns False when the queue is full or closed"""
+        if self._closed:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            WRITE_BEHIND_BACKPRESSURE.inc()
+            return False
+        WRITE_BEHIND_QUEUE_DEPTH.set(self._queue.qsize())
+        self._flush_if_closed()
+        return True
+
+    def put(self, row: dict):
+        """Enqueue a row, blocking while the queue is full.
+
+        After `put_timeout` seconds the row is written synchronously by the
+        caller instead, which applies backpressure without losing the row.
+        A closed buffer writes the row synchronously at once.
+        """
+        if self._closed:
+            self._flush([row])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+            WRITE_BEHIND_QUEUE_DEPTH.set(self._queue.qsize())
+            self._flush_if_closed()
+        except queue.Full:
+            logger.warning("Write-behind queue still full after %.2fs, writing inline",
+                           self.put_timeout)
+            self._flush([row])
+
+    def drain(self, timeout: float = 10.0):
+        """Close the buffer and stop the flusher after writing every queued row.
+
+        Blocks for up to `timeout` seconds; async callers run it in a thread.
+        """
+        with self._start_lock:
+            self._closed = True
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # flush anything enqueued after the thread exited
+        self._flush_pending()
+
+    def _ensure_started(self):
+        # lazily start the flusher, but never restart it once drain has closed the buffer
+        with self._start_lock:
+            if not self._closed:
+                self._start_flusher()
+
+    def _flush_if_closed(self):
+        # a drain that finished while this row was being enqueued would strand it
+        if self._closed and not self.running:
+            self._flush_pending()
+
+    def _flush(self, rows):
+        try:
+            self.flush_fn(rows)
+            WRITE_BEHIND_FLUSH_ROWS.observe(len(rows))
+        except Exception as flush_err:
+            logger.error("Write-behind flush of %d rows failed: %s", len(rows), flush_err)
+        finally:
+            WRITE_BEHIND_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def _take_batch(self, first):
+        rows = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(rows) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                rows.append(self._queue.get(timeout=min(remaining, _POLL_SECONDS)))
+            except queue.Empty:
+                continue
+        return rows
+
+    def _flush_pending(self):
+        while True:
+            rows = []
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not rows:
+                return
+            self._flush(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            self._flush(self._take_batch(first))
+        self._flush_pending()
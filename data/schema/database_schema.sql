@@ -44,23 +44,6 @@ CREATE INDEX IF NOT EXISTS idx_burnout_risk ON burnout_records(burnout_risk);
 CREATE INDEX IF NOT EXISTS idx_burnout_created_at ON burnout_records(created_at);
 CREATE INDEX IF NOT EXISTS idx_burnout_score ON burnout_records(burnout_score);
 
--- Create view for burnout statistics
-CREATE OR REPLACE VIEW burnout_statistics AS
-SELECT 
-    COUNT(*) as total_records,
-    COUNT(DISTINCT user_id) as total_users,
-    AVG(burnout_score) as avg_burnout_score,
-    MAX(burnout_score) as max_burnout_score,
-    MIN(burnout_score) as min_burnout_score,
-    COUNT(CASE WHEN burnout_risk = 'High' THEN 1 END) as high_risk_count,
-    COUNT(CASE WHEN burnout_risk = 'Medium' THEN 1 END) as medium_risk_count,
-    COUNT(CASE WHEN burnout_risk = 'Low' THEN 1 END) as low_risk_count,
-    ROUND(100.0 * COUNT(CASE WHEN burnout_risk = 'High' THEN 1 END) / COUNT(*), 2) as high_risk_percentage,
-    AVG(work_hours) as avg_work_hours,
-    AVG(sleep_hours) as avg_sleep_hours,
-    AVG(task_completion_rate) as avg_task_completion
-FROM burnout_records;
-
 -- New table for API request tracking (stores all features as separate columns)
 CREATE TABLE IF NOT EXISTS user_requests (
     id SERIAL PRIMARY KEY,
@@ -91,7 +74,11 @@ CREATE TABLE IF NOT EXISTS user_requests (
     health_risk_score DECIMAL(5,2),
     after_hours_work_hours_est DECIMAL(5,2),
     high_workload_flag INTEGER,
-    poor_recovery_flag INTEGER
+    poor_recovery_flag INTEGER,
+    -- Prediction outcome (the API adds these to an existing table at startup)
+    model_version VARCHAR NULL,
+    risk_prediction INTEGER NULL,
+    risk_probability FLOAT NULL
 );
 
 -- Create indexes for faster queries
@@ -99,6 +86,196 @@ CREATE INDEX IF NOT EXISTS idx_user_requests_user_id ON user_requests(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_requests_created_at ON user_requests(created_at);
 CREATE INDEX IF NOT EXISTS idx_user_requests_work_hours ON user_requests(work_hours);
 CREATE INDEX IF NOT EXISTS idx_user_requests_health_risk ON user_requests(health_risk_score);
+-- Keyset pagination of /users/{user_id}/history
+CREATE INDEX IF NOT EXISTS idx_user_requests_user_history ON user_requests(user_id, created_at, id);
+
+-- Compact request storage (USER_REQUESTS_STORAGE=compact): raw inputs and the
+-- prediction only. The API creates the user_requests_expanded view over it at
+-- startup (api/compact_storage.py), with every user_requests column recomputed.
+CREATE TABLE IF NOT EXISTS user_requests_compact (
+    id SERIAL PRIMARY KEY,
+    user_id VARCHAR NULL,
+    name VARCHAR NULL,
+    created_at TIMESTAMP,
+    work_hours FLOAT NOT NULL,
+    screen_time_hours FLOAT NOT NULL,
+    meetings_count INTEGER NOT NULL,
+    breaks_taken INTEGER NOT NULL,
+    after_hours_work INTEGER NOT NULL,
+    sleep_hours FLOAT NOT NULL,
+    task_completion_rate FLOAT NOT NULL,
+    is_weekday INTEGER NOT NULL,
+    -- depends on the training medians at write time, so it is stored
+    high_workload_flag INTEGER,
+    model_version VARCHAR NULL,
+    risk_prediction INTEGER NULL,
+    risk_probability FLOAT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_user_requests_compact_user_history
+    ON user_requests_compact(user_id, created_at, id);
+
+-- Rollups of user_requests, updated by the API in the same transaction as each
+-- insert (api/rollups.py); rebuild with scripts/backfill_rollups.py.
+-- *_global and *_day hold one row per shard (ROLLUP_SHARDS), summed on read
+CREATE TABLE IF NOT EXISTS rollup_global (
+    id INTEGER PRIMARY KEY,  -- shard
+    record_count INTEGER NOT NULL DEFAULT 0,
+    work_hours_sum FLOAT NOT NULL DEFAULT 0,
+    sleep_hours_sum FLOAT NOT NULL DEFAULT 0,
+    task_completion_rate_sum FLOAT NOT NULL DEFAULT 0,
+    health_risk_score_sum FLOAT NOT NULL DEFAULT 0,
+    burnout_score_sum FLOAT NOT NULL DEFAULT 0,
+    high_workload_count INTEGER NOT NULL DEFAULT 0,
+    poor_recovery_count INTEGER NOT NULL DEFAULT 0,
+    weekday_count INTEGER NOT NULL DEFAULT 0,
+    -- risk levels: burnout_risk for records, risk_prediction (1 High, 0 Low) for requests
+    high_risk_count INTEGER NOT NULL DEFAULT 0,
+    medium_risk_count INTEGER NOT NULL DEFAULT 0,
+    low_risk_count INTEGER NOT NULL DEFAULT 0,
+    burnout_score_min FLOAT,
+    burnout_score_max FLOAT
+);
+
+CREATE TABLE IF NOT EXISTS rollup_user (
+    user_id VARCHAR PRIMARY KEY,
+    name VARCHAR,  -- from the latest row with a name
+    name_seen TIMESTAMP,  -- created_at of that row
+    first_seen TIMESTAMP,
+    last_seen TIMESTAMP,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    work_hours_sum FLOAT NOT NULL DEFAULT 0,
+    sleep_hours_sum FLOAT NOT NULL DEFAULT 0,
+    task_completion_rate_sum FLOAT NOT NULL DEFAULT 0,
+    health_risk_score_sum FLOAT NOT NULL DEFAULT 0,
+    burnout_score_sum FLOAT NOT NULL DEFAULT 0,
+    high_workload_count INTEGER NOT NULL DEFAULT 0,
+    poor_recovery_count INTEGER NOT NULL DEFAULT 0,
+    weekday_count INTEGER NOT NULL DEFAULT 0,
+    -- risk levels: burnout_risk for records, risk_prediction (1 High, 0 Low) for requests
+    high_risk_count INTEGER NOT NULL DEFAULT 0,
+    medium_risk_count INTEGER NOT NULL DEFAULT 0,
+    low_risk_count INTEGER NOT NULL DEFAULT 0,
+    burnout_score_min FLOAT,
+    burnout_score_max FLOAT
+);
+
+CREATE TABLE IF NOT EXISTS rollup_day (
+    day DATE NOT NULL,
+    shard INTEGER NOT NULL DEFAULT 0,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    work_hours_sum FLOAT NOT NULL DEFAULT 0,
+    sleep_hours_sum FLOAT NOT NULL DEFAULT 0,
+    task_completion_rate_sum FLOAT NOT NULL DEFAULT 0,
+    health_risk_score_sum FLOAT NOT NULL DEFAULT 0,
+    burnout_score_sum FLOAT NOT NULL DEFAULT 0,
+    high_workload_count INTEGER NOT NULL DEFAULT 0,
+    poor_recovery_count INTEGER NOT NULL DEFAULT 0,
+    weekday_count INTEGER NOT NULL DEFAULT 0,
+    -- risk levels: burnout_risk for records, risk_prediction (1 High, 0 Low) for requests
+    high_risk_count INTEGER NOT NULL DEFAULT 0,
+    medium_risk_count INTEGER NOT NULL DEFAULT 0,
+    low_risk_count INTEGER NOT NULL DEFAULT 0,
+    burnout_score_min FLOAT,
+    burnout_score_max FLOAT,
+    PRIMARY KEY (day, shard)
+);
+
+-- The same rollups of burnout_records, updated by scripts/data_ingestion.py
+-- in the same transaction as each load
+CREATE TABLE IF NOT EXISTS record_rollup_global (
+    id INTEGER PRIMARY KEY,  -- shard
+    record_count INTEGER NOT NULL DEFAULT 0,
+    work_hours_sum FLOAT NOT NULL DEFAULT 0,
+    sleep_hours_sum FLOAT NOT NULL DEFAULT 0,
+    task_completion_rate_sum FLOAT NOT NULL DEFAULT 0,
+    health_risk_score_sum FLOAT NOT NULL DEFAULT 0,
+    burnout_score_sum FLOAT NOT NULL DEFAULT 0,
+    high_workload_count INTEGER NOT NULL DEFAULT 0,
+    poor_recovery_count INTEGER NOT NULL DEFAULT 0,
+    weekday_count INTEGER NOT NULL DEFAULT 0,
+    -- risk levels: burnout_risk for records, risk_prediction (1 High, 0 Low) for requests
+    high_risk_count INTEGER NOT NULL DEFAULT 0,
+    medium_risk_count INTEGER NOT NULL DEFAULT 0,
+    low_risk_count INTEGER NOT NULL DEFAULT 0,
+    burnout_score_min FLOAT,
+    burnout_score_max FLOAT
+);
+
+CREATE TABLE IF NOT EXISTS record_rollup_user (
+    user_id VARCHAR PRIMARY KEY,
+    name VARCHAR,  -- from the latest row with a name
+    name_seen TIMESTAMP,  -- created_at of that row
+    first_seen TIMESTAMP,
+    last_seen TIMESTAMP,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    work_hours_sum FLOAT NOT NULL DEFAULT 0,
+    sleep_hours_sum FLOAT NOT NULL DEFAULT 0,
+    task_completion_rate_sum FLOAT NOT NULL DEFAULT 0,
+    health_risk_score_sum FLOAT NOT NULL DEFAULT 0,
+    burnout_score_sum FLOAT NOT NULL DEFAULT 0,
+    high_workload_count INTEGER NOT NULL DEFAULT 0,
+    poor_recovery_count INTEGER NOT NULL DEFAULT 0,
+    weekday_count INTEGER NOT NULL DEFAULT 0,
+    -- risk levels: burnout_risk for records, risk_prediction (1 High, 0 Low) for requests
+    high_risk_count INTEGER NOT NULL DEFAULT 0,
+    medium_risk_count INTEGER NOT NULL DEFAULT 0,
+    low_risk_count INTEGER NOT NULL DEFAULT 0,
+    burnout_score_min FLOAT,
+    burnout_score_max FLOAT
+);
+
+CREATE TABLE IF NOT EXISTS record_rollup_day (
+    day DATE NOT NULL,
+    shard INTEGER NOT NULL DEFAULT 0,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    work_hours_sum FLOAT NOT NULL DEFAULT 0,
+    sleep_hours_sum FLOAT NOT NULL DEFAULT 0,
+    task_completion_rate_sum FLOAT NOT NULL DEFAULT 0,
+    health_risk_score_sum FLOAT NOT NULL DEFAULT 0,
+    burnout_score_sum FLOAT NOT NULL DEFAULT 0,
+    high_workload_count INTEGER NOT NULL DEFAULT 0,
+    poor_recovery_count INTEGER NOT NULL DEFAULT 0,
+    weekday_count INTEGER NOT NULL DEFAULT 0,
+    -- risk levels: burnout_risk for records, risk_prediction (1 High, 0 Low) for requests
+    high_risk_count INTEGER NOT NULL DEFAULT 0,
+    medium_risk_count INTEGER NOT NULL DEFAULT 0,
+    low_risk_count INTEGER NOT NULL DEFAULT 0,
+    burnout_score_min FLOAT,
+    burnout_score_max FLOAT,
+    PRIMARY KEY (day, shard)
+);
+
+-- Summary statistics of burnout_records, read from its rollups rather than
+-- scanning the table (the API and data_ingestion.py recreate it from
+-- api/rollups.py; dropped first because its column types changed)
+DROP VIEW IF EXISTS burnout_statistics;
+CREATE VIEW burnout_statistics AS
+SELECT
+    g.record_count as total_records,
+    (SELECT COUNT(*) FROM record_rollup_user) as total_users,
+    g.burnout_score_sum / NULLIF(g.record_count, 0) as avg_burnout_score,
+    g.burnout_score_max as max_burnout_score,
+    g.burnout_score_min as min_burnout_score,
+    g.high_risk_count,
+    g.medium_risk_count,
+    g.low_risk_count,
+    ROUND(100.0 * g.high_risk_count / NULLIF(g.record_count, 0), 2) as high_risk_percentage,
+    g.work_hours_sum / NULLIF(g.record_count, 0) as avg_work_hours,
+    g.sleep_hours_sum / NULLIF(g.record_count, 0) as avg_sleep_hours,
+    g.task_completion_rate_sum / NULLIF(g.record_count, 0) as avg_task_completion
+FROM (
+    SELECT COALESCE(SUM(record_count), 0) as record_count,
+           COALESCE(SUM(burnout_score_sum), 0) as burnout_score_sum,
+           MAX(burnout_score_max) as burnout_score_max,
+           MIN(burnout_score_min) as burnout_score_min,
+           COALESCE(SUM(high_risk_count), 0) as high_risk_count,
+           COALESCE(SUM(medium_risk_count), 0) as medium_risk_count,
+           COALESCE(SUM(low_risk_count), 0) as low_risk_count,
+           COALESCE(SUM(work_hours_sum), 0) as work_hours_sum,
+           COALESCE(SUM(sleep_hours_sum), 0) as sleep_hours_sum,
+           COALESCE(SUM(task_completion_rate_sum), 0) as task_completion_rate_sum
+    FROM record_rollup_global
+) g;
 
 -- Sample queries for the new table
 -- SELECT * FROM user_requests ORDER BY created_at DESC LIMIT 10;
@@ -109,13 +286,12 @@ CREATE INDEX IF NOT EXISTS idx_user_requests_health_risk ON user_requests(health
 -- WHERE health_risk_score > 50 OR recovery_index < 0
 -- ORDER BY created_at DESC;
 
--- Get average metrics by user
+-- Get average metrics by user (from the rollup, no scan of user_requests)
 -- SELECT user_id, name,
---        AVG(work_hours) as avg_work_hours,
---        AVG(sleep_hours) as avg_sleep_hours,
---        AVG(health_risk_score) as avg_health_risk
--- FROM user_requests
--- GROUP BY user_id, name
+--        work_hours_sum / record_count as avg_work_hours,
+--        sleep_hours_sum / record_count as avg_sleep_hours,
+--        health_risk_score_sum / record_count as avg_health_risk
+-- FROM rollup_user
 -- ORDER BY avg_health_risk DESC;
 
 -- Sample SELECT queries
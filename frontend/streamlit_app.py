@@ -2,11 +2,14 @@
 #!/usr/bin/env python3
 """Advanced Streamlit Dashboard for Burnout Risk Prediction"""
 import os
+import sys
 from datetime import datetime
 import streamlit as st
 import requests
 import pandas as pd
-import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from api.features import compute_features  # noqa: E402
 
 st.set_page_config(
     page_title="Burnout Risk Analyzer",
@@ -116,30 +119,18 @@ with tab1:
         median_hours = 8
         median_meetings = 3
 
-    # Calculate derived metrics
-    work_intensity = screen_time / (work_hours + 0.1)
-    meeting_burden = meetings / (work_hours + 0.1)
-    break_adequacy = breaks / (work_hours + 0.1)
-    sleep_deficit = 8 - sleep_hours
-    recovery_index = (sleep_hours + breaks) - screen_time
-    after_hours_num = int(after_hours)
-    workload_pressure = work_hours + (meetings * 0.25) + after_hours_num
-    task_efficiency = task_completion / (work_hours + 0.1)
-    work_life_balance_score = np.clip(
-        ((sleep_hours / 8) * 30 + (breaks / 5) * 30 - (work_hours / 10) * 20 - after_hours_num * 10) * 2,
-        0, 100
-    )
-    fatigue_risk = screen_time - (sleep_hours * 1.5)
-    high_workload_flag = int((work_hours > median_hours) and (meetings > median_meetings))
-    poor_recovery_flag = int((sleep_hours < 6) and (recovery_index < 0))
-    after_hours_work_hours_est = after_hours_num * (work_hours * 0.1)
-    is_weekday = 1 if day_type == 'Weekday' else 0
-    screen_time_per_meeting = screen_time / (meetings + 0.1)
-    work_hours_productivity = task_completion * (1 - (work_hours / 15))
-    health_risk_score = np.clip(
-        (1 - (sleep_hours / 8)) * 40 + max(0, fatigue_risk) * 10,
-        0, 100
-    )
+    # Calculate derived metrics with the same formulas the API uses
+    features = compute_features({
+        'work_hours': work_hours, 'screen_time_hours': screen_time,
+        'meetings_count': meetings, 'breaks_taken': breaks,
+        'after_hours_work': int(after_hours), 'sleep_hours': sleep_hours,
+        'task_completion_rate': task_completion,
+        'is_weekday': 1 if day_type == 'Weekday' else 0,
+    }, median_hours, median_meetings)
+    work_intensity = features['work_intensity_ratio']
+    meeting_burden = features['meeting_burden']
+    sleep_deficit = features['sleep_deficit']
+    recovery_index = features['recovery_index']
 
     # Display metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -158,11 +149,13 @@ with tab1:
             'Screen Time/Meeting', 'Work Hours Productivity', 'Health Risk Score'
         ],
         'Value': [
-            float(work_intensity), float(meeting_burden), float(break_adequacy), float(sleep_deficit),
-            float(recovery_index), float(workload_pressure), float(task_efficiency),
-            float(work_life_balance_score), float(fatigue_risk), float(high_workload_flag),
-            float(poor_recovery_flag), float(after_hours_work_hours_est), float(is_weekday),
-            float(screen_time_per_meeting), float(work_hours_productivity), float(health_risk_score)
+            float(features[key]) for key in (
+                'work_intensity_ratio', 'meeting_burden', 'break_adequacy', 'sleep_deficit',
+                'recovery_index', 'workload_pressure', 'task_efficiency',
+                'work_life_balance_score', 'fatigue_risk', 'high_workload_flag',
+                'poor_recovery_flag', 'after_hours_work_hours_est', 'is_weekday',
+                'screen_time_per_meeting', 'work_hours_productivity', 'health_risk_score'
+            )
         ]
     })
     st.dataframe(derived_metrics.set_index('Metric').round(2))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Build the global/per-user/per-day rollups from existing rows.
+
+Rebuilds the `user_requests` rollups and the `burnout_records` rollups
+behind the `burnout_statistics` view, for whichever of the two tables exist.  Run once after
+enabling rollups on a database that already holds requests, or whenever the
+rollups are suspected to have drifted:
+
+    python scripts/backfill_rollups.py
+    python scripts/backfill_rollups.py --database-url postgresql://...
+
+Each rebuild replaces the rollup contents in a single transaction, so /stats
+keeps answering from the old rollups until it commits.  On Postgres it holds
+a SHARE lock on the source table throughout, so every insert (and any request
+waiting on one) stalls until the rebuild finishes; run it off-peak.
+"""
+import argparse
+import logging
+import os
+import sys
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import MetaData, Table, inspect
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from api import rollups  # noqa: E402
+from api.storage import dispose_engines, get_engine, sync_url  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger('backfill_rollups')
+
+
+def main(argv: Optional[List[str]] = None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv('DATABASE_URL'), help="defaults to $DATABASE_URL")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("no database URL given and DATABASE_URL is not set")
+
+    # the view in compact storage mode (USER_REQUESTS_STORAGE=compact), which has the derived metrics
+    from api.main import REQUESTS_READ
+    engine = get_engine(sync_url(args.database_url))
+    try:
+        rollups.create_schema(engine)
+        inspector = inspect(engine)
+        counts = {}
+        if inspector.has_table(REQUESTS_READ.name):
+            counts.update(rollups.rebuild_rollups(engine, REQUESTS_READ))
+        if inspector.has_table(rollups.RECORDS_TABLE):
+            records = Table(rollups.RECORDS_TABLE, MetaData(), autoload_with=engine)
+            counts.update(rollups.rebuild_rollups(engine, records, rollups.RECORD_ROLLUPS))
+    finally:
+        dispose_engines()
+    for table, rows in counts.items():
+        print(f"{table}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Microbenchmark each stage of the prediction hot path in isolation.
+
+Every stage runs at batch sizes 1, 64 and 4096 (configurable) on records
+sampled from the dataset; results are written per commit to
+`benchmarks/hotpath/<commit>.json` so runs can be compared over time:
+
+    python scripts/benchmark_hotpath.py
+    python scripts/benchmark_hotpath.py --baseline benchmarks/hotpath/<older commit>.json
+
+Size 1 uses the single-record code paths of /predict, larger sizes the
+columnar paths of /predict/batch.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+STAGES = (
+    'validation', 'feature_engineering', 'scaler_transform', 'predict_proba',
+    'compiled_predict', 'insert_build', 'serialization'
+)
+
+
+def _git_commit() -> str:
+    """Short HEAD hash, suffixed with `-dirty` when the tree has local changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=PROJECT_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f"{commit}-dirty" if dirty else commit
+
+
+def load_records(path: str, count: int, seed: int = 42) -> List[dict]:
+    """`count` raw /predict bodies sampled (with replacement) from the dataset"""
+    with open(path, encoding='utf-8', newline='') as data_file:
+        rows = list(csv.DictReader(data_file))
+    rng = random.Random(seed)
+    records = []
+    for index in range(count):
+        row = rng.choice(rows)
+        records.append({
+            'user_id': f"bench-{index}",
+            'work_hours': float(row['work_hours']),
+            'screen_time_hours': float(row['screen_time_hours']),
+            'meetings_count': int(row['meetings_count']),
+            'breaks_taken': int(row['breaks_taken']),
+            'after_hours_work': int(row['after_hours_work']),
+            'sleep_hours': float(row['sleep_hours']),
+            'task_completion_rate': min(float(row['task_completion_rate']), 100.0),
+            'day_type': row['day_type'],
+        })
+    return records
+
+
+def time_call(fn: Callable[[], object], repeat: int, min_seconds: float) -> Dict[str, float]:
+    """Best and median seconds per call over `repeat` timed runs"""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    while elapsed < min_seconds:
+        number *= 2
+        elapsed = timer.timeit(number)
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {'best_s': min(runs), 'median_s': statistics.median(runs), 'loops': number}
+
+
+def build_stages(api_main, bundle, raw: List[dict]) -> Dict[str, Callable[[], object]]:
+    """Zero-argument callables for every hot-path stage at `len(raw)` records"""
+    created_at = datetime.now()
+    timestamp = created_at.isoformat()
+    records = [api_main.UserData(**item) for item in raw]
+    single = len(raw) == 1
+
+    if single:
+        matrix, all_features = api_main.engineer_features(records[0])
+    else:
+        matrix, all_columns = api_main.engineer_feature_columns(api_main.records_to_columns(records))
+    scaled = bundle.scaler.transform(matrix)
+    labels, probabilities = api_main._score_matrix(matrix, bundle)
+
+    stages = {
+        'scaler_transform': lambda: bundle.scaler.transform(matrix),
+        'predict_proba': lambda: bundle.model.predict_proba(scaled),
+    }
+    if bundle.compiled is not None:
+        stages['compiled_predict'] = lambda: bundle.compiled.predict_with_proba(scaled)
+
+    if single:
+        features = {k: float(v) for k, v in all_features.items()}
+        stages.update({
+            'validation': lambda: api_main.UserData(**raw[0]),
+            'feature_engineering': lambda: api_main.engineer_features(records[0]),
+            'insert_build': lambda: (
+                api_main.REQUESTS_TABLE.insert(),
+                api_main._build_request_row(all_features, records[0].user_id, None, created_at,
+                                            labels[0], probabilities[0], bundle.version),
+            ),
+            'serialization': lambda: api_main.BurnoutPrediction(
+                risk_level="High" if labels[0] == 1 else "Low",
+                risk_probability=float(probabilities[0]), timestamp=timestamp,
+                model_version=bundle.version, features=features,
+            ).model_dump_json(),
+        })
+    else:
+        stages.update({
+            'validation': lambda: api_main.BatchUserData(records=raw),
+            'feature_engineering': lambda: api_main.engineer_feature_columns(
+                api_main.records_to_columns(records)
+            ),
+            'insert_build': lambda: (
+                api_main.REQUESTS_TABLE.insert(),
+                api_main._build_request_rows(all_columns, records, created_at, labels, probabilities, bundle.version),
+            ),
+            'serialization': lambda: api_main.BatchPrediction(
+                count=len(records), high_risk_count=int(labels.sum()), timestamp=timestamp,
+                model_version=bundle.version,
+                predictions=[
+                    api_main.BatchPredictionItem(
+                        user_id=record.user_id, name=record.name,
+                        risk_level="High" if label == 1 else "Low", risk_probability=probability,
+                    )
+                    for record, label, probability in zip(records, labels.tolist(), probabilities.tolist())
+                ],
+            ).model_dump_json(),
+        })
+    return stages
+
+
+def run(args) -> dict:
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    os.environ['ENABLE_WANDB'] = 'false'
+    import api.main as api_main
+    from api.model_bundle import load_bundle
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('api').setLevel(logging.WARNING)
+
+    api_main._load_medians()
+    bundle = load_bundle(args.model, args.preprocessor, args.feature_names,
+                         api_main.MODEL_FEATURES, backend='compiled')
+    results: Dict[str, Dict[str, dict]] = {}
+    for size in args.sizes:
+        stages = build_stages(api_main, bundle, load_records(args.data, size))
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            timing = time_call(stages[stage], args.repeat, args.min_time)
+            timing['per_row_us'] = timing['median_s'] / size * 1e6
+            results.setdefault(stage, {})[str(size)] = timing
+            print(f"  {stage:<20} n={size:<5} median={timing['median_s'] * 1e6:11.1f}us "
+                  f"best={timing['best_s'] * 1e6:11.1f}us  per row={timing['per_row_us']:8.2f}us")
+
+    import numpy
+    import sklearn
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'sklearn': sklearn.__version__,
+            'model_version': bundle.version,
+            'sizes': args.sizes,
+        },
+        'stages': results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """Stage/size pairs whose median time grew by more than `threshold` (a fraction)"""
+    regressions = []
+    for stage, sizes in baseline.get('stages', {}).items():
+        for size, before in sizes.items():
+            after = current.get('stages', {}).get(stage, {}).get(size)
+            if after is None or before['median_s'] <= 0:
+                continue
+            ratio = after['median_s'] / before['median_s']
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{stage} n={size}: {before['median_s'] * 1e6:.1f}us -> "
+                    f"{after['median_s'] * 1e6:.1f}us (+{(ratio - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1, 64, 4096], help="batch sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage and size")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timed run")
+    parser.add_argument("--data", default=os.path.join(PROJECT_ROOT, 'data', 'work_from_home_burnout_dataset.csv'))
+    parser.add_argument("--model", default=os.getenv('MODEL_PATH', 'models/best_model.joblib'))
+    parser.add_argument("--preprocessor", default=os.getenv('PREPROCESSOR_PATH', 'models/preprocessor.joblib'))
+    parser.add_argument("--feature-names", default=os.getenv('FEATURE_NAMES_PATH', 'models/feature_names.joblib'))
+    parser.add_argument("--output-dir", default=os.path.join(PROJECT_ROOT, 'benchmarks', 'hotpath'),
+                        help="results are written to <output-dir>/<commit>.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed median growth (fraction)")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+    output = os.path.join(args.output_dir, f"{result['meta']['commit']}.json")
+    with open(output, 'w', encoding='utf-8') as out:
+        json.dump(result, out, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = compare_results(json.load(baseline_file), result, args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%} against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
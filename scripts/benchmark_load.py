@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Load-test the API under uvicorn and compare latency against a saved baseline.
+
+`run` starts the app locally on SQLite and drives each endpoint at every
+concurrency level (closed loop: each worker sends its next request as soon
+as the previous one returns) and every `--rps` level (open loop: requests
+start on a fixed schedule, latency counted from the scheduled start so a
+stalled server is not hidden).  Results go to a JSON file; `compare` exits
+non-zero when a scenario regressed beyond the threshold.
+
+    python scripts/benchmark_load.py run --output benchmarks/load_baseline.json
+    python scripts/benchmark_load.py run --output /tmp/load.json --baseline benchmarks/load_baseline.json
+    python scripts/benchmark_load.py compare benchmarks/load_baseline.json /tmp/load.json
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# endpoint name -> (method, path)
+ENDPOINTS = {
+    'predict': ('POST', '/predict'),
+    'health': ('GET', '/health'),
+    'metrics': ('GET', '/metrics'),
+}
+# latency statistics checked by `compare`
+COMPARED_STATS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """Latency percentiles (ms), throughput and error rate for one scenario"""
+    ordered = sorted(latencies)
+    total = len(ordered)
+    return {
+        'requests': total,
+        'errors': errors,
+        'error_rate': errors / total if total else 0.0,
+        'throughput_rps': total / elapsed if elapsed else 0.0,
+        'mean_ms': sum(ordered) / total * 1000 if total else 0.0,
+        'p50_ms': percentile(ordered, 50) * 1000,
+        'p95_ms': percentile(ordered, 95) * 1000,
+        'p99_ms': percentile(ordered, 99) * 1000,
+        'max_ms': ordered[-1] * 1000 if total else 0.0,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float,
+                    max_error_rate_increase: float = 0.01) -> List[str]:
+    """Regressions of `current` against `baseline`, as human-readable lines.
+
+    A latency statistic regresses when it grew by more than `threshold`
+    (a fraction); the error rate when it grew by more than
+    `max_error_rate_increase` (absolute).  Scenarios missing from either
+    file are ignored.
+    """
+    regressions = []
+    for name, before in baseline.get('scenarios', {}).items():
+        after = current.get('scenarios', {}).get(name)
+        if after is None:
+            continue
+        for stat in COMPARED_STATS:
+            if before[stat] > 0 and after[stat] > before[stat] * (1 + threshold):
+                regressions.append(
+                    f"{name}: {stat} {before[stat]:.2f} -> {after[stat]:.2f} "
+                    f"(+{(after[stat] / before[stat] - 1) * 100:.0f}%)"
+                )
+        if after['error_rate'] > before['error_rate'] + max_error_rate_increase:
+            regressions.append(
+                f"{name}: error_rate {before['error_rate']:.2%} -> {after['error_rate']:.2%}"
+            )
+    return regressions
+
+
+def load_payloads(path: str, count: int, seed: int = 42) -> List[dict]:
+    """Sample `/predict` bodies from the dataset so responses are not all cache hits"""
+    with open(path, encoding='utf-8', newline='') as data_file:
+        rows = list(csv.DictReader(data_file))
+    random.Random(seed).shuffle(rows)
+    payloads = []
+    for index, row in enumerate(rows[:count]):
+        payloads.append({
+            'user_id': f"load-{index}",
+            'work_hours': float(row['work_hours']),
+            'screen_time_hours': float(row['screen_time_hours']),
+            'meetings_count': int(row['meetings_count']),
+            'breaks_taken': int(row['breaks_taken']),
+            'after_hours_work': int(row['after_hours_work']),
+            'sleep_hours': float(row['sleep_hours']),
+            'task_completion_rate': min(float(row['task_completion_rate']), 100.0),
+            'day_type': row['day_type'],
+        })
+    return payloads
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, payloads: List[dict], index: int) -> bool:
+    method, path = ENDPOINTS[endpoint]
+    try:
+        if method == 'POST':
+            response = await client.post(path, json=payloads[index % len(payloads)])
+        else:
+            response = await client.get(path)
+    except httpx.HTTPError:
+        return False
+    return response.status_code < 400
+
+
+async def run_closed_loop(client, endpoint: str, payloads: List[dict], concurrency: int,
+                          duration: float) -> Dict[str, float]:
+    """`concurrency` workers sending back-to-back requests for `duration` seconds"""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(sys.maxsize))
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            sent = time.perf_counter()
+            ok = await _send(client, endpoint, payloads, next(counter))
+            latencies.append(time.perf_counter() - sent)
+            errors += not ok
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_open_loop(client, endpoint: str, payloads: List[dict], rps: float, concurrency: int,
+                        duration: float) -> Dict[str, float]:
+    """Start requests at a fixed `rps`, with at most `concurrency` in flight.
+
+    Latency runs from each request's scheduled start, so queueing behind a
+    slow server (or the concurrency cap) counts against the result.
+    """
+    latencies: List[float] = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    total = int(rps * duration)
+
+    async def one(index: int, scheduled: float):
+        nonlocal errors
+        async with slots:
+            ok = await _send(client, endpoint, payloads, index)
+        latencies.append(time.perf_counter() - scheduled)
+        errors += not ok
+
+    tasks = []
+    for index in range(total):
+        scheduled = started + index / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(index, scheduled)))
+    await asyncio.gather(*tasks)
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, env: Dict[str, str], workers: int, log_file) -> subprocess.Popen:
+    """Start uvicorn on `port` in a subprocess, logging to `log_file`"""
+    command = [
+        sys.executable, '-m', 'uvicorn', 'api.main:app', '--host', '127.0.0.1',
+        '--port', str(port), '--log-level', 'warning', '--workers', str(workers),
+    ]
+    return subprocess.Popen(command, cwd=PROJECT_ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 60.0):
+    """Poll /ready until the app finished startup"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited during startup (code {server.returncode})")
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server not ready after {timeout:.0f}s")
+
+
+async def run_scenarios(base_url: str, args, payloads: List[dict]) -> Dict[str, dict]:
+    """Run every endpoint x load level; keys look like `predict c=8` or `predict rps=200`"""
+    scenarios = {}
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        for endpoint in args.endpoints:
+            if args.warmup > 0:
+                await run_closed_loop(client, endpoint, payloads, max(args.concurrency), args.warmup)
+            for concurrency in args.concurrency:
+                name = f"{endpoint} c={concurrency}"
+                scenarios[name] = await run_closed_loop(client, endpoint, payloads, concurrency, args.duration)
+                _print_scenario(name, scenarios[name])
+            for rps in args.rps:
+                name = f"{endpoint} rps={rps:g}"
+                scenarios[name] = await run_open_loop(
+                    client, endpoint, payloads, rps, max(args.concurrency), args.duration
+                )
+                _print_scenario(name, scenarios[name])
+    return scenarios
+
+
+def _print_scenario(name: str, stats: Dict[str, float]):
+    print(f"  {name:<22} {stats['throughput_rps']:8.1f} req/s  p50={stats['p50_ms']:7.2f}ms "
+          f"p95={stats['p95_ms']:7.2f}ms p99={stats['p99_ms']:7.2f}ms  errors={stats['error_rate']:.2%}")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _report_regressions(baseline_path: str, current: dict, threshold: float) -> int:
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare_results(baseline, current, threshold)
+    if regressions:
+        print(f"Regressions beyond {threshold:.0%} against {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"No regressions beyond {threshold:.0%} against {baseline_path}")
+    return 0
+
+
+def cmd_run(args) -> int:
+    payloads = load_payloads(args.data, args.payloads)
+    port = args.port or _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ, ENABLE_WANDB='false',
+                   DATABASE_URL=args.database_url or f"sqlite:///{tmp_dir}/load_benchmark.db")
+        env.update(item.split('=', 1) for item in args.server_env)
+        log_path = os.path.join(tmp_dir, 'server.log')
+        with open(log_path, 'w', encoding='utf-8') as log_file:
+            server = start_server(port, env, args.workers, log_file)
+            try:
+                wait_ready(base_url, server)
+                print(f"Load test against {base_url} ({args.duration:g}s per scenario)")
+                scenarios = asyncio.run(run_scenarios(base_url, args, payloads))
+            except BaseException:
+                with open(log_path, encoding='utf-8') as server_log:
+                    print("Server log tail:\n" + ''.join(server_log.readlines()[-20:]), file=sys.stderr)
+                raise
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+    result = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'workers': args.workers,
+            'duration_s': args.duration,
+            'server_env': args.server_env,
+        },
+        'scenarios': scenarios,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as out:
+            json.dump(result, out, indent=2)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        return _report_regressions(args.baseline, result, args.threshold)
+    return 0
+
+
+def cmd_compare(args) -> int:
+    with open(args.current, encoding='utf-8') as current_file:
+        current = json.load(current_file)
+    return _report_regressions(args.baseline, current, args.threshold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="start the app and run the load scenarios")
+    run.add_argument("--endpoints", nargs='+', choices=sorted(ENDPOINTS), default=['predict', 'health', 'metrics'])
+    run.add_argument("--concurrency", type=int, nargs='+', default=[1, 8, 32],
+                     help="closed-loop concurrency levels (the largest also caps open-loop runs)")
+    run.add_argument("--rps", type=float, nargs='*', default=[], help="open-loop request rates")
+    run.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    run.add_argument("--warmup", type=float, default=2.0, help="seconds of unrecorded load per endpoint")
+    run.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    run.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    run.add_argument("--port", type=int, help="port to serve on (default: a free port)")
+    run.add_argument("--database-url", help="default: a throwaway SQLite file")
+    run.add_argument("--server-env", action='append', default=[], metavar='KEY=VALUE',
+                     help="extra environment for the server, e.g. MICROBATCH_ENABLED=true")
+    run.add_argument("--data", default=os.path.join(PROJECT_ROOT, 'data', 'work_from_home_burnout_dataset.csv'))
+    run.add_argument("--payloads", type=int, default=512, help="distinct /predict bodies to cycle through")
+    run.add_argument("--output", help="path to write the JSON results")
+    run.add_argument("--baseline", help="compare against this JSON file after the run")
+    run.add_argument("--threshold", type=float, default=0.15, help="allowed latency growth (fraction)")
+    run.set_defaults(handler=cmd_run)
+
+    compare = commands.add_parser('compare', help="compare two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.15, help="allowed latency growth (fraction)")
+    compare.set_defaults(handler=cmd_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
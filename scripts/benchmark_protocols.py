@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Compare the server-side cost of the JSON and MessagePack columnar scoring paths.
+
+For every batch size the same records are encoded once per protocol, then the
+handler work is timed from request bytes to response bytes:
+
+- `json_batch`: `json.loads`, `BatchUserData` validation, column extraction,
+  features, scoring and `BatchPrediction` serialization (/predict/batch);
+- `columnar`: MessagePack decoding, vectorized validation, features, scoring
+  and encoding (/predict/columnar);
+- `json_predict` (size 1 only): a single /predict, which also echoes the
+  feature dict.
+
+Database writes and HTTP framing are excluded; they are the same for both.
+
+    python scripts/benchmark_protocols.py
+    python scripts/benchmark_protocols.py --sizes 1 64 4096 16384
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmark_hotpath import _git_commit, load_records, time_call  # noqa: E402
+
+PROTOCOLS = ('json_batch', 'columnar', 'json_predict')
+
+
+def build_protocols(api_main, bundle, raw: List[dict]) -> Dict[str, tuple]:
+    """`{protocol: (handler, request_bytes)}`; each handler returns the response bytes"""
+    from api import columnar
+
+    def json_batch(body: bytes) -> bytes:
+        batch = api_main.BatchUserData.model_validate(json.loads(body))
+        matrix, _ = api_main.engineer_feature_columns(api_main.records_to_columns(batch.records))
+        labels, probabilities = api_main._score_matrix(matrix, bundle)
+        return api_main.BatchPrediction(
+            count=len(batch.records), high_risk_count=int(labels.sum()),
+            timestamp=datetime.now().isoformat(), model_version=bundle.version,
+            predictions=[
+                api_main.BatchPredictionItem(
+                    user_id=record.user_id, name=record.name,
+                    risk_level="High" if label == 1 else "Low", risk_probability=probability,
+                )
+                for record, label, probability in zip(batch.records, labels.tolist(), probabilities.tolist())
+            ],
+        ).model_dump_json().encode()
+
+    def columnar_batch(body: bytes) -> bytes:
+        columns, _, _ = columnar.decode_request(
+            body, api_main.COLUMNAR_BOUNDS, api_main.COLUMNAR_INT_COLUMNS, len(raw)
+        )
+        matrix, _ = api_main.engineer_feature_columns(columns)
+        labels, probabilities = api_main._score_matrix(matrix, bundle)
+        return columnar.encode_response(labels, probabilities, bundle.version, datetime.now().isoformat())
+
+    def json_predict(body: bytes) -> bytes:
+        record = api_main.UserData.model_validate(json.loads(body))
+        matrix, features = api_main.engineer_features(record)
+        labels, probabilities = api_main._score_matrix(matrix, bundle)
+        return api_main.BurnoutPrediction(
+            risk_level="High" if labels[0] == 1 else "Low", risk_probability=float(probabilities[0]),
+            timestamp=datetime.now().isoformat(), model_version=bundle.version,
+            features={key: float(value) for key, value in features.items()},
+        ).model_dump_json().encode()
+
+    columns = {name: [item[name] for item in raw] for name in columnar.NUMERIC_INPUTS}
+    columns['day_type'] = [item['day_type'] for item in raw]
+    protocols = {
+        'json_batch': (json_batch, json.dumps({'records': raw}).encode()),
+        'columnar': (columnar_batch, columnar.encode_request(columns, [item['user_id'] for item in raw])),
+    }
+    if len(raw) == 1:
+        protocols['json_predict'] = (json_predict, json.dumps(raw[0]).encode())
+    return protocols
+
+
+def run(args) -> dict:
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    os.environ['ENABLE_WANDB'] = 'false'
+    import api.main as api_main
+    from api import columnar
+    from api.model_bundle import load_bundle
+    if not columnar.available():
+        raise SystemExit("The columnar protocol requires msgpack (pip install msgpack)")
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('api').setLevel(logging.WARNING)
+
+    api_main._load_medians()
+    bundle = load_bundle(args.model, args.preprocessor, args.feature_names,
+                         api_main.MODEL_FEATURES, backend=args.backend)
+    results: Dict[str, Dict[str, dict]] = {}
+    for size in args.sizes:
+        protocols = build_protocols(api_main, bundle, load_records(args.data, size))
+        for name in PROTOCOLS:
+            if name not in protocols:
+                continue
+            handler, body = protocols[name]
+            response = functools.partial(handler, body)
+            timing = time_call(response, args.repeat, args.min_time)
+            timing.update(
+                per_row_us=timing['median_s'] / size * 1e6,
+                request_bytes=len(body), response_bytes=len(response()),
+            )
+            results.setdefault(name, {})[str(size)] = timing
+        baseline = results['json_batch'][str(size)]['median_s']
+        for name in PROTOCOLS:
+            timing = results.get(name, {}).get(str(size))
+            if timing is None:
+                continue
+            print(f"  {name:<13} n={size:<6} median={timing['median_s'] * 1e6:11.1f}us "
+                  f"per row={timing['per_row_us']:8.2f}us  x{baseline / timing['median_s']:5.2f} vs json_batch  "
+                  f"in={timing['request_bytes']:>9}B out={timing['response_bytes']:>9}B")
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'model_version': bundle.version,
+            'backend': args.backend,
+            'sizes': args.sizes,
+        },
+        'protocols': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1, 64, 4096], help="batch sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per protocol and size")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timed run")
+    parser.add_argument("--backend", default=os.getenv('INFERENCE_BACKEND', 'sklearn'),
+                        help="model backend used for scoring (same for both protocols)")
+    parser.add_argument("--data", default=os.path.join(PROJECT_ROOT, 'data', 'work_from_home_burnout_dataset.csv'))
+    parser.add_argument("--model", default=os.getenv('MODEL_PATH', 'models/best_model.joblib'))
+    parser.add_argument("--preprocessor", default=os.getenv('PREPROCESSOR_PATH', 'models/preprocessor.joblib'))
+    parser.add_argument("--feature-names", default=os.getenv('FEATURE_NAMES_PATH', 'models/feature_names.joblib'))
+    parser.add_argument("--output-dir", default=os.path.join(PROJECT_ROOT, 'benchmarks', 'protocols'),
+                        help="results are written to <output-dir>/<commit>.json")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+    output = os.path.join(args.output_dir, f"{result['meta']['commit']}.json")
+    with open(output, 'w', encoding='utf-8') as out:
+        json.dump(result, out, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
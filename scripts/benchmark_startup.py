@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark API cold-start time: module import and lifespan startup until ready"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# measured in a fresh interpreter so every run is a real cold start
+_PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import api.main as m
+t1 = time.perf_counter()
+
+async def start():
+    async with m.app.router.lifespan_context(m.app):
+        return time.perf_counter(), m.READY.is_set()
+
+t2, ready = asyncio.run(start())
+print(json.dumps({"import_s": t1 - t0, "startup_s": t2 - t1, "total_s": t2 - t0, "ready": ready}))
+"""
+
+
+def run_once(env):
+    """Start the app once in a subprocess and return its timings"""
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=PROJECT_ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="number of cold starts")
+    parser.add_argument("--database-url", default="sqlite:///./startup_benchmark.db")
+    parser.add_argument("--json", dest="json_path", help="optional path to write results")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DATABASE_URL=args.database_url, ENABLE_WANDB="false")
+    results = [run_once(env) for _ in range(args.runs)]
+
+    print(f"Cold starts: {args.runs}")
+    summary = {}
+    for key in ("import_s", "startup_s", "total_s"):
+        values = [r[key] for r in results]
+        summary[key] = {"median": statistics.median(values), "min": min(values), "max": max(values)}
+        print(f"  {key:<10} median={summary[key]['median']:.3f}s "
+              f"min={summary[key]['min']:.3f}s max={summary[key]['max']:.3f}s")
+    print(f"  ready after startup: {all(r['ready'] for r in results)}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out:
+            json.dump({"runs": results, "summary": summary}, out, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
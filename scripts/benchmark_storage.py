@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Compare write throughput and on-disk size of the wide and compact `user_requests` storage.
+
+For each mode a fresh SQLite database (tuned like the API's: WAL,
+synchronous=NORMAL) gets the same rows, built by the API's row builders:
+
+- `single`: one row per transaction, as /predict writes them;
+- `bulk`: `--batch-size` rows per executemany, as /predict/batch and the
+  write-behind flusher write them.
+
+Reported per mode: rows/s for both, bytes of WAL written (checkpoints are
+held off until the end), and table/index bytes after a final checkpoint
+from SQLite's `dbstat`.  Rollup maintenance is excluded; it is the same in
+both modes.
+
+    python scripts/benchmark_storage.py
+    python scripts/benchmark_storage.py --rows 200000 --single-rows 5000
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import event, text
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmark_hotpath import _git_commit, load_records  # noqa: E402
+
+MODES = ('wide', 'compact')
+
+
+def build_rows(api_main, raw: List[dict]) -> List[dict]:
+    """Request rows for `raw` as the API builds them, with a synthetic prediction"""
+    records = [api_main.UserData(**item) for item in raw]
+    _, all_cols = api_main.engineer_feature_columns(api_main.records_to_columns(records))
+    probabilities = np.random.default_rng(0).random(len(records))
+    return api_main._build_request_rows(
+        all_cols, records, datetime.now(timezone.utc), (probabilities > 0.5).astype(int), probabilities, 'bench'
+    )
+
+
+def _schema(api_main, engine, mode: str):
+    from api import compact_storage
+    if mode == 'compact':
+        compact_storage.create_schema(engine)
+        return compact_storage.user_requests_compact
+    api_main.metadata.create_all(engine)
+    return api_main.user_requests
+
+
+def _sizes(conn) -> Dict[str, int]:
+    return {name: int(size) for name, size in conn.execute(text(
+        "SELECT name, SUM(pgsize) FROM dbstat WHERE name NOT LIKE 'sqlite_%' GROUP BY name"
+    ))}
+
+
+def run_mode(api_main, mode: str, rows: List[dict], single_rows: int, batch_size: int, directory: str) -> dict:
+    from api.storage import create_storage_engine
+    path = os.path.join(directory, f"{mode}.db")
+    engine = create_storage_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, 'connect')
+    def _hold_checkpoints(dbapi_connection, _record):
+        # keep every page written in the WAL so its size is the write volume
+        dbapi_connection.execute("PRAGMA wal_autocheckpoint=0")
+
+    target = _schema(api_main, engine, mode)
+    insert = target.insert()
+
+    started = time.perf_counter()
+    for row in rows[:single_rows]:
+        with engine.begin() as conn:
+            conn.execute(insert, row)
+    single_s = time.perf_counter() - started
+
+    bulk = rows[single_rows:]
+    started = time.perf_counter()
+    for offset in range(0, len(bulk), batch_size):
+        with engine.begin() as conn:
+            conn.execute(insert, bulk[offset:offset + batch_size])
+    bulk_s = time.perf_counter() - started
+
+    wal_bytes = os.path.getsize(path + '-wal')
+    with engine.connect() as conn:
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        sizes = _sizes(conn)
+    engine.dispose()
+    table_bytes = sizes.pop(target.name)
+    index_bytes = sum(sizes.values())
+    return {
+        'single_rows_per_s': single_rows / single_s if single_rows else None,
+        'bulk_rows_per_s': len(bulk) / bulk_s if bulk else None,
+        'wal_bytes': wal_bytes,
+        'table_bytes': table_bytes,
+        'index_bytes': index_bytes,
+        'bytes_per_row': (table_bytes + index_bytes) / len(rows),
+        'columns': len(target.c),
+    }
+
+
+def run(args) -> dict:
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    os.environ['ENABLE_WANDB'] = 'false'
+    import api.main as api_main
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('api').setLevel(logging.WARNING)
+
+    api_main._load_medians()
+    rows = build_rows(api_main, load_records(args.data, args.rows))
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in MODES:
+            results[mode] = run_mode(api_main, mode, rows, min(args.single_rows, len(rows)), args.batch_size, directory)
+
+    wide = results['wide']
+    for mode in MODES:
+        result = results[mode]
+        print(f"  {mode:<8} {result['columns']:>2} cols  single={result['single_rows_per_s']:9.0f} rows/s  "
+              f"bulk={result['bulk_rows_per_s']:9.0f} rows/s  wal={result['wal_bytes'] / 1e6:7.1f}MB  "
+              f"table={result['table_bytes'] / 1e6:7.1f}MB  index={result['index_bytes'] / 1e6:6.1f}MB  "
+              f"{result['bytes_per_row']:6.1f}B/row  "
+              f"x{wide['table_bytes'] / result['table_bytes']:4.2f} smaller table")
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'rows': len(rows),
+            'single_rows': min(args.single_rows, len(rows)),
+            'batch_size': args.batch_size,
+        },
+        'modes': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000, help="rows written per mode")
+    parser.add_argument("--single-rows", type=int, default=2000,
+                        help="how many of them are written one per transaction")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per bulk insert")
+    parser.add_argument("--data", default=os.path.join(PROJECT_ROOT, 'data', 'work_from_home_burnout_dataset.csv'))
+    parser.add_argument("--output-dir", default=os.path.join(PROJECT_ROOT, 'benchmarks', 'storage'),
+                        help="results are written to <output-dir>/<commit>.json")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+    output = os.path.join(args.output_dir, f"{result['meta']['commit']}.json")
+    with open(output, 'w', encoding='utf-8') as out:
+        json.dump(result, out, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,20 @@
 # File: scripts/data_ingestion.py
 
 import os
-from sqlalchemy import create_engine, text
+import sys
+from sqlalchemy import text
 from dotenv import load_dotenv
 import logging
+from datetime import datetime
 from typing import Optional
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from api import rollups  # noqa: E402
+from api.storage import get_engine, sync_url  # noqa: E402
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,22 +28,23 @@ load_dotenv()
 class PostgresDataStore:
     """Manages database connections and data operations with connection pooling"""
 
-    def __init__(self, db_url: Optional[str] = None, pool_size: int = 5):
+    def __init__(self, db_url: Optional[str] = None, pool_size: Optional[int] = None):
         self.db_url = db_url or os.getenv('DATABASE_URL')
         if not self.db_url:
             raise ValueError("DATABASE_URL not set in environment")
 
-        self.engine = create_engine(
-            self.db_url,
-            pool_size=pool_size,
-            max_overflow=pool_size * 2,
-            pool_pre_ping=True,
-            echo=False,
-        )
+        # the process-wide engine from api.storage (DB_POOL_* settings); an explicit
+        # pool_size only applies if this store is the first user of the URL
+        overrides = {} if pool_size is None else {'pool_size': pool_size, 'max_overflow': pool_size * 2}
+        self.engine = get_engine(sync_url(self.db_url), **overrides)
         logger.info("Database connection pool initialized")
 
     def load_csv_to_postgres(self, csv_path: str, table_name: str = 'burnout_records'):
-        """Load CSV data into Postgres table"""
+        """Load CSV data into Postgres table.
+
+        Rows loaded into `burnout_records` are added to its rollups in the same
+        transaction, which the `burnout_statistics` view reads.
+        """
         try:
             import pandas as pd
 
@@ -43,8 +53,21 @@ class PostgresDataStore:
 
             self._validate_data(df)
 
+            update_rollups = table_name == rollups.RECORDS_TABLE
+            if update_rollups:
+                if rollups.create_schema(self.engine):
+                    logger.warning("Recreated rollup tables with an outdated layout; "
+                                   "run scripts/backfill_rollups.py to refill them")
+                if 'created_at' not in df.columns:
+                    # stored, so a rebuild puts the rows on the same day as the rollups do
+                    df['created_at'] = datetime.utcnow()
+
             with self.engine.connect() as conn:
                 df.to_sql(table_name, conn, if_exists='append', index=False)
+                if update_rollups:
+                    # plain Python values with None for missing ones, as the API's rows are
+                    records = df.astype(object).where(df.notna(), None).to_dict('records')
+                    rollups.apply_rows(conn, records, tables=rollups.RECORD_ROLLUPS)
                 conn.commit()
 
             logger.info(f"Successfully loaded {len(df)} records to {table_name}")
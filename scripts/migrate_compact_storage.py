@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Copy request rows between the wide `user_requests` table and compact storage.
+
+    python scripts/migrate_compact_storage.py --to compact   # user_requests -> user_requests_compact
+    python scripts/migrate_compact_storage.py --to wide      # user_requests_expanded -> user_requests
+
+Copies are incremental (only rows with an id above the target's highest id)
+and committed in batches, so the script can be re-run at any time.  Rows keep
+their ids, so history cursors and rollups stay valid.  Rows the wide table
+stored before it recorded predictions carry no `model_version` or prediction.
+
+Switching a deployment to compact storage:
+
+1. run `--to compact` while the API keeps writing `user_requests`;
+2. stop the API and run `--to compact` again to copy the rows written since;
+3. start the API with USER_REQUESTS_STORAGE=compact;
+4. once satisfied, run `--to compact --drop-source` to drop `user_requests`.
+
+Step 2 must run with no writers: once the API writes the compact table, new
+ids would collide with rows still to be copied.  `--to wide` reverses the
+switch the same way; derived metrics are recomputed by the view.
+"""
+import argparse
+import logging
+import os
+import sys
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func, insert, select, text
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from api import compact_storage  # noqa: E402
+from api.storage import add_missing_columns, dispose_engines, get_engine, sync_url  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger('migrate_compact_storage')
+
+
+def copy_rows(engine, source, target, batch_size: int = 50000) -> int:
+    """Copy rows of `source` with an id above `target`'s highest into `target`; returns rows copied.
+
+    Columns are those `target` shares with `source`; the rest are left NULL.
+    """
+    columns = [column.name for column in target.c if column.name in source.c]
+    with engine.connect() as conn:
+        start = conn.execute(select(func.coalesce(func.max(target.c.id), 0))).scalar()
+        last = conn.execute(select(func.max(source.c.id))).scalar() or 0
+    copied = 0
+    while start < last:
+        end = start + batch_size
+        with engine.begin() as conn:
+            result = conn.execute(insert(target).from_select(
+                columns,
+                select(*(source.c[name] for name in columns)).where(source.c.id > start, source.c.id <= end)
+            ))
+        copied += max(result.rowcount, 0)
+        logger.info("Copied ids %d-%d (%d rows so far)", start + 1, min(end, last), copied)
+        start = end
+    if copied and engine.dialect.name == 'postgresql':
+        # explicit ids do not advance the serial sequence
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{target.name}', 'id'), (SELECT MAX(id) FROM {target.name}))"
+            ))
+    return copied
+
+
+def migrate(engine, to: str, batch_size: int = 50000, drop_source: bool = False) -> int:
+    """Create the target schema and copy the missing rows; returns rows copied"""
+    from api.main import USER_HISTORY_INDEX, metadata, user_requests
+    # the prediction columns, on a wide table from before they were added
+    add_missing_columns(engine, user_requests)
+    if to == 'compact':
+        compact_storage.create_schema(engine)
+        source, target = user_requests, compact_storage.user_requests_compact
+    else:
+        metadata.create_all(engine)
+        USER_HISTORY_INDEX.create(engine, checkfirst=True)
+        compact_storage.create_schema(engine)
+        source, target = compact_storage.user_requests_expanded, user_requests
+    copied = copy_rows(engine, source, target, batch_size)
+    if drop_source:
+        with engine.begin() as conn:
+            if to == 'compact':
+                conn.execute(text(f"DROP TABLE {user_requests.name}"))
+            else:
+                conn.execute(text(f"DROP VIEW {compact_storage.EXPANDED_VIEW}"))
+                conn.execute(text(f"DROP TABLE {compact_storage.COMPACT_TABLE}"))
+        logger.info("Dropped the %s storage", 'wide' if to == 'compact' else 'compact')
+    return copied
+
+
+def main(argv: Optional[List[str]] = None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--to", choices=('compact', 'wide'), required=True, help="storage mode to copy rows into")
+    parser.add_argument("--database-url", default=os.getenv('DATABASE_URL'), help="defaults to $DATABASE_URL")
+    parser.add_argument("--batch-size", type=int, default=50000, help="rows per copy transaction")
+    parser.add_argument("--drop-source", action='store_true',
+                        help="drop the storage copied from afterwards (no API may still be writing it)")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("no database URL given and DATABASE_URL is not set")
+
+    engine = get_engine(sync_url(args.database_url))
+    try:
+        copied = migrate(engine, args.to, args.batch_size, args.drop_source)
+    finally:
+        dispose_engines()
+    print(f"Copied {copied} rows into {args.to} storage")
+
+
+if __name__ == "__main__":
+    main()
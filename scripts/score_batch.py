@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Score a large CSV/Parquet file offline with the API's model artifacts.
+
+Chunks are read incrementally, fanned out to a process pool (each worker loads
+the model once) and written back in input order as they complete, so memory
+stays bounded by `--workers` x `--chunk-size` rows.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from api.columnar import invalid_rows  # noqa: E402
+from api.features import (  # noqa: E402
+    DERIVED_METRICS, INPUT_BOUNDS, INTEGER_INPUTS, MODEL_FEATURES, engineer_columns, frame_columns, load_medians
+)
+from api.model_bundle import load_bundle, predict_scaled, scale_features  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger('score_batch')
+
+INPUT_COLUMNS = [
+    'work_hours', 'screen_time_hours', 'meetings_count', 'breaks_taken', 'after_hours_work',
+    'sleep_hours', 'task_completion_rate', 'day_type'
+]
+ID_COLUMNS = ['user_id', 'name']
+# string columns of the scored output; every other column is float64
+TEXT_COLUMNS = set(ID_COLUMNS) | {'risk_level', 'error'}
+
+# per-process state set by _init_worker
+_BUNDLE = None
+_MEDIANS = None
+
+
+def _init_worker(model_path, preprocessor_path, feature_names_path):
+    """Load medians and the model once per worker process"""
+    global _BUNDLE, _MEDIANS
+    logging.getLogger().setLevel(logging.WARNING)
+    _MEDIANS = load_medians()
+    _BUNDLE = load_bundle(model_path, preprocessor_path, feature_names_path, MODEL_FEATURES)
+    if list(_BUNDLE.feature_names) != list(MODEL_FEATURES):
+        raise ValueError(f"Feature names in {feature_names_path} do not match the API's feature order")
+
+
+def _validate(chunk: pd.DataFrame) -> pd.Series:
+    """Per-row error message ('' when the row is valid), with the checks /predict/columnar applies"""
+    errors = pd.Series('', index=chunk.index, dtype=object)
+    columns = {name: pd.to_numeric(chunk[name], errors='coerce').to_numpy(float) for name in INPUT_BOUNDS}
+    for bad, requirement in invalid_rows(columns, INPUT_BOUNDS, INTEGER_INPUTS).values():
+        errors[bad] = errors[bad] + requirement + "; "
+    bad_day = ~chunk['day_type'].astype(str).str.lower().isin(['weekday', 'weekend'])
+    errors[bad_day] = errors[bad_day] + "day_type must be Weekday or Weekend; "
+    return errors.str.rstrip('; ')
+
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Engineer features and score one chunk; runs in a worker process"""
+    errors = _validate(chunk)
+    valid = (errors == '').to_numpy()
+    out = chunk[[c for c in ID_COLUMNS if c in chunk.columns]].copy()
+    for name in MODEL_FEATURES + DERIVED_METRICS:
+        out[name] = np.nan
+    out['risk_probability'] = np.nan
+    out['risk_level'] = None
+
+    if valid.any():
+        features, all_cols = engineer_columns(frame_columns(chunk[valid]), *_MEDIANS)
+        labels, probabilities = predict_scaled(_BUNDLE, scale_features(_BUNDLE, features))
+        for name in MODEL_FEATURES + DERIVED_METRICS:
+            out.loc[valid, name] = all_cols[name]
+        out.loc[valid, 'risk_probability'] = probabilities
+        out.loc[valid, 'risk_level'] = np.where(labels == 1, 'High', 'Low')
+    out['error'] = errors.where(errors != '', None)
+    return out
+
+
+def _score_chunk_task(chunk: pd.DataFrame, output_format: str, with_header: bool):
+    """Score a chunk and serialize it in the worker, so the parent only appends bytes.
+
+    Returns `(rows, invalid_rows, payload)`; the payload is CSV text or, for
+    Parquet output, the scored DataFrame.
+    """
+    scored = _score_chunk(chunk)
+    invalid = int(scored['error'].notna().sum())
+    if output_format == 'parquet':
+        return len(scored), invalid, scored
+    return len(scored), invalid, scored.to_csv(index=False, header=with_header)
+
+
+def _read_chunks(path: str, chunk_size: int):
+    """Yield DataFrame chunks from a CSV or Parquet file"""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as import_err:
+            raise SystemExit("Reading Parquet requires pyarrow (pip install pyarrow)") from import_err
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class _ChunkWriter:
+    """Append scored chunks (CSV text or DataFrames) to a CSV or Parquet file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.output_format = 'parquet' if path.endswith('.parquet') else 'csv'
+        self._parquet = None
+        self._csv = None
+
+    def write(self, payload):
+        if self.output_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            # fixed up front: inferred from one chunk, an all-valid `error` or an
+            # all-invalid `risk_level` column would be typed `null`
+            schema = pa.schema([
+                (name, pa.string() if name in TEXT_COLUMNS else pa.float64()) for name in payload.columns
+            ])
+            ids = {name: 'string' for name in ID_COLUMNS if name in payload.columns}
+            table = pa.Table.from_pandas(payload.astype(ids), schema=schema, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, schema)
+            self._parquet.write_table(table)
+        else:
+            if self._csv is None:
+                self._csv = open(self.path, 'w', encoding='utf-8', newline='')
+            self._csv.write(payload)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._csv is not None:
+            self._csv.close()
+
+
+def score_file(input_path: str, output_path: str, workers: int, chunk_size: int,
+               model_path: str, preprocessor_path: str, feature_names_path: str) -> dict:
+    """Score `input_path` into `output_path`; returns row counts and throughput"""
+    started = time.perf_counter()
+    total = invalid = 0
+    writer = _ChunkWriter(output_path)
+    pending = []
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker,
+        initargs=(model_path, preprocessor_path, feature_names_path)
+    ) as pool:
+        def write_oldest():
+            nonlocal total, invalid
+            rows, bad_rows, payload = pending.pop(0).result()
+            writer.write(payload)
+            total += rows
+            invalid += bad_rows
+            elapsed = time.perf_counter() - started
+            logger.info("%d rows scored (%.0f rows/sec)", total, total / elapsed)
+
+        try:
+            for index, chunk in enumerate(_read_chunks(input_path, chunk_size)):
+                missing = [c for c in INPUT_COLUMNS if c not in chunk.columns]
+                if missing:
+                    raise SystemExit(f"Input is missing required columns: {missing}")
+                pending.append(pool.submit(
+                    _score_chunk_task, chunk, writer.output_format, index == 0
+                ))
+                # keep at most two chunks per worker in flight so memory stays flat
+                while len(pending) >= 2 * workers:
+                    write_oldest()
+            while pending:
+                write_oldest()
+        finally:
+            writer.close()
+
+    elapsed = time.perf_counter() - started
+    return {'rows': total, 'invalid_rows': invalid, 'seconds': elapsed,
+            'rows_per_sec': total / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("input", help="CSV or .parquet file with UserData columns")
+    parser.add_argument("output", help="destination .csv or .parquet file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per chunk")
+    parser.add_argument("--model", default=os.getenv('MODEL_PATH', 'models/best_model.joblib'))
+    parser.add_argument("--preprocessor", default=os.getenv('PREPROCESSOR_PATH', 'models/preprocessor.joblib'))
+    parser.add_argument("--feature-names", default=os.getenv('FEATURE_NAMES_PATH', 'models/feature_names.joblib'))
+    args = parser.parse_args()
+
+    stats = score_file(args.input, args.output, max(1, args.workers), max(1, args.chunk_size),
+                       args.model, args.preprocessor, args.feature_names)
+    print(f"Scored {stats['rows']} rows ({stats['invalid_rows']} invalid) in "
+          f"{stats['seconds']:.1f}s — {stats['rows_per_sec']:.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
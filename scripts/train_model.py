@@ -2,9 +2,10 @@
 #!/usr/bin/env python3
 """Train ML model with real burnout data and feature engineering"""
 import pandas as pd
-import numpy as np
 import joblib
+import json
 import os
+import sys
 from datetime import datetime
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
@@ -13,36 +14,11 @@ from sklearn.metrics import classification_report, accuracy_score, roc_auc_score
 import xgboost as xgb
 import wandb
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
-def engineer_features(df):
-    """Apply feature engineering transformations"""
-    df = df.copy()
-
-    # Work intensity metrics
-    df['work_intensity_ratio'] = df['screen_time_hours'] / (df['work_hours'] + 0.1)
-    df['meeting_burden'] = df['meetings_count'] / (df['work_hours'] + 0.1)
-    df['break_adequacy'] = df['breaks_taken'] / (df['work_hours'] + 0.1)
-
-    # Health metrics
-    df['sleep_deficit'] = 8 - df['sleep_hours']
-    df['recovery_index'] = (df['sleep_hours'] + df['breaks_taken']) - df['screen_time_hours']
-    df['fatigue_risk'] = df['screen_time_hours'] - (df['sleep_hours'] * 1.5)
-
-    # Workload metrics
-    df['workload_pressure'] = df['work_hours'] + (df['meetings_count'] * 0.25) + df['after_hours_work']
-    df['task_efficiency'] = df['task_completion_rate'] / (df['work_hours'] + 0.1)
-
-    # Balance score
-    df['work_life_balance_score'] = np.clip(
-        ((df['sleep_hours'] / 8) * 30 + (df['breaks_taken'] / 5) * 30
-         - (df['work_hours'] / 10) * 20 - df['after_hours_work'] * 10) * 2,
-        0, 100
-    )
-
-    # Day type encoding
-    df['is_weekday'] = (df['day_type'] == 'Weekday').astype(int)
-
-    return df
+from api.features import MODEL_FEATURES, engineer_columns, frame_columns  # noqa: E402
 
 
 def train_model():
@@ -79,24 +55,16 @@ def train_model():
         "low_risk_count": (df['burnout_risk'] == 'Low').sum()
     })
 
-    # Engineer features
+    # Engineer features straight into the model matrix (no DataFrame copies)
     print("\nEngineering features...")
-    df = engineer_features(df)
+    median_hours = float(df['work_hours'].median())
+    median_meetings = float(df['meetings_count'].median())
+    feature_cols = list(MODEL_FEATURES)
+    features, _ = engineer_columns(frame_columns(df), median_hours, median_meetings)
+    X = pd.DataFrame(features, columns=feature_cols, copy=False)
 
     # Create binary target (High burnout = 1, else = 0)
-    df['target'] = (df['burnout_risk'] == 'High').astype(int)
-
-    # Select features for training
-    feature_cols = [
-        'work_hours', 'screen_time_hours', 'meetings_count', 'breaks_taken',
-        'after_hours_work', 'sleep_hours', 'task_completion_rate', 'is_weekday',
-        'work_intensity_ratio', 'meeting_burden', 'break_adequacy',
-        'sleep_deficit', 'recovery_index', 'fatigue_risk',
-        'workload_pressure', 'task_efficiency', 'work_life_balance_score'
-    ]
-
-    X = df[feature_cols]
-    y = df['target']
+    y = (df['burnout_risk'] == 'High').astype(int)
 
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(
@@ -230,17 +198,25 @@ def train_model():
     joblib.dump(best_model, 'models/best_model.joblib')
     joblib.dump(scaler, 'models/preprocessor.joblib')
     joblib.dump(feature_cols, 'models/feature_names.joblib')
+    # medians used by the API's flag calculations, so it never has to read the dataset
+    with open('models/medians.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'work_hours': median_hours,
+            'meetings_count': median_meetings
+        }, f, indent=2)
 
     print("[OK] Model training complete!")
     print("[OK] Model saved: models/best_model.joblib")
     print("[OK] Scaler saved: models/preprocessor.joblib")
     print("[OK] Features saved: models/feature_names.joblib")
+    print("[OK] Medians saved: models/medians.json")
 
     # Log model artifacts to W&B
     artifact = wandb.Artifact('burnout-model', type='model')
     artifact.add_file('models/best_model.joblib')
     artifact.add_file('models/preprocessor.joblib')
     artifact.add_file('models/feature_names.joblib')
+    artifact.add_file('models/medians.json')
     wandb.log_artifact(artifact)
 
     # Finish W&B run
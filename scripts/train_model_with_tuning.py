@@ -1,11 +1,11 @@
 # pylint: disable=too-many-locals,too-many-statements,unused-variable,line-too-long,invalid-name,trailing-whitespace,unspecified-encoding
 #!/usr/bin/env python3
 """Model training with hyperparameter tuning using BayesianSearch"""
+import json
 import os
 import sys
 from datetime import datetime
 
-import numpy as np
 import pandas as pd
 import joblib
 from sklearn.model_selection import train_test_split
@@ -19,6 +19,12 @@ from skopt import BayesSearchCV
 from skopt.space import Real, Integer
 import xgboost as xgb
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from api.features import MODEL_FEATURES, engineer_columns, frame_columns  # noqa: E402
+
 # ── W&B: optional import — gracefully disabled when not available ──────────────
 try:
     import wandb
@@ -33,26 +39,6 @@ _WANDB_KEY = os.getenv('WANDB_API_KEY', '')
 ENABLE_WANDB = _WANDB_AVAILABLE and _WANDB_MODE != 'disabled' and bool(_WANDB_KEY)
 
 
-def engineer_features(df):
-    """Apply feature engineering transformations"""
-    df = df.copy()
-    df['work_intensity_ratio'] = df['screen_time_hours'] / (df['work_hours'] + 0.1)
-    df['meeting_burden'] = df['meetings_count'] / (df['work_hours'] + 0.1)
-    df['break_adequacy'] = df['breaks_taken'] / (df['work_hours'] + 0.1)
-    df['sleep_deficit'] = 8 - df['sleep_hours']
-    df['recovery_index'] = (df['sleep_hours'] + df['breaks_taken']) - df['screen_time_hours']
-    df['fatigue_risk'] = df['screen_time_hours'] - (df['sleep_hours'] * 1.5)
-    df['workload_pressure'] = df['work_hours'] + (df['meetings_count'] * 0.25) + df['after_hours_work']
-    df['task_efficiency'] = df['task_completion_rate'] / (df['work_hours'] + 0.1)
-    df['work_life_balance_score'] = np.clip(
-        ((df['sleep_hours'] / 8) * 30 + (df['breaks_taken'] / 5) * 30
-         - (df['work_hours'] / 10) * 20 - df['after_hours_work'] * 10) * 2,
-        0, 100
-    )
-    df['is_weekday'] = (df['day_type'] == 'Weekday').astype(int)
-    return df
-
-
 def train_with_tuning():
     """Train models with Bayesian hyperparameter optimization"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
@@ -106,19 +92,12 @@ def train_with_tuning():
 
     # ── Feature engineering ───────────────────────────────────────────────────
     print("\nEngineering features...")
-    df = engineer_features(df)
-    df['target'] = (df['burnout_risk'] == 'High').astype(int)
-
-    feature_cols = [
-        'work_hours', 'screen_time_hours', 'meetings_count', 'breaks_taken',
-        'after_hours_work', 'sleep_hours', 'task_completion_rate', 'is_weekday',
-        'work_intensity_ratio', 'meeting_burden', 'break_adequacy',
-        'sleep_deficit', 'recovery_index', 'fatigue_risk',
-        'workload_pressure', 'task_efficiency', 'work_life_balance_score'
-    ]
-
-    X = df[feature_cols]
-    y = df['target']
+    median_hours = float(df['work_hours'].median())
+    median_meetings = float(df['meetings_count'].median())
+    feature_cols = list(MODEL_FEATURES)
+    features, _ = engineer_columns(frame_columns(df), median_hours, median_meetings)
+    X = pd.DataFrame(features, columns=feature_cols, copy=False)
+    y = (df['burnout_risk'] == 'High').astype(int)
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
@@ -342,6 +321,11 @@ def train_with_tuning():
     joblib.dump(best_model, 'models/best_model_tuned.joblib')
     joblib.dump(scaler, 'models/preprocessor_tuned.joblib')
     joblib.dump(feature_cols, 'models/feature_names_tuned.joblib')
+    with open('models/medians.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'work_hours': median_hours,
+            'meetings_count': median_meetings
+        }, f, indent=2)
 
     with open('models/best_hyperparameters.txt', 'w', encoding='utf-8') as f:
         f.write(f"Best Model: {best_name}\n")
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 """Test API locally before deployment"""
-from api.main import app, MODEL, SCALER, engineer_features, UserData
-import numpy as np
+import api.main as api_main
+from api.main import app, engineer_features, UserData
+
+# run the same resource loading the app lifespan performs
+api_main._startup()
+MODEL = api_main.BUNDLE.model
+SCALER = api_main.BUNDLE.scaler
 
 print("=" * 60)
 print("BACKEND VERIFICATION TEST")
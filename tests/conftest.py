@@ -1,5 +1,6 @@
 # File: tests/conftest.py
 
+import dataclasses
 import sys
 from pathlib import Path
 
@@ -8,9 +9,21 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pytest  # noqa: E402
 from fastapi.testclient import TestClient  # noqa: E402
+import api.main as api_main  # noqa: E402
 from api.main import app  # noqa: E402
 
 
+@pytest.fixture(scope="session", autouse=True)
+def app_lifespan():
+    """Run the app lifespan (tables, medians, model loading, warm-up) once per session.
+
+    The yielded client keeps one event loop for the whole session, so work a
+    request leaves running in the background can finish.
+    """
+    with TestClient(app) as session_client:
+        yield session_client
+
+
 @pytest.fixture(scope="session")
 def test_client():
     """Provide FastAPI test client"""
@@ -36,14 +49,55 @@ def sample_user_data():
 def mock_model():
     """Mock the ML model"""
     from unittest.mock import MagicMock
+    import numpy as np
     model = MagicMock()
+    model.classes_ = np.array([0, 1])
     model.predict.return_value = [0]  # Low risk
     model.predict_proba.return_value = [[0.85, 0.15]]  # 15% high risk prob
     return model
 
 
+@pytest.fixture
+def set_model(monkeypatch):
+    """Swap the model inside the live bundle for the duration of a test"""
+    def _set(model, compiled=None):
+        bundle = dataclasses.replace(api_main.BUNDLE, model=model, compiled=compiled)
+        monkeypatch.setattr("api.main.BUNDLE", bundle)
+        return bundle
+    return _set
+
+
+@pytest.fixture
+def batch_model(set_model):
+    """Model mock whose predict_proba returns one row per input row"""
+    from unittest.mock import MagicMock
+    import numpy as np
+    model = MagicMock()
+    model.classes_ = np.array([0, 1])
+    model.predict_proba.side_effect = lambda x: np.tile([0.3, 0.7], (len(x), 1))
+    set_model(model)
+    return model
+
+
+@pytest.fixture(params=["sync", "async"])
+def db_driver(request, monkeypatch):
+    """Run a test through the sync engine and through an async (aiosqlite) engine on the same database"""
+    from sqlalchemy.engine import make_url
+    from api.storage import get_async_engine, is_async_url
+
+    if request.param == "sync":
+        monkeypatch.setattr(api_main, "async_engine", None)
+    elif not is_async_url(api_main.DATABASE_URL):
+        url = make_url(api_main.DATABASE_URL)
+        if url.get_backend_name() != "sqlite":
+            pytest.skip("the async variant runs against local SQLite")
+        async_url = url.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+        monkeypatch.setattr(api_main, "async_engine", get_async_engine(async_url))
+    return request.param
+
+
 @pytest.fixture(autouse=True)
-def mock_model_global(mock_model, monkeypatch):
-    """Auto-use fixture to mock global model in api.main"""
-    monkeypatch.setattr("api.main.MODEL", mock_model)
+def mock_model_global(mock_model, set_model):
+    """Auto-use fixture to mock the live model in api.main"""
+    set_model(mock_model)
     return mock_model
@@ -1,14 +1,35 @@
 #!/usr/bin/env python3
 # File: tests/test_api.py
 
+import asyncio
 import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, inspect, select, text
 
 # ensure tests use an in-memory SQLite database
 os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
 
-from api.main import app, engine, user_requests
+from api.batching import MicroBatcher
+from api.cache import PredictionCache
+from api.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from api.executors import BoundedExecutor, ExecutorSaturatedError
+from api import columnar, rollups
+from api.admission import AdmissionController, AdmissionRejected
+from api.prediction_log import PredictionLogger, summarize_events
+from api.spool import Spool, SpoolReplayer
+from api.streaming import BadRow, iter_lines
+from api.table_stats import TableStats
+from api.write_behind import WriteBehindBuffer
+from api.main import app, engine, user_requests, engineer_features, engineer_feature_columns, \
+    records_to_columns, UserData
 
 client = TestClient(app)
 
@@ -96,11 +117,1066 @@ class TestPredictEndpoint:
         assert response.status_code == 422
 
 
+class TestBatchPredictEndpoint:
+    def test_batch_predict(self, batch_model):
+        records = [dict(VALID_DATA, user_id=f"u{i}") for i in range(5)]
+        response = client.post("/predict/batch", json={"records": records})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 5
+        assert data["high_risk_count"] == 5
+        assert [p["user_id"] for p in data["predictions"]] == [f"u{i}" for i in range(5)]
+        assert all(p["risk_probability"] == pytest.approx(0.7) for p in data["predictions"])
+
+    def test_batch_labels_follow_model_classes(self, set_model):
+        model = MagicMock()
+        model.classes_ = np.array([1, 0])
+        model.predict.return_value = [1]
+        model.predict_proba.side_effect = lambda x: np.tile([0.8, 0.2], (len(x), 1))
+        set_model(model)
+        single = client.post("/predict", json=VALID_DATA).json()
+        batch = client.post("/predict/batch", json={"records": [VALID_DATA] * 2}).json()
+        assert single["risk_level"] == "High"
+        assert [p["risk_level"] for p in batch["predictions"]] == ["High", "High"]
+
+    def test_batch_single_model_call(self, batch_model):
+        records = [VALID_DATA] * 10
+        client.post("/predict/batch", json={"records": records})
+        assert batch_model.predict_proba.call_count == 1
+        assert batch_model.predict_proba.call_args[0][0].shape == (10, 17)
+
+    def test_batch_bulk_insert(self, batch_model):
+        with engine.connect() as conn:
+            before = len(conn.execute(user_requests.select()).fetchall())
+        client.post("/predict/batch", json={"records": [VALID_DATA] * 3})
+        with engine.connect() as conn:
+            after = len(conn.execute(user_requests.select()).fetchall())
+        assert after == before + 3
+
+    def test_batch_empty_rejected(self):
+        response = client.post("/predict/batch", json={"records": []})
+        assert response.status_code == 422
+
+    def test_columnar_matches_scalar(self):
+        records = [
+            UserData(**VALID_DATA),
+            UserData(**dict(VALID_DATA, work_hours=14, sleep_hours=4, screen_time_hours=13,
+                            meetings_count=10, after_hours_work=1, day_type="Weekend")),
+        ]
+        matrix, all_cols = engineer_feature_columns(records_to_columns(records))
+        for i, record in enumerate(records):
+            row, feats = engineer_features(record)
+            np.testing.assert_allclose(matrix[i], row[0])
+            for key, value in feats.items():
+                assert all_cols[key][i] == pytest.approx(value)
+
+
+CSV_HEADER = ("work_hours,screen_time_hours,meetings_count,breaks_taken,after_hours_work,"
+              "sleep_hours,task_completion_rate,day_type,name,user_id\n")
+
+
+@pytest.mark.skipif(not columnar.available(), reason="msgpack is not installed")
+class TestColumnarPredictEndpoint:
+    RECORDS = [
+        {**VALID_DATA, "user_id": "col-1"},
+        {**VALID_DATA, "user_id": "col-2", "work_hours": 13.0, "sleep_hours": 4.0, "breaks_taken": 0},
+        {**VALID_DATA, "name": "Col Three", "day_type": "weekend", "meetings_count": 11},
+    ]
+
+    def _encode(self, records, day_as_strings=True, **overrides):
+        columns = {name: [r[name] for r in records] for name in columnar.NUMERIC_INPUTS}
+        if day_as_strings:
+            columns["day_type"] = [r["day_type"] for r in records]
+        else:
+            columns["is_weekday"] = [float(r["day_type"].lower() == "weekday") for r in records]
+        columns.update(overrides)
+        return columnar.encode_request(
+            columns, [r.get("user_id") for r in records], [r.get("name") for r in records]
+        )
+
+    def _post(self, body, content_type=columnar.MEDIA_TYPE, **params):
+        return client.post("/predict/columnar", content=body, params=params,
+                           headers={"Content-Type": content_type})
+
+    @pytest.fixture
+    def feature_model(self, set_model):
+        """Probability depends on every model input, so any difference in the features shows"""
+        model = MagicMock()
+        model.classes_ = np.array([0, 1])
+        model.predict_proba.side_effect = lambda x: np.column_stack(
+            [1 - 1 / (1 + np.exp(-x.sum(axis=1))), 1 / (1 + np.exp(-x.sum(axis=1)))]
+        )
+        set_model(model)
+        return model
+
+    @pytest.mark.parametrize("day_as_strings", [True, False])
+    def test_matches_json_batch(self, feature_model, day_as_strings):
+        response = self._post(self._encode(self.RECORDS, day_as_strings))
+        assert response.status_code == 200
+        assert response.headers["content-type"] == columnar.MEDIA_TYPE
+        result = columnar.decode_response(response.content)
+
+        expected = client.post("/predict/batch", json={"records": self.RECORDS}).json()
+        assert result["count"] == 3 and result["high_risk_count"] == expected["high_risk_count"]
+        assert result["risk_probability"].tolist() == pytest.approx(
+            [p["risk_probability"] for p in expected["predictions"]]
+        )
+        assert result["high_risk"].tolist() == [int(p["risk_level"] == "High") for p in expected["predictions"]]
+        assert "features" not in result
+
+    def test_vectorized_validation_reports_rows(self):
+        response = self._post(self._encode(self.RECORDS, work_hours=[8.0, 25.0, float("nan")]))
+        assert response.status_code == 422
+        assert "work_hours must be between 0 and 24: 2 row(s) [1, 2]" in response.json()["detail"]
+
+        response = self._post(self._encode(self.RECORDS, meetings_count=[1.0, 2.5, 3.0]))
+        assert "meetings_count must be integers between 0 and 20: 1 row(s) [1]" in response.json()["detail"]
+
+        response = self._post(self._encode(self.RECORDS, day_type=["Weekday", "Holiday", "Weekend"]))
+        assert response.status_code == 422 and "day_type" in response.json()["detail"]
+
+        anonymous = [{k: v for k, v in r.items() if k not in ("name", "user_id")} for r in self.RECORDS]
+        response = self._post(self._encode(anonymous))
+        assert "either name or user_id" in response.json()["detail"]
+
+    def test_rejects_bad_payloads(self):
+        assert self._post(self._encode(self.RECORDS), content_type="application/json").status_code == 415
+        assert self._post(b"\xc1").status_code == 422
+        assert self._post(self._encode(self.RECORDS, sleep_hours=[7.0])).status_code == 422
+
+    def test_store_false_skips_insert(self):
+        from sqlalchemy import func, select
+        with engine.connect() as conn:
+            before = conn.execute(select(func.count()).select_from(user_requests)).scalar()
+        assert self._post(self._encode(self.RECORDS), store="false").status_code == 200
+        with engine.connect() as conn:
+            assert conn.execute(select(func.count()).select_from(user_requests)).scalar() == before
+
+
+class TestStreamPredictEndpoint:
+    def test_ndjson_in_order_with_bad_rows_inline(self, batch_model, monkeypatch):
+        import json
+        monkeypatch.setattr("api.main.STREAM_CHUNK_SIZE", 2)
+        lines = [json.dumps(dict(VALID_DATA, user_id=f"u{i}")) for i in range(5)]
+        lines.insert(2, "{not json")
+        lines.insert(4, json.dumps(dict(VALID_DATA, work_hours=99)))
+        response = client.post("/predict/stream", content="\n".join(lines),
+                               headers={"content-type": "application/x-ndjson"})
+        assert response.status_code == 200
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["line"] for r in results] == list(range(1, 8))
+        assert "error" in results[2] and "work_hours" in results[4]["error"]
+        scored = [r for r in results if "error" not in r]
+        assert [r["user_id"] for r in scored] == [f"u{i}" for i in range(5)]
+        assert all(r["risk_level"] == "High" for r in scored)
+        # 5 valid rows in chunks of at most 2 pending lines
+        assert batch_model.predict_proba.call_count == 4
+
+    def test_csv_in_csv_out(self, batch_model):
+        body = CSV_HEADER + "8,5,2,2,0,7,80,Weekday,Ann,\n8,5,2,2,0,7,80,Weekday,,\n1,2\n"
+        response = client.post("/predict/stream?output=csv", content=body,
+                               headers={"content-type": "text/csv"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = response.text.splitlines()
+        assert rows[0] == "line,user_id,name,risk_level,risk_probability,error"
+        assert rows[1].startswith("2,,Ann,High,0.7")
+        assert "name or user_id" in rows[2]
+        assert rows[3].endswith('"expected 10 columns, got 2"')
+
+    def test_rows_stored_unless_disabled(self, batch_model):
+        body = CSV_HEADER + "8,5,2,2,0,7,80,Weekday,,u1\n" * 3
+        with engine.connect() as conn:
+            before = len(conn.execute(user_requests.select()).fetchall())
+        client.post("/predict/stream", content=body, headers={"content-type": "text/csv"})
+        client.post("/predict/stream?store=false", content=body, headers={"content-type": "text/csv"})
+        with engine.connect() as conn:
+            after = len(conn.execute(user_requests.select()).fetchall())
+        assert after == before + 3
+
+    def test_invalid_output_format(self):
+        response = client.post("/predict/stream?output=xml", content="")
+        assert response.status_code == 422
+
+    def test_lines_split_across_chunks(self):
+        async def chunks():
+            for chunk in (b"caf\xc3", b"\xa9\r\nsecond", b" line\n", b"x" * 50, b"y\nlast"):
+                yield chunk
+
+        async def collect():
+            return [item async for item in iter_lines(chunks(), max_line_chars=20)]
+
+        lines = asyncio.run(collect())
+        assert lines[:2] == [(1, "caf\u00e9"), (2, "second line")]
+        assert lines[2][0] == 3 and isinstance(lines[2][1], BadRow)
+        assert lines[3] == (4, "last")
+
+
+class TestExecutors:
+    def test_inference_runs_off_event_loop(self, mock_model):
+        threads = []
+        mock_model.predict.side_effect = lambda x: threads.append(threading.current_thread().name) or [0]
+        response = client.post("/predict", json=VALID_DATA)
+        assert response.status_code == 200
+        assert threads and threads[0].startswith("inference-worker")
+
+    def test_bounded_executor_rejects_when_saturated(self):
+        executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            with pytest.raises(ExecutorSaturatedError):
+                await executor.run(lambda: None)
+            release.set()
+            await first
+
+        asyncio.run(scenario())
+        executor.shutdown()
+
+    def test_cancelled_queued_call_releases_its_slot(self):
+        executor = BoundedExecutor("cancel-test", max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            try:
+                queued = asyncio.ensure_future(executor.run(lambda: None))
+                await asyncio.sleep(0)
+                assert executor.queued == 1
+                queued.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await queued
+                assert executor.queued == 0 and executor.running == 1
+            finally:
+                release.set()
+            await first
+            assert await executor.run(lambda: "ok") == "ok"
+            assert executor.queued == 0 and executor.running == 0
+
+        asyncio.run(scenario())
+        executor.shutdown()
+
+    def test_inline_executor_runs_in_caller(self):
+        executor = BoundedExecutor("inline-test", max_workers=1, max_queue=0, inline=True)
+        name = asyncio.run(executor.run(lambda: threading.current_thread().name))
+        assert name == threading.current_thread().name
+
+
+class TestAdmissionControl:
+    def test_queue_full_and_timeout_are_shed(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+
+        async def scenario():
+            await controller.acquire()
+            waiter = asyncio.ensure_future(controller.acquire())
+            await asyncio.sleep(0)
+            assert controller.queued == 1
+            with pytest.raises(AdmissionRejected, match="queue_full"):
+                await controller.acquire()
+            with pytest.raises(AdmissionRejected, match="queue_timeout"):
+                await waiter
+            assert controller.queued == 0 and controller.in_flight == 1
+
+        asyncio.run(scenario())
+
+    def test_release_hands_slot_to_waiters_in_order(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=5)
+        order = []
+
+        async def request(name):
+            await controller.acquire()
+            order.append(name)
+            await asyncio.sleep(0.01)
+            controller.release()
+
+        async def scenario():
+            await asyncio.gather(*(request(i) for i in range(4)))
+
+        asyncio.run(scenario())
+        assert order == [0, 1, 2, 3]
+        assert controller.in_flight == 0 and controller.queued == 0
+
+    def test_saturated_predict_gets_503_but_health_is_exempt(self, monkeypatch):
+        import api.main
+        controller = api.main.ADMISSION
+        monkeypatch.setattr(controller, "_in_flight", controller.max_concurrent)
+        monkeypatch.setattr(controller, "max_queue", 0)
+        response = client.post("/predict", json=VALID_DATA)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(controller.retry_after)
+        assert client.post("/predict/batch", json={"records": [VALID_DATA]}).status_code == 503
+        assert client.get("/health").status_code == 200
+        metrics = client.get("/metrics")
+        assert metrics.status_code == 200
+        assert 'admission_shed_total{reason="queue_full"}' in metrics.text
+
+
+class TestMicroBatching:
+    def test_concurrent_rows_share_one_call(self):
+        calls = []
+
+        def score(matrix):
+            calls.append(matrix.shape)
+            return (matrix[:, 0] > 5).astype(int), matrix[:, 0] / 10
+
+        executor = BoundedExecutor("batch-test", max_workers=1, max_queue=10)
+        batcher = MicroBatcher(score, executor, max_batch_size=64, window_seconds=0.01)
+
+        async def scenario():
+            rows = [np.array([float(i), 0.0]) for i in range(8)]
+            return await asyncio.gather(*(batcher.submit(row) for row in rows))
+
+        results = asyncio.run(scenario())
+        executor.shutdown()
+        assert calls == [(8, 2)]
+        assert results[3] == (0, pytest.approx(0.3))
+        assert results[7] == (1, pytest.approx(0.7))
+
+    def test_in_flight_batches_are_held_until_done(self):
+        release = threading.Event()
+
+        def score(matrix):
+            release.wait(2)
+            return np.zeros(len(matrix), dtype=int), np.full(len(matrix), 0.5)
+
+        executor = BoundedExecutor("batch-test", max_workers=1, max_queue=10)
+        batcher = MicroBatcher(score, executor, max_batch_size=2, window_seconds=10)
+
+        async def scenario():
+            submitted = [asyncio.ensure_future(batcher.submit(np.zeros(2))) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            assert len(batcher._tasks) == 1  # the full batch; the third row waits for its window
+            release.set()
+            await batcher.drain()
+            assert not batcher._tasks
+            return await asyncio.gather(*submitted)
+
+        results = asyncio.run(scenario())
+        executor.shutdown()
+        assert results == [(0, 0.5)] * 3
+
+    def test_max_batch_size_dispatches_immediately(self):
+        calls = []
+
+        def score(matrix):
+            calls.append(len(matrix))
+            return np.zeros(len(matrix), dtype=int), np.zeros(len(matrix))
+
+        executor = BoundedExecutor("batch-test", max_workers=1, max_queue=10, inline=True)
+        batcher = MicroBatcher(score, executor, max_batch_size=4, window_seconds=10)
+
+        async def scenario():
+            await asyncio.gather(*(batcher.submit(np.zeros(2)) for _ in range(8)))
+
+        asyncio.run(scenario())
+        assert calls == [4, 4]
+
+    def test_predict_uses_batcher(self, batch_model, monkeypatch):
+        monkeypatch.setattr("api.main.MICROBATCH_ENABLED", True)
+        response = client.post("/predict", json=VALID_DATA)
+        assert response.status_code == 200
+        assert response.json()["risk_level"] == "High"
+        assert batch_model.predict_proba.call_count == 1
+
+
+class TestWriteBehind:
+    def test_drained_buffer_does_not_restart(self):
+        flushed = []
+        buffer = WriteBehindBuffer(flushed.append, batch_size=10, flush_interval=5)
+        assert buffer.offer({"i": 0})
+        buffer.drain()
+        assert buffer.closed and flushed == [[{"i": 0}]]
+        assert not buffer.offer({"i": 1})
+        buffer.put({"i": 2})
+        assert not buffer.running and buffer.depth == 0
+        assert flushed == [[{"i": 0}], [{"i": 2}]]
+        buffer.start()
+        assert not buffer.closed and buffer.offer({"i": 3})
+        buffer.drain()
+        assert flushed[-1] == [{"i": 3}]
+
+    def test_flush_by_size(self):
+        flushed = []
+        buffer = WriteBehindBuffer(flushed.append, batch_size=3, flush_interval=5)
+        for i in range(3):
+            assert buffer.offer({"i": i})
+        deadline = time.time() + 2
+        while not flushed and time.time() < deadline:
+            time.sleep(0.01)
+        buffer.drain()
+        assert flushed == [[{"i": 0}, {"i": 1}, {"i": 2}]]
+
+    def test_flush_by_time(self):
+        flushed = []
+        buffer = WriteBehindBuffer(flushed.append, batch_size=100, flush_interval=0.05)
+        buffer.offer({"i": 0})
+        time.sleep(0.3)
+        assert flushed == [[{"i": 0}]]
+        buffer.drain()
+
+    def test_drain_writes_everything(self):
+        flushed = []
+        buffer = WriteBehindBuffer(flushed.append, batch_size=1000, flush_interval=60)
+        for i in range(10):
+            buffer.offer({"i": i})
+        buffer.drain()
+        assert sum(len(rows) for rows in flushed) == 10
+        assert buffer.depth == 0
+
+    def test_full_queue_applies_backpressure(self):
+        flushed = []
+        release = threading.Event()
+
+        def slow_flush(rows):
+            release.wait(2)
+            flushed.append(rows)
+
+        buffer = WriteBehindBuffer(slow_flush, max_queue=1, batch_size=1,
+                                   flush_interval=0.01, put_timeout=0.01)
+        buffer.offer({"i": 0})
+        time.sleep(0.05)  # flusher is now blocked on row 0
+        buffer.offer({"i": 1})
+        assert not buffer.offer({"i": 2})
+        release.set()
+        buffer.put({"i": 2})
+        buffer.drain()
+        assert sorted(row["i"] for rows in flushed for row in rows) == [0, 1, 2]
+
+    def test_predict_enqueues_row(self, monkeypatch):
+        flushed = []
+        buffer = WriteBehindBuffer(flushed.append, batch_size=100, flush_interval=60)
+        monkeypatch.setattr("api.main.WRITE_BEHIND", buffer)
+        response = client.post("/predict", json=VALID_DATA)
+        assert response.status_code == 200
+        assert not flushed
+        buffer.drain()
+        assert flushed[0][0]["name"] == VALID_DATA["name"]
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN and not breaker.allow()
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker("t", failure_threshold=1, slow_call_seconds=0.1)
+        breaker.record_success(0.05)
+        assert breaker.state == CLOSED
+        breaker.record_success(0.5)
+        assert breaker.state == OPEN
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow() and breaker.state == HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        time.sleep(0.02)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED and breaker.allow()
+
+
+class TestSpool:
+    def test_rows_round_trip_with_datetimes(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        created = datetime(2026, 1, 2, 3, 4, 5)
+        spool.append([{"id": 1, "created_at": created}, {"id": 2, "created_at": None}])
+        loaded = []
+        assert SpoolReplayer(spool, loaded.extend, CircuitBreaker("t")).replay_once() == 2
+        assert loaded == [{"id": 1, "created_at": created}, {"id": 2, "created_at": None}]
+        assert spool.pending() == [] and os.listdir(tmp_path) == []
+
+    def test_torn_final_record_is_dropped(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        spool.append([{"id": 1}])
+        spool.seal()
+        with open(spool.pending()[0], "ab") as segment:
+            segment.write(b'{"id": 2')
+        loaded = []
+        SpoolReplayer(spool, loaded.extend, CircuitBreaker("t")).replay_once()
+        assert loaded == [{"id": 1}]
+
+    def test_failed_replay_resumes_from_offset(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        spool.append([{"id": i} for i in range(5)])
+        loaded, fail = [], [False, True]
+
+        def load(rows):
+            if fail.pop(0):
+                raise RuntimeError("database unavailable")
+            loaded.extend(rows)
+
+        breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+        replayer = SpoolReplayer(spool, load, breaker, batch_size=2)
+        assert replayer.replay_once() == 2
+        assert breaker.state == OPEN and len(spool.pending()) == 1
+        fail.extend([False, False])
+        assert replayer.replay_once() == 3  # batches [2, 3] and [4]
+        assert [row["id"] for row in loaded] == [0, 1, 2, 3, 4]
+
+    def test_claimed_segment_is_not_replayed_twice(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        spool.append([{"id": 1}])
+        spool.seal()
+        path = spool.pending()[0]
+        assert spool.claim(path) is not None
+        assert spool.claim(path) is None
+
+    def test_failed_insert_is_spooled_and_replayed(self, tmp_path, monkeypatch, db_driver):
+        import api.main as main
+        from prometheus_client import REGISTRY
+        spool = Spool(str(tmp_path))
+        breaker = CircuitBreaker("database-test", failure_threshold=1, reset_timeout=60)
+        monkeypatch.setattr(main, "SPOOL", spool)
+        monkeypatch.setattr(main, "DB_BREAKER", breaker)
+        name = f"spooled-{uuid.uuid4()}"
+        real_insert = main._insert_rows
+
+        def broken_insert(rows):
+            raise RuntimeError("database unavailable")
+
+        async def broken_insert_async(rows):
+            broken_insert(rows)
+
+        monkeypatch.setattr(main, "_insert_rows", broken_insert)
+        monkeypatch.setattr(main, "_insert_rows_async", broken_insert_async)
+        for _ in range(2):  # the first failure opens the circuit, the second row skips the database
+            assert client.post("/predict", json={**VALID_DATA, "name": name}).status_code == 200
+        assert breaker.state == OPEN
+        assert client.get("/db-status").json()["circuit_state"] == OPEN
+
+        monkeypatch.setattr(main, "_insert_rows", real_insert)
+        pending_inserts = main.TABLE_STATS.snapshot()["inserts_since_reconcile"]
+        replayed = REGISTRY.get_sample_value(
+            'database_operations_total', {'operation': 'replay', 'status': 'success'}
+        ) or 0
+        replayer = SpoolReplayer(spool, main._replay_rows, CircuitBreaker("replay-test"))
+        assert replayer.replay_once() == 2
+        with engine.connect() as conn:
+            stored = conn.execute(select(func.count()).where(user_requests.c.name == name)).scalar()
+        assert stored == 2
+        assert main.TABLE_STATS.snapshot()["inserts_since_reconcile"] == pending_inserts + 2
+        assert REGISTRY.get_sample_value(
+            'database_operations_total', {'operation': 'replay', 'status': 'success'}
+        ) == replayed + 1
+
+    def test_slow_insert_does_not_hold_the_request(self, monkeypatch, db_driver, app_lifespan):
+        import api.main as main
+        release = threading.Event()
+        stored = []
+
+        def slow_write(rows, operation):
+            release.wait(2)
+            stored.extend(rows)
+
+        async def slow_write_async(rows, operation):
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+            stored.extend(rows)
+
+        monkeypatch.setattr(main, "_write_rows", slow_write)
+        monkeypatch.setattr(main, "_write_rows_async", slow_write_async)
+        monkeypatch.setattr(main, "DB_LATENCY_BUDGET_MS", 20)
+        started = time.perf_counter()
+        assert app_lifespan.post("/predict", json=VALID_DATA).status_code == 200
+        assert time.perf_counter() - started < 1.5 and not stored
+        release.set()
+        deadline = time.time() + 2
+        while not stored and time.time() < deadline:
+            time.sleep(0.01)
+        assert stored
+
+
+EVENT_FEATURES = {
+    "fatigue_risk": 1.0, "workload_pressure": 2.0, "work_hours": 8.0, "sleep_hours": 7.0,
+    "work_life_balance_score": 50.0, "health_risk_score": 10.0
+}
+
+
+class TestPredictionLogger:
+    def test_summarize_events(self):
+        events = [(1.0, 0.9, 1.0, 2.0, 8, 7, 50, 10), (0.0, 0.1, 3.0, 4.0, 8, 7, 50, 10)]
+        summary = summarize_events(events)
+        assert summary["predictions/count"] == 2
+        assert summary["predictions/high_risk_count"] == 1
+        assert summary["predictions/risk_probability_mean"] == pytest.approx(0.5)
+        assert summary["predictions/fatigue_risk_mean"] == pytest.approx(2.0)
+        counts, edges = summary["predictions/risk_probability_hist"]
+        assert counts.sum() == 2 and edges[0] == 0.0 and edges[-1] == 1.0
+        assert "predictions/workload_pressure_hist" in summary
+
+    def test_one_summary_per_window(self):
+        summaries = []
+        prediction_logger = PredictionLogger(summaries.append, window_seconds=0.2)
+        prediction_logger.start()
+        for i in range(5):
+            assert prediction_logger.record(i % 2 == 0, 0.5, EVENT_FEATURES)
+        prediction_logger.stop()
+        assert sum(s["predictions/count"] for s in summaries) == 5
+        assert len(summaries) <= 2
+
+    def test_drops_instead_of_blocking_when_logging_is_slow(self):
+        summaries, logging_started, release = [], threading.Event(), threading.Event()
+
+        def slow_log(summary):
+            logging_started.set()
+            release.wait(5)
+            summaries.append(summary)
+
+        prediction_logger = PredictionLogger(slow_log, max_queue=2, window_seconds=0.01)
+        prediction_logger.start()
+        prediction_logger.record(True, 0.9, EVENT_FEATURES)
+        assert logging_started.wait(5)
+
+        started = time.monotonic()
+        accepted = [prediction_logger.record(False, 0.1, EVENT_FEATURES) for _ in range(3)]
+        assert time.monotonic() - started < 0.5
+        assert accepted == [True, True, False]
+
+        release.set()
+        prediction_logger.stop()
+        assert sum(s["predictions/count"] for s in summaries) == 3
+        assert sum(s["predictions/dropped"] for s in summaries) == 1
+
+    def test_predict_enqueues_without_calling_wandb(self, monkeypatch):
+        fake_wandb = MagicMock()
+        prediction_logger = PredictionLogger(MagicMock())
+        monkeypatch.setattr("api.main.ENABLE_WANDB", True)
+        monkeypatch.setattr("api.main.wandb", fake_wandb)
+        monkeypatch.setattr("api.main.PREDICTION_LOGGER", prediction_logger)
+        assert client.post("/predict", json=VALID_DATA).status_code == 200
+        assert prediction_logger.depth == 1
+        fake_wandb.log.assert_not_called()
+
+    def test_summary_histograms_become_wandb_histograms(self, monkeypatch):
+        from api.main import _log_summary_to_wandb
+        fake_wandb = MagicMock()
+        monkeypatch.setattr("api.main.wandb", fake_wandb)
+        _log_summary_to_wandb(summarize_events([(1.0, 0.9, 1.0, 2.0, 8, 7, 50, 10)]))
+        payload = fake_wandb.log.call_args[0][0]
+        assert payload["predictions/count"] == 1
+        assert payload["predictions/fatigue_risk_hist"] is fake_wandb.Histogram.return_value
+
+
+class TestPredictionCache:
+    def test_lru_eviction(self):
+        cache = PredictionCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+    def test_ttl_expiry(self):
+        cache = PredictionCache(max_entries=10, ttl_seconds=0.05)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        time.sleep(0.1)
+        assert cache.get("a") is None
+
+    def test_generation_change_clears(self):
+        cache = PredictionCache(max_entries=10)
+        cache.validate("v1")
+        cache.put("a", 1)
+        cache.validate("v1")
+        assert cache.get("a") == 1
+        cache.validate("v2")
+        assert cache.get("a") is None
+
+    def test_repeat_predict_skips_inference_but_stores(self, mock_model):
+        with engine.connect() as conn:
+            before = len(conn.execute(user_requests.select()).fetchall())
+        first = client.post("/predict", json=VALID_DATA).json()
+        second = client.post("/predict", json=dict(VALID_DATA, name="Other User")).json()
+        assert mock_model.predict.call_count == 1
+        assert second["risk_probability"] == first["risk_probability"]
+        assert second["features"]["name"] == "Other User"
+        with engine.connect() as conn:
+            after = len(conn.execute(user_requests.select()).fetchall())
+        assert after == before + 2
+
+    def test_model_swap_invalidates(self, mock_model, set_model):
+        client.post("/predict", json=VALID_DATA)
+        new_model = MagicMock()
+        new_model.classes_ = np.array([0, 1])
+        new_model.predict.return_value = [1]
+        new_model.predict_proba.return_value = [[0.1, 0.9]]
+        set_model(new_model)
+        data = client.post("/predict", json=VALID_DATA).json()
+        assert data["risk_level"] == "High"
+
+
+class TestStartup:
+    def test_ready_after_lifespan(self):
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+
+    def test_not_ready_before_warm_up(self, monkeypatch):
+        monkeypatch.setattr("api.main.READY", threading.Event())
+        response = client.get("/ready")
+        assert response.status_code == 503
+        # liveness is unaffected
+        assert client.get("/health").status_code == 200
+
+    def test_medians_from_artifact(self, tmp_path, monkeypatch):
+        import api.main
+        medians = tmp_path / "medians.json"
+        medians.write_text('{"work_hours": 7.25, "meetings_count": 4}')
+        monkeypatch.setenv("MEDIANS_PATH", str(medians))
+        monkeypatch.setattr("api.main.MEDIAN_HOURS", None)
+        monkeypatch.setattr("api.main.MEDIAN_MEETINGS", None)
+        api.main._load_medians()
+        assert api.main.MEDIAN_HOURS == 7.25
+        assert api.main.MEDIAN_MEETINGS == 4
+
+    def test_import_does_not_load_pandas_or_model(self):
+        import subprocess
+        import sys
+        code = (
+            "import sys, api.main as m; "
+            "print(m.BUNDLE is None, 'pandas' in sys.modules, 'wandb' in sys.modules)"
+        )
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                             check=True, env=dict(os.environ, ENABLE_WANDB="false"))
+        assert out.stdout.split() == ["True", "False", "False"]
+
+
+@pytest.fixture
+def versioned_models(tmp_path, monkeypatch):
+    """MODEL_ROOT with a freshly trained 'v2' artifact set and a broken 'bad' set"""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    from api.main import MODEL_FEATURES
+
+    x = np.random.RandomState(7).rand(60, 17)
+    y = np.arange(60) % 2
+    for version, names in (("v2", MODEL_FEATURES), ("bad", MODEL_FEATURES[::-1])):
+        version_dir = tmp_path / version
+        version_dir.mkdir()
+        joblib.dump(RandomForestClassifier(n_estimators=3, random_state=1).fit(x, y),
+                    version_dir / "best_model.joblib")
+        joblib.dump(StandardScaler().fit(x), version_dir / "preprocessor.joblib")
+        joblib.dump(list(names), version_dir / "feature_names.joblib")
+
+    monkeypatch.setattr("api.main.MODEL_ROOT", str(tmp_path))
+    monkeypatch.setattr("api.main.ADMIN_TOKEN", "secret")
+    return tmp_path
+
+
+class TestModelReload:
+    def test_admin_disabled_without_token(self, monkeypatch):
+        monkeypatch.setattr("api.main.ADMIN_TOKEN", None)
+        assert client.post("/admin/reload-model").status_code == 403
+
+    def test_wrong_token_rejected(self, versioned_models):
+        response = client.post("/admin/reload-model", headers={"X-Admin-Token": "nope"})
+        assert response.status_code == 401
+
+    def test_reload_swaps_bundle(self, versioned_models):
+        import api.main
+        old_version = api.main.BUNDLE.version
+        response = client.post("/admin/reload-model", json={"version": "v2"},
+                               headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "reloaded"
+        assert body["previous_version"] == old_version
+        assert body["model_version"] != old_version
+
+        data = client.post("/predict", json=VALID_DATA).json()
+        assert data["model_version"] == body["model_version"]
+        assert client.get("/health").json()["model_version"] == body["model_version"]
+
+    def test_failed_validation_keeps_live_bundle(self, versioned_models):
+        import api.main
+        live = api.main.BUNDLE
+        response = client.post("/admin/reload-model", json={"version": "bad"},
+                               headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 422
+        assert api.main.BUNDLE is live
+
+    def test_invalid_version_name(self, versioned_models):
+        response = client.post("/admin/reload-model", json={"version": "../models"},
+                               headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 422
+
+    def test_missing_version(self, versioned_models):
+        response = client.post("/admin/reload-model", json={"version": "v9"},
+                               headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 404
+
+    def test_watcher_detects_change(self, tmp_path):
+        from api.model_bundle import ArtifactWatcher
+        artifact = tmp_path / "model.joblib"
+        artifact.write_bytes(b"v1")
+        changed = threading.Event()
+        watcher = ArtifactWatcher([str(artifact)], changed.set, interval=0.02)
+        watcher.start()
+        time.sleep(0.05)
+        artifact.write_bytes(b"version-2")
+        assert changed.wait(2)
+        watcher.stop()
+
+
+class TestStageLatency:
+    @staticmethod
+    def _count(metric, **labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(f'{metric}_count', labels) or 0
+
+    def test_predict_records_every_stage(self, monkeypatch):
+        import api.main as api_main
+        monkeypatch.setattr("api.main.PREDICTION_CACHE", PredictionCache(max_entries=0))
+        version = api_main.BUNDLE.version
+        stages = ('validation', 'cache_lookup', 'feature_engineering', 'scaling', 'inference', 'db_insert')
+        before = {stage: self._count('prediction_stage_duration_seconds', endpoint='/predict',
+                                     stage=stage, model_version=version) for stage in stages}
+        assert client.post("/predict", json=VALID_DATA).status_code == 200
+        for stage in stages:
+            after = self._count('prediction_stage_duration_seconds', endpoint='/predict',
+                                stage=stage, model_version=version)
+            assert after == before[stage] + 1, stage
+
+    def test_batch_records_stages(self, batch_model):
+        import api.main as api_main
+        labels = dict(endpoint='/predict/batch', stage='inference', model_version=api_main.BUNDLE.version)
+        before = self._count('prediction_stage_duration_seconds', **labels)
+        assert client.post("/predict/batch", json={"records": [VALID_DATA] * 3}).status_code == 200
+        assert self._count('prediction_stage_duration_seconds', **labels) == before + 1
+
+    def test_request_latency_observed_on_errors(self, monkeypatch):
+        monkeypatch.setattr("api.main.BUNDLE", None)
+        labels = dict(method='POST', endpoint='/predict')
+        before = self._count('api_request_duration_seconds', **labels)
+        assert client.post("/predict", json=VALID_DATA).status_code == 503
+        assert self._count('api_request_duration_seconds', **labels) == before + 1
+
+
+class TestDbStatus:
+    def test_reports_cached_estimate_with_staleness(self):
+        data = client.get("/db-status").json()
+        assert data["status"] == "connected" and data["table_exists"] is True
+        assert data["row_count_source"] in ("sqlite max(id)", "exact")
+        assert data["staleness_seconds"] >= 0 and data["reconciled_at"]
+        assert set(data["insert_rate_per_sec"]) == {"1m", "5m"}
+
+    def test_inserts_update_count_without_a_query(self):
+        before = client.get("/db-status").json()
+        assert client.post("/predict", json={**VALID_DATA, "work_hours": 9.75}).status_code == 200
+        after = client.get("/db-status").json()
+        assert after["row_count"] == before["row_count"] + 1
+        assert after["inserts_since_reconcile"] == before["inserts_since_reconcile"] + 1
+        assert after["insert_rate_per_sec"]["1m"] > 0
+
+    def test_exact_count_on_request(self):
+        from sqlalchemy import func, select
+        data = client.get("/db-status", params={"exact": "true"}).json()
+        with engine.connect() as conn:
+            expected = conn.execute(select(func.count()).select_from(user_requests)).scalar()
+        assert data["row_count_source"] == "exact"
+        assert data["row_count"] == expected and data["inserts_since_reconcile"] == 0
+
+    def test_failed_reconcile_keeps_last_baseline(self):
+        estimates = [(100, "test")]
+
+        def estimate():
+            if not estimates:
+                raise RuntimeError("database unavailable")
+            return estimates.pop()
+
+        stats = TableStats("t", estimate)
+        assert stats.reconcile()
+        stats.record_inserts(5)
+        assert not stats.reconcile()
+        snapshot = stats.snapshot()
+        assert snapshot["row_count"] == 105 and snapshot["last_error"] == "database unavailable"
+        assert snapshot["insert_rate_per_sec"]["1m"] == pytest.approx(5 / 60)
+
+
+class TestDatabaseDrivers:
+    def _operations(self, status):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value('database_operations_total', {'operation': 'insert', 'status': status}) or 0
+
+    def test_predict_stores_row(self, db_driver):
+        name = f"{db_driver}-{uuid.uuid4()}"
+        before = self._operations('success')
+        assert client.post("/predict", json={**VALID_DATA, "name": name}).status_code == 200
+        with engine.connect() as conn:
+            stored = conn.execute(select(func.count()).where(user_requests.c.name == name)).scalar()
+        assert stored == 1
+        assert self._operations('success') == before + 1
+
+    def test_db_status_exact_count(self, db_driver):
+        data = client.get("/db-status", params={"exact": "true"}).json()
+        with engine.connect() as conn:
+            expected = conn.execute(select(func.count()).select_from(user_requests)).scalar()
+        assert data["status"] == "connected" and data["row_count_source"] == "exact"
+        assert data["row_count"] == expected
+
+
+class TestRollups:
+    def setup_method(self):
+        rollups.rebuild_rollups(engine, user_requests)
+
+    def test_inserts_update_rollups_incrementally(self):
+        user_id = f"rollup-user-{uuid.uuid4().hex[:8]}"
+        before = client.get("/stats").json()
+        for hours in (2.0, 12.0):
+            response = client.post("/predict", json={**VALID_DATA, "user_id": user_id, "work_hours": hours})
+            assert response.status_code == 200
+        after = client.get("/stats").json()
+        assert after["records"] == before["records"] + 2
+        assert after["users"] == before["users"] + 1
+
+        user = client.get(f"/stats/users/{user_id}").json()
+        assert user["records"] == 2 and user["name"] == "Test User"
+        assert user["avg_work_hours"] == pytest.approx(7.0)
+        assert user["high_workload_rate"] == 0.5
+        assert user["first_seen"] <= user["last_seen"]
+        daily = client.get("/stats/daily", params={"days": 1}).json()["days"]
+        assert len(daily) == 1 and daily[0]["records"] >= 2
+
+    def test_bulk_insert_matches_rebuild(self, batch_model):
+        records = [{**VALID_DATA, "user_id": f"rollup-bulk-{i % 3}", "sleep_hours": 5 + i} for i in range(6)]
+        assert client.post("/predict/batch", json={"records": records}).status_code == 200
+        incremental = client.get("/stats/users", params={"limit": 1000, "order_by": "records"}).json()["users"]
+        overview = client.get("/stats").json()
+        daily = client.get("/stats/daily").json()
+
+        rollups.rebuild_rollups(engine, user_requests)
+        assert client.get("/stats").json() == overview
+        assert client.get("/stats/daily").json() == daily
+        rebuilt = client.get("/stats/users", params={"limit": 1000, "order_by": "records"}).json()["users"]
+        assert {u["user_id"]: u["records"] for u in rebuilt} == {u["user_id"]: u["records"] for u in incremental}
+        bulk = {u["user_id"]: u for u in rebuilt if u["user_id"].startswith("rollup-bulk-")}
+        assert bulk["rollup-bulk-0"]["avg_sleep_hours"] == pytest.approx(6.5)
+        assert {u["user_id"]: u["high_risk_rate"] for u in rebuilt} == \
+            {u["user_id"]: u["high_risk_rate"] for u in incremental}
+        assert overview["high_risk_rate"] > 0
+
+    def test_rebuild_keeps_the_latest_name(self):
+        import api.main as api_main
+        user_id = f"rollup-name-{uuid.uuid4().hex[:8]}"
+        base = {name: 1 for name in api_main.MODEL_FEATURES + api_main.DERIVED_METRICS}
+        # stored out of created_at order, as spool replays are
+        for day, name in ((3, "Newest"), (1, "Oldest"), (4, None), (2, "Middle")):
+            api_main._insert_rows([{**base, "user_id": user_id, "name": name, "created_at": datetime(2026, 1, day)}])
+        incremental = client.get(f"/stats/users/{user_id}").json()
+        assert incremental["name"] == "Newest"
+
+        rollups.rebuild_rollups(engine, user_requests)
+        assert client.get(f"/stats/users/{user_id}").json() == incremental
+
+    def test_shards_are_summed_on_read(self, monkeypatch):
+        before = client.get("/stats").json()
+        days_before = client.get("/stats/daily", params={"days": 1}).json()["days"]
+        shards = iter(range(3))
+        monkeypatch.setattr(rollups.random, "randrange", lambda _n: next(shards))
+        for _ in range(3):
+            assert client.post("/predict", json=VALID_DATA).status_code == 200
+        with engine.connect() as conn:
+            used = conn.execute(select(rollups.rollup_global.c.id).where(rollups.rollup_global.c.id < 3)).all()
+        assert len(used) == 3
+        assert client.get("/stats").json()["records"] == before["records"] + 3
+        days = client.get("/stats/daily", params={"days": 1}).json()["days"]
+        assert days[0]["records"] == (days_before[0]["records"] if days_before else 0) + 3
+
+    def test_unsharded_day_rollup_is_recreated(self, tmp_path):
+        legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with legacy.begin() as conn:
+            conn.execute(text("CREATE TABLE rollup_day (day DATE PRIMARY KEY, record_count INTEGER)"))
+        assert rollups.create_schema(legacy)
+        assert 'shard' in {column['name'] for column in inspect(legacy).get_columns('rollup_day')}
+        assert not rollups.create_schema(legacy)
+
+    def test_user_listing_and_errors(self):
+        client.post("/predict", json={**VALID_DATA, "user_id": "rollup-user-2", "work_hours": 11.9})
+        users = client.get("/stats/users", params={"limit": 2}).json()
+        assert users["order_by"] == "avg_health_risk_score" and len(users["users"]) <= 2
+        scores = [u["avg_health_risk_score"] for u in users["users"]]
+        assert scores == sorted(scores, reverse=True)
+        assert client.get("/stats/users", params={"order_by": "name"}).status_code == 422
+        assert client.get("/stats/users/nobody-here").status_code == 404
+
+
+class TestUserHistory:
+    def _store(self, count):
+        user_id = f"history-{uuid.uuid4().hex[:8]}"
+        records = [{**VALID_DATA, "user_id": user_id, "work_hours": 6 + i} for i in range(count)]
+        assert client.post("/predict/batch", json={"records": records}).status_code == 200
+        return user_id
+
+    def _pages(self, user_id, **params):
+        pages, cursor = [], None
+        while True:
+            response = client.get(f"/users/{user_id}/history", params={**params, **({"cursor": cursor} if cursor else {})})
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = pages[-1]["next_cursor"]
+            if cursor is None:
+                return pages
+
+    def test_keyset_pages_cover_every_row_once(self, batch_model):
+        # one batch shares created_at, so ordering and seeking fall back to id
+        user_id = self._store(5)
+        pages = self._pages(user_id, limit=2)
+        assert [len(page["items"]) for page in pages] == [2, 2, 1]
+        ids = [item["id"] for page in pages for item in page["items"]]
+        assert ids == sorted(ids, reverse=True) and len(set(ids)) == 5
+        assert [item["work_hours"] for item in pages[0]["items"]] == [10.0, 9.0]
+
+    def test_page_streamed_in_several_reads(self, monkeypatch, batch_model):
+        import api.main
+        user_id = self._store(7)
+        monkeypatch.setattr(api.main, "HISTORY_FETCH_SIZE", 2)
+        page = client.get(f"/users/{user_id}/history", params={"limit": 5}).json()
+        assert len(page["items"]) == 5 and page["next_cursor"]
+        rest = client.get(f"/users/{user_id}/history", params={"cursor": page["next_cursor"]}).json()
+        assert len(rest["items"]) == 2 and rest["next_cursor"] is None
+        assert client.get("/users/nobody-here/history").json() == {
+            "user_id": "nobody-here", "fields": page["fields"], "items": [], "next_cursor": None
+        }
+
+    def test_field_projection(self):
+        from api.history import INPUT_FIELDS
+        user_id = self._store(1)
+        item = client.get(f"/users/{user_id}/history", params={"fields": "inputs"}).json()["items"][0]
+        assert list(item) == ["id", "created_at", *INPUT_FIELDS]
+        item = client.get(f"/users/{user_id}/history", params={"fields": "sleep_hours,health_risk_score"}).json()
+        assert item["fields"] == ["id", "created_at", "sleep_hours", "health_risk_score"]
+        assert client.get(f"/users/{user_id}/history", params={"fields": "password"}).status_code == 422
+        assert client.get(f"/users/{user_id}/history", params={"cursor": "not-a-cursor"}).status_code == 422
+
+    def test_composite_index_exists(self):
+        from sqlalchemy import inspect
+        indexes = {index["name"]: index["column_names"] for index in inspect(engine).get_indexes("user_requests")}
+        assert indexes["idx_user_requests_user_history"] == ["user_id", "created_at", "id"]
+
+
 class TestMetricsEndpoint:
     def test_metrics_endpoint(self):
         response = client.get("/metrics")
         assert response.status_code == 200
 
+    def test_worker_memory_is_reported(self):
+        body = client.get("/metrics").text
+        assert f'worker_memory_bytes{{kind="rss",pid="{os.getpid()}"}}' in body
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
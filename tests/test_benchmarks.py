@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# File: tests/test_benchmarks.py
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import benchmark_hotpath  # noqa: E402
+import benchmark_load  # noqa: E402
+import benchmark_protocols  # noqa: E402
+import benchmark_storage  # noqa: E402
+
+
+def _scenario(p50, p95, p99, error_rate=0.0):
+    return {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'error_rate': error_rate}
+
+
+class TestLoadBenchmark:
+    def test_percentiles_and_summary(self):
+        latencies = [i / 1000 for i in range(1, 101)]
+        stats = benchmark_load.summarize(latencies, errors=5, elapsed=2.0)
+        assert stats['requests'] == 100 and stats['error_rate'] == 0.05
+        assert stats['throughput_rps'] == 50.0
+        assert stats['p50_ms'] == pytest.approx(50)
+        assert stats['p95_ms'] == pytest.approx(95)
+        assert stats['p99_ms'] == pytest.approx(99)
+        assert benchmark_load.summarize([], 0, 1.0)['p99_ms'] == 0.0
+
+    def test_compare_flags_latency_and_error_regressions(self):
+        baseline = {'scenarios': {
+            'predict c=8': _scenario(10, 20, 30),
+            'health c=1': _scenario(1, 2, 3),
+            'metrics c=1': _scenario(5, 6, 7),
+        }}
+        current = {'scenarios': {
+            'predict c=8': _scenario(10.5, 26, 30),
+            'health c=1': _scenario(1, 2, 3, error_rate=0.2),
+        }}
+        regressions = benchmark_load.compare_results(baseline, current, threshold=0.1)
+        assert len(regressions) == 2
+        assert regressions[0].startswith('predict c=8: p95_ms')
+        assert regressions[1].startswith('health c=1: error_rate')
+        assert benchmark_load.compare_results(baseline, baseline, threshold=0.1) == []
+
+    def test_payloads_are_valid_predict_bodies(self):
+        from api.main import UserData
+        payloads = benchmark_load.load_payloads('data/work_from_home_burnout_dataset.csv', 50)
+        assert len(payloads) == 50
+        assert len({p['user_id'] for p in payloads}) == 50
+        for payload in payloads:
+            UserData(**payload)
+
+
+class TestHotPathBenchmark:
+    @pytest.mark.parametrize("size", [1, 3])
+    def test_every_stage_runs(self, size):
+        import api.main
+        from api.model_bundle import load_bundle
+        bundle = load_bundle('models/best_model.joblib', 'models/preprocessor.joblib',
+                             'models/feature_names.joblib', api.main.MODEL_FEATURES, backend='compiled')
+        records = benchmark_hotpath.load_records('data/work_from_home_burnout_dataset.csv', size)
+        stages = benchmark_hotpath.build_stages(api.main, bundle, records)
+        assert set(stages) == set(benchmark_hotpath.STAGES)
+        for stage in stages.values():
+            stage()
+
+    def test_compare_flags_slower_stages(self):
+        def result(median_s):
+            return {'stages': {'validation': {'1': {'median_s': median_s}}}}
+        assert benchmark_hotpath.compare_results(result(1e-5), result(1.1e-5), threshold=0.2) == []
+        regressions = benchmark_hotpath.compare_results(result(1e-5), result(2e-5), threshold=0.2)
+        assert regressions == ["validation n=1: 10.0us -> 20.0us (+100%)"]
+
+
+class TestProtocolBenchmark:
+    @pytest.mark.parametrize("size", [1, 3])
+    def test_protocols_agree(self, size):
+        import api.main
+        from api import columnar
+        from api.model_bundle import load_bundle
+        if not columnar.available():
+            pytest.skip("msgpack is not installed")
+        bundle = load_bundle('models/best_model.joblib', 'models/preprocessor.joblib',
+                             'models/feature_names.joblib', api.main.MODEL_FEATURES)
+        records = benchmark_hotpath.load_records('data/work_from_home_burnout_dataset.csv', size)
+        protocols = benchmark_protocols.build_protocols(api.main, bundle, records)
+        assert set(protocols) == ({'json_batch', 'columnar', 'json_predict'} if size == 1 else {'json_batch', 'columnar'})
+
+        handler, body = protocols['json_batch']
+        expected = [p['risk_probability'] for p in json.loads(handler(body))['predictions']]
+        handler, body = protocols['columnar']
+        assert columnar.decode_response(handler(body))['risk_probability'].tolist() == pytest.approx(expected)
+
+
+class TestStorageBenchmark:
+    def test_compact_mode_writes_narrower_rows(self, tmp_path):
+        import api.main
+        rows = benchmark_storage.build_rows(
+            api.main, benchmark_hotpath.load_records('data/work_from_home_burnout_dataset.csv', 300)
+        )
+        results = {
+            mode: benchmark_storage.run_mode(api.main, mode, rows, 20, 100, str(tmp_path))
+            for mode in benchmark_storage.MODES
+        }
+        assert results['compact']['columns'] < results['wide']['columns']
+        assert results['compact']['table_bytes'] < results['wide']['table_bytes']
+        assert all(result['bulk_rows_per_s'] > 0 and result['wal_bytes'] > 0 for result in results.values())
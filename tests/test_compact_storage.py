@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# File: tests/test_compact_storage.py
+
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, MetaData, Table, create_engine, func, inspect, select
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import migrate_compact_storage  # noqa: E402
+import api.main as api_main  # noqa: E402
+from api import compact_storage  # noqa: E402
+from api.features import DERIVED_METRICS, MODEL_FEATURES, compute_features  # noqa: E402
+
+client = TestClient(api_main.app)
+
+VALID_DATA = {
+    "work_hours": 9.5, "screen_time_hours": 11.0, "meetings_count": 6, "breaks_taken": 1,
+    "after_hours_work": 1, "sleep_hours": 5.5, "task_completion_rate": 70.0, "day_type": "Weekday",
+}
+
+
+def _random_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'work_hours': rng.uniform(0, 24, n), 'screen_time_hours': rng.uniform(0, 24, n),
+        'meetings_count': rng.integers(0, 21, n).astype(float), 'breaks_taken': rng.integers(0, 11, n).astype(float),
+        'after_hours_work': rng.integers(0, 2, n).astype(float), 'sleep_hours': rng.uniform(0, 12, n),
+        'task_completion_rate': rng.uniform(0, 100, n), 'is_weekday': rng.integers(0, 2, n).astype(float),
+    }
+
+
+def _wide_rows(n, seed=0):
+    """`user_requests` rows as the API builds them"""
+    columns = _random_inputs(n, seed)
+    _, all_cols = api_main.engineer_feature_columns(columns)
+    probabilities = np.linspace(0, 1, n)
+    return api_main._build_column_rows(
+        all_cols, [f"user-{i % 3}" for i in range(n)], [None] * n, datetime(2026, 1, 1, 12),
+        (probabilities > 0.5).astype(int), probabilities, 'test'
+    )
+
+
+@pytest.fixture
+def compact_mode(monkeypatch):
+    """Serve the API from compact storage on the test database"""
+    compact_storage.create_schema(api_main.engine)
+    monkeypatch.setattr(api_main, "REQUESTS_TABLE", compact_storage.user_requests_compact)
+    monkeypatch.setattr(api_main, "REQUESTS_READ", compact_storage.user_requests_expanded)
+
+
+class TestExpandedView:
+    def test_view_matches_feature_engineering(self):
+        engine = create_engine('sqlite://')
+        compact_storage.create_schema(engine)
+        columns = _random_inputs(300)
+        expected = compute_features(columns, 8.0, 3.0)
+        rows = [{name: values[i].item() for name, values in columns.items()} for i in range(300)]
+        for row, flag in zip(rows, expected['high_workload_flag'].tolist()):
+            row['high_workload_flag'] = flag
+        view = compact_storage.user_requests_expanded
+        with engine.begin() as conn:
+            conn.execute(compact_storage.user_requests_compact.insert(), rows)
+            stored = conn.execute(select(view).order_by(view.c.id)).mappings().all()
+        for name in MODEL_FEATURES + DERIVED_METRICS:
+            assert [row[name] for row in stored] == pytest.approx(np.asarray(expected[name], float).tolist()), name
+
+    def test_compact_table_keeps_only_inputs_and_outcomes(self):
+        columns = set(compact_storage.user_requests_compact.c.keys())
+        assert columns.isdisjoint(set(DERIVED_METRICS + MODEL_FEATURES[8:]) - {'high_workload_flag'})
+        assert {'model_version', 'risk_prediction', 'risk_probability'} <= columns
+        assert set(compact_storage.EXPANDED_COLUMNS) >= set(api_main.user_requests.c.keys())
+
+
+class TestCompactStorageMode:
+    def test_predict_writes_compact_row(self, compact_mode, db_driver):
+        name = f"compact-{uuid.uuid4()}"
+        response = client.post("/predict", json={**VALID_DATA, "name": name})
+        assert response.status_code == 200
+        body = response.json()
+        compact = compact_storage.user_requests_compact
+        view = compact_storage.user_requests_expanded
+        with api_main.engine.connect() as conn:
+            stored = conn.execute(select(compact).where(compact.c.name == name)).mappings().one()
+            expanded = conn.execute(select(view).where(view.c.name == name)).mappings().one()
+        assert stored['model_version'] == body['model_version']
+        assert stored['risk_probability'] == pytest.approx(body['risk_probability'])
+        for metric in ('health_risk_score', 'work_life_balance_score', 'poor_recovery_flag'):
+            assert expanded[metric] == pytest.approx(body['features'][metric])
+
+    def test_history_reads_the_view(self, compact_mode, batch_model):
+        user_id = f"compact-{uuid.uuid4()}"
+        records = [{**VALID_DATA, "user_id": user_id, "work_hours": 6.0 + i} for i in range(3)]
+        assert client.post("/predict/batch", json={"records": records}).status_code == 200
+        items = client.get(f"/users/{user_id}/history").json()["items"]
+        assert [item["work_hours"] for item in items] == [8.0, 7.0, 6.0]
+        assert all(item["risk_probability"] == pytest.approx(0.7) for item in items)
+        assert all(item["health_risk_score"] is not None for item in items)
+
+
+class TestMigration:
+    def test_round_trip_keeps_ids_and_metrics(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+        api_main.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(api_main.user_requests.insert(), _wide_rows(25))
+            wide = conn.execute(select(api_main.user_requests).order_by(api_main.user_requests.c.id)).all()
+
+        assert migrate_compact_storage.migrate(engine, 'compact', batch_size=10) == 25
+        assert migrate_compact_storage.migrate(engine, 'compact', batch_size=10) == 0
+        migrate_compact_storage.migrate(engine, 'compact', drop_source=True)
+        assert not inspect(engine).has_table('user_requests')
+
+        assert migrate_compact_storage.migrate(engine, 'wide', batch_size=7) == 25
+        with engine.connect() as conn:
+            restored = conn.execute(select(api_main.user_requests).order_by(api_main.user_requests.c.id)).all()
+            compact_count = conn.execute(
+                select(func.count()).select_from(compact_storage.user_requests_compact)
+            ).scalar()
+        assert compact_count == 25
+        for before, after in zip(wide, restored):
+            assert before._mapping['id'] == after._mapping['id']
+            for name in MODEL_FEATURES + DERIVED_METRICS:
+                assert after._mapping[name] == pytest.approx(before._mapping[name]), name
+
+    def test_outcomes_are_copied_and_missing_columns_added(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'outcome.db'}")
+        # a wide table from before it recorded predictions
+        legacy = Table('user_requests', MetaData(), *(
+            Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+            for column in api_main.user_requests.c if column.name not in compact_storage.OUTCOME_COLUMNS
+        ))
+        legacy.create(engine)
+        with engine.begin() as conn:
+            conn.execute(legacy.insert(), _wide_rows(1))
+        migrate_compact_storage.migrate(engine, 'compact')
+        with engine.begin() as conn:
+            conn.execute(api_main.user_requests.insert(), _wide_rows(2)[1:])
+        migrate_compact_storage.migrate(engine, 'compact')
+        compact = compact_storage.user_requests_compact
+        with engine.connect() as conn:
+            outcomes = conn.execute(
+                select(compact.c.model_version, compact.c.risk_probability).order_by(compact.c.id)
+            ).all()
+        assert outcomes == [(None, None), ('test', 1.0)]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# File: tests/test_features.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.features import (
+    DERIVED_METRICS, INPUT_FEATURES, MODEL_FEATURES, compute_features, engineer_columns,
+    feature_matrix, frame_columns
+)
+
+MEDIAN_HOURS = 8.0
+MEDIAN_MEETINGS = 3.0
+
+
+def _reference_frame_features(df):
+    """The pandas formulas the training scripts used before the shared module"""
+    df = df.copy()
+    df['work_intensity_ratio'] = df['screen_time_hours'] / (df['work_hours'] + 0.1)
+    df['meeting_burden'] = df['meetings_count'] / (df['work_hours'] + 0.1)
+    df['break_adequacy'] = df['breaks_taken'] / (df['work_hours'] + 0.1)
+    df['sleep_deficit'] = 8 - df['sleep_hours']
+    df['recovery_index'] = (df['sleep_hours'] + df['breaks_taken']) - df['screen_time_hours']
+    df['fatigue_risk'] = df['screen_time_hours'] - (df['sleep_hours'] * 1.5)
+    df['workload_pressure'] = df['work_hours'] + (df['meetings_count'] * 0.25) + df['after_hours_work']
+    df['task_efficiency'] = df['task_completion_rate'] / (df['work_hours'] + 0.1)
+    df['work_life_balance_score'] = np.clip(
+        ((df['sleep_hours'] / 8) * 30 + (df['breaks_taken'] / 5) * 30
+         - (df['work_hours'] / 10) * 20 - df['after_hours_work'] * 10) * 2,
+        0, 100
+    )
+    df['is_weekday'] = (df['day_type'] == 'Weekday').astype(int)
+    return df
+
+
+def _reference_scalar_features(work_hours, screen_time, meetings, breaks, after_hours, sleep, task_rate):
+    """The scalar derived-metric formulas the API and dashboard used"""
+    fatigue_risk = screen_time - (sleep * 1.5)
+    recovery_index = (sleep + breaks) - screen_time
+    return {
+        'screen_time_per_meeting': screen_time / (meetings + 0.1),
+        'work_hours_productivity': task_rate * (1 - (work_hours / 15)),
+        'health_risk_score': np.clip((1 - (sleep / 8)) * 40 + max(0, fatigue_risk) * 10, 0, 100),
+        'after_hours_work_hours_est': after_hours * (work_hours * 0.1),
+        'high_workload_flag': int((work_hours > MEDIAN_HOURS) and (meetings > MEDIAN_MEETINGS)),
+        'poor_recovery_flag': int((sleep < 6) and (recovery_index < 0)),
+    }
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return pd.read_csv('data/work_from_home_burnout_dataset.csv')
+
+
+class TestFeatureParity:
+    def test_matrix_matches_training_formulas(self, dataset):
+        expected = _reference_frame_features(dataset)[MODEL_FEATURES].to_numpy(float)
+        matrix, _ = engineer_columns(frame_columns(dataset), MEDIAN_HOURS, MEDIAN_MEETINGS)
+        assert matrix.shape == (len(dataset), len(MODEL_FEATURES))
+        np.testing.assert_allclose(matrix, expected, rtol=1e-12)
+
+    def test_derived_metrics_match_scalar_formulas(self, dataset):
+        _, columns = engineer_columns(frame_columns(dataset), MEDIAN_HOURS, MEDIAN_MEETINGS)
+        for index in range(0, len(dataset), 37):
+            row = dataset.iloc[index]
+            expected = _reference_scalar_features(*(row[name] for name in INPUT_FEATURES[:-1]))
+            for name in DERIVED_METRICS:
+                assert columns[name][index] == pytest.approx(expected[name])
+
+    def test_scalar_and_columnar_paths_agree(self, dataset):
+        columns = frame_columns(dataset.head(50))
+        matrix, all_columns = engineer_columns(columns, MEDIAN_HOURS, MEDIAN_MEETINGS)
+        for index in range(50):
+            inputs = {name: float(columns[name][index]) for name in INPUT_FEATURES}
+            features = compute_features(inputs, MEDIAN_HOURS, MEDIAN_MEETINGS)
+            np.testing.assert_allclose(feature_matrix(features)[0], matrix[index], rtol=1e-12)
+            for name in DERIVED_METRICS:
+                assert features[name] == pytest.approx(all_columns[name][index])
+
+    def test_scalar_path_returns_python_numbers(self):
+        inputs = dict(zip(INPUT_FEATURES, (12.0, 14.0, 6, 1, 1, 4.0, 70.0, 0)))
+        features = compute_features(inputs, MEDIAN_HOURS, MEDIAN_MEETINGS)
+        assert features['high_workload_flag'] == 1 and features['poor_recovery_flag'] == 1
+        assert isinstance(features['high_workload_flag'], int)
+        assert isinstance(features['health_risk_score'], float)
+        assert features['work_life_balance_score'] == 0.0
+
+    def test_fills_preallocated_matrix(self, dataset):
+        columns = frame_columns(dataset.head(10))
+        out = np.full((20, len(MODEL_FEATURES)), np.nan)
+        matrix, _ = engineer_columns(columns, MEDIAN_HOURS, MEDIAN_MEETINGS, out=out[5:15])
+        assert np.shares_memory(matrix, out)
+        assert not np.isnan(out[5:15]).any()
+        assert np.isnan(out[:5]).all() and np.isnan(out[15:]).all()
+
+    def test_day_type_is_case_insensitive(self):
+        frame = pd.DataFrame({name: [1.0, 1.0] for name in INPUT_FEATURES[:-1]})
+        frame['day_type'] = ['weekday', 'WEEKEND']
+        assert frame_columns(frame)['is_weekday'].tolist() == [1.0, 0.0]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# File: tests/test_score_batch.py
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import score_batch  # noqa: E402
+from api.features import INPUT_BOUNDS, INTEGER_INPUTS  # noqa: E402
+from api.main import DERIVED_METRICS, MODEL_FEATURES, UserData, engineer_features  # noqa: E402
+from api.model_bundle import load_bundle  # noqa: E402
+
+ARTIFACTS = ('models/best_model.joblib', 'models/preprocessor.joblib', 'models/feature_names.joblib')
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    frame = pd.read_csv('data/work_from_home_burnout_dataset.csv', nrows=25)
+    # the raw dataset has a few completion rates above 100, which the API rejects
+    frame['task_completion_rate'] = frame['task_completion_rate'].clip(upper=100)
+    frame.loc[3, 'sleep_hours'] = 40
+    frame.loc[7, 'day_type'] = 'Holiday'
+    frame['meetings_count'] = frame['meetings_count'].astype(float)
+    frame.loc[11, 'meetings_count'] = 2.5
+    path = tmp_path / "input.csv"
+    frame.to_csv(path, index=False)
+    return path
+
+
+class TestScoreBatch:
+    def test_scores_file_in_order(self, input_csv, tmp_path):
+        output = tmp_path / "scored.csv"
+        stats = score_batch.score_file(str(input_csv), str(output), 2, 10, *ARTIFACTS)
+        assert stats['rows'] == 25 and stats['invalid_rows'] == 3
+
+        scored = pd.read_csv(output)
+        source = pd.read_csv(input_csv)
+        assert list(scored['user_id']) == list(source['user_id'])
+        for name in MODEL_FEATURES + DERIVED_METRICS + ['risk_probability', 'risk_level', 'error']:
+            assert name in scored.columns
+        assert "sleep_hours" in scored.loc[3, 'error']
+        assert "day_type" in scored.loc[7, 'error']
+        assert scored.loc[11, 'error'] == "meetings_count must be integers between 0 and 20"
+        assert scored['risk_level'].notna().sum() == 22
+
+    def test_parquet_chunks_with_different_error_mixes(self, input_csv, tmp_path):
+        pytest.importorskip('pyarrow')
+        frame = pd.read_csv(input_csv)
+        frame.loc[3, 'sleep_hours'] = 5.0
+        frame.loc[15:, 'sleep_hours'] = 40  # chunks of 5: all valid, mixed (rows 7, 11), all invalid
+        path = tmp_path / "mixed.csv"
+        frame.to_csv(path, index=False)
+        output = tmp_path / "scored.parquet"
+        stats = score_batch.score_file(str(path), str(output), 1, 5, *ARTIFACTS)
+        assert stats['rows'] == 25 and stats['invalid_rows'] == 12
+
+        scored = pd.read_parquet(output)
+        assert len(scored) == 25 and scored['error'].notna().sum() == 12
+        assert scored['risk_level'].iloc[:5].notna().all() and scored['risk_level'].iloc[15:].isna().all()
+        assert list(scored['user_id']) == [str(user_id) for user_id in frame['user_id']]
+
+    def test_matches_api_scoring(self, input_csv, tmp_path):
+        output = tmp_path / "scored.csv"
+        score_batch.score_file(str(input_csv), str(output), 1, 100, *ARTIFACTS)
+        scored = pd.read_csv(output)
+        bundle = load_bundle(*ARTIFACTS, MODEL_FEATURES)
+
+        row = pd.read_csv(input_csv).iloc[0]
+        record = UserData(**{k: row[k] for k in score_batch.INPUT_COLUMNS}, user_id=str(row['user_id']))
+        features, all_features = engineer_features(record)
+        expected = bundle.model.predict_proba(bundle.scaler.transform(features))[0][1]
+        assert scored.loc[0, 'risk_probability'] == pytest.approx(expected)
+        for name in MODEL_FEATURES + DERIVED_METRICS:
+            assert scored.loc[0, name] == pytest.approx(np.float64(all_features[name]))
+
+    def test_does_not_import_the_api(self):
+        code = "import sys; import score_batch; print('api.main' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], cwd="scripts", capture_output=True, text=True,
+                                check=True)
+        assert result.stdout.strip() == "False"
+
+    def test_limits_match_user_data(self):
+        integers = {name for name in INPUT_BOUNDS if UserData.model_fields[name].annotation is int}
+        assert integers == set(INTEGER_INPUTS)
+        with pytest.raises(ValueError):
+            UserData(**{**dict.fromkeys(INPUT_BOUNDS, 1), 'work_hours': 25, 'day_type': 'Weekday', 'name': 'x'})
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# File: tests/test_storage.py
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import backfill_rollups  # noqa: E402
+import data_ingestion  # noqa: E402
+from api import rollups, storage  # noqa: E402
+
+
+def _sample(name, label):
+    return REGISTRY.get_sample_value(name, {'database': label})
+
+
+class TestStorageEngine:
+    def test_sqlite_file_gets_wal_and_a_sized_pool(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'store.db'}"
+        engine = storage.get_engine(url, pool_size=2, max_overflow=1)
+        assert storage.get_engine(url) is engine
+        assert isinstance(engine.pool, QueuePool) and engine.pool.size() == 2
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        engine.dispose()
+
+    def test_pool_metrics(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'metrics.db'}"
+        label = f"sqlite:{tmp_path / 'metrics.db'}"
+        engine = storage.create_storage_engine(url, storage.StorageConfig(pool_size=2))
+        with engine.connect():
+            with engine.connect():
+                assert _sample('db_pool_connections_in_use', label) == 2
+        assert _sample('db_pool_connections_in_use', label) == 0
+        assert _sample('db_pool_checkout_wait_seconds_count', label) == 2
+        assert _sample('db_pool_checkout_waiting', label) == 0
+        engine.dispose()
+
+    def test_env_configuration(self, monkeypatch):
+        monkeypatch.setenv('DB_POOL_SIZE', '12')
+        monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+        monkeypatch.setenv('SQLITE_JOURNAL_MODE', 'delete')
+        config = storage.StorageConfig.from_env()
+        assert config.pool_size == 12 and config.max_overflow == 10
+        assert config.pool_pre_ping is False and config.sqlite_journal_mode == 'DELETE'
+
+    def test_memory_sqlite_keeps_default_pool(self):
+        engine = storage.create_storage_engine('sqlite://')
+        assert not isinstance(engine.pool, QueuePool)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+
+    def test_forked_process_gets_its_own_engine(self, tmp_path, monkeypatch):
+        url = f"sqlite:///{tmp_path / 'fork.db'}"
+        parent = storage.get_engine(url)
+        monkeypatch.setattr(storage.os, 'getpid', lambda: -1)
+        child = storage.get_engine(url)
+        assert child is not parent and storage.get_engine(url) is child
+
+    def test_async_urls_map_to_sync_drivers(self):
+        assert storage.is_async_url('sqlite+aiosqlite:///./x.db')
+        assert storage.is_async_url('postgresql+asyncpg://u:p@host/db')
+        assert not storage.is_async_url('postgresql://u:p@host/db')
+        assert storage.sync_url('sqlite+aiosqlite:///./x.db') == 'sqlite+pysqlite:///./x.db'
+        assert storage.sync_url('postgresql+asyncpg://u:p@host/db') == 'postgresql+psycopg2://u:p@host/db'
+        assert storage.sync_url('sqlite:///./x.db') == 'sqlite:///./x.db'
+        assert storage.sync_url('postgresql+asyncpg://h/db?ssl=require') == 'postgresql+psycopg2://h/db?sslmode=require'
+        asyncpg = storage._asyncpg_url(storage.make_url('postgresql+asyncpg://h/db?sslmode=require&channel_binding=require'))
+        assert dict(asyncpg.query) == {'ssl': 'require'}
+
+    def test_async_engine_gets_the_same_tuning(self, tmp_path):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'async.db'}"
+        label = f"sqlite:{tmp_path / 'async.db'}"
+        engine = storage.get_async_engine(url, pool_size=2)
+        assert storage.get_async_engine(url) is engine
+        assert isinstance(engine.sync_engine.pool, storage.InstrumentedQueuePool)
+
+        async def check():
+            async with engine.connect() as conn:
+                assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == 'wal'
+                assert _sample('db_pool_connections_in_use', label) == 1
+            await storage.dispose_async_engines()
+
+        asyncio.run(check())
+        assert _sample('db_pool_checkout_wait_seconds_count', label) == 1
+
+    def test_sync_and_async_engines_are_cached_apart(self, tmp_path):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'kinds.db'}"
+        async_engine = storage.get_async_engine(url)
+        engine = storage.get_engine(storage.sync_url(url))
+        assert isinstance(engine, Engine) and engine is not async_engine.sync_engine
+        assert storage.get_async_engine(url) is async_engine
+        asyncio.run(storage.dispose_async_engines())
+
+    def test_backfill_runs_against_an_async_url(self, tmp_path):
+        import api.main as api_main
+        url = f"sqlite+aiosqlite:///{tmp_path / 'backfill.db'}"
+        engine = storage.get_engine(storage.sync_url(url))
+        api_main.metadata.create_all(engine)
+        row = {name: 1.0 for name in api_main.MODEL_FEATURES + api_main.DERIVED_METRICS}
+        with engine.begin() as conn:
+            conn.execute(api_main.user_requests.insert(), [
+                {**row, 'user_id': f"u{i}", 'name': None, 'created_at': datetime(2026, 1, 1)} for i in range(3)
+            ])
+        # what api.main does with DB_ASYNC
+        storage.get_async_engine(url)
+        backfill_rollups.main(['--database-url', url])
+        with engine.connect() as conn:
+            assert conn.execute(rollups.sum_shards(rollups.rollup_global)).one().record_count == 3
+            assert conn.execute(select(func.count()).select_from(rollups.rollup_user)).scalar() == 3
+        asyncio.run(storage.dispose_async_engines())
+
+
+class TestRecordRollups:
+    STATISTICS = text("SELECT * FROM burnout_statistics")
+    SCAN = text(
+        "SELECT COUNT(*), COUNT(DISTINCT user_id), AVG(burnout_score), MAX(burnout_score), MIN(burnout_score), "
+        "SUM(burnout_risk = 'High'), SUM(burnout_risk = 'Medium'), SUM(burnout_risk = 'Low'), "
+        "ROUND(100.0 * SUM(burnout_risk = 'High') / COUNT(*), 2), "
+        "AVG(work_hours), AVG(sleep_hours), AVG(task_completion_rate) FROM burnout_records"
+    )
+
+    def _load(self, tmp_path):
+        csv_path = tmp_path / "records.csv"
+        rows = [
+            {'user_id': i % 4, 'day_type': 'Weekday', 'work_hours': 6 + i % 5, 'sleep_hours': 5 + i % 3,
+             'task_completion_rate': 60 + i, 'burnout_score': 10.0 * i, 'burnout_risk': ('Low', 'Medium', 'High')[i % 3]}
+            for i in range(10)
+        ]
+        import pandas as pd
+        pd.DataFrame(rows).to_csv(csv_path, index=False)
+        store = data_ingestion.PostgresDataStore(f"sqlite:///{tmp_path / 'records.db'}")
+        store.load_csv_to_postgres(str(csv_path))
+        store.load_csv_to_postgres(str(csv_path))
+        return store.engine
+
+    def _approx(self, row):
+        return [pytest.approx(value) if isinstance(value, float) else value for value in row]
+
+    def test_ingestion_updates_burnout_statistics(self, tmp_path):
+        engine = self._load(tmp_path)
+        with engine.connect() as conn:
+            statistics, scan = conn.execute(self.STATISTICS).one(), conn.execute(self.SCAN).one()
+        assert list(statistics) == self._approx(scan)
+        assert statistics.total_records == 20 and statistics.high_risk_count == 6
+
+    def test_backfill_rebuilds_record_rollups(self, tmp_path):
+        engine = self._load(tmp_path)
+        with engine.connect() as conn:
+            incremental = conn.execute(self.STATISTICS).one()
+            users = conn.execute(select(rollups.RECORD_ROLLUPS.user).order_by('user_id')).all()
+            conn.execute(text("DELETE FROM record_rollup_global"))
+            conn.commit()
+        backfill_rollups.main(['--database-url', str(engine.url)])
+        with engine.connect() as conn:
+            assert list(conn.execute(self.STATISTICS).one()) == self._approx(incremental)
+            rebuilt = conn.execute(select(rollups.RECORD_ROLLUPS.user).order_by('user_id')).all()
+        assert [list(row) for row in rebuilt] == [self._approx(row) for row in users]
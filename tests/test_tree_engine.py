@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# File: tests/test_tree_engine.py
+
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+
+from api.main import MODEL_FEATURES, _warm_up_matrix, app
+from api.model_bundle import load_bundle, validate_bundle
+from api.shared_memory import load_shared_forest, shared_artifact_path
+from api.tree_engine import CompiledForest, UnsupportedModelError, compile_model
+
+client = TestClient(app)
+
+VALID_DATA = {
+    "work_hours": 8.5,
+    "screen_time_hours": 10.2,
+    "meetings_count": 4,
+    "breaks_taken": 3,
+    "after_hours_work": 0,
+    "sleep_hours": 7.5,
+    "task_completion_rate": 85.0,
+    "day_type": "Weekday",
+    "name": "Test User"
+}
+
+
+@pytest.fixture(scope="module")
+def saved_model():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return joblib.load('models/best_model.joblib')
+
+
+@pytest.fixture(scope="module")
+def compiled(saved_model):
+    return CompiledForest.from_estimator(saved_model)
+
+
+class TestCompiledParity:
+    def test_batch_parity(self, saved_model, compiled):
+        x = np.random.RandomState(0).normal(scale=2.0, size=(2000, 17))
+        np.testing.assert_allclose(compiled.predict_proba(x), saved_model.predict_proba(x), atol=1e-12)
+        labels, _ = compiled.predict_with_proba(x)
+        np.testing.assert_array_equal(labels, saved_model.predict(x))
+
+    def test_single_row_parity(self, saved_model, compiled):
+        x = np.random.RandomState(1).normal(size=(1, 17))
+        labels, proba = compiled.predict_with_proba(x)
+        assert labels[0] == saved_model.predict(x)[0]
+        assert proba[0][1] == pytest.approx(saved_model.predict_proba(x)[0][1], abs=1e-12)
+
+    def test_threshold_ties_follow_sklearn(self, saved_model, compiled):
+        # inputs sitting exactly on split thresholds must take the same branch
+        x = np.tile(compiled.threshold[:17], (17, 1))
+        np.testing.assert_allclose(compiled.predict_proba(x), saved_model.predict_proba(x), atol=1e-12)
+
+    def test_unsupported_model(self):
+        model = LogisticRegression().fit(np.random.rand(20, 3), [0, 1] * 10)
+        with pytest.raises(UnsupportedModelError):
+            CompiledForest.from_estimator(model)
+        assert compile_model(model) is None
+
+
+class TestCompiledBackend:
+    def test_predict_with_compiled_backend(self, saved_model, compiled, set_model):
+        set_model(saved_model, compiled=compiled)
+        compiled_result = client.post("/predict", json=VALID_DATA).json()
+
+        set_model(saved_model)
+        sklearn_result = client.post("/predict", json=VALID_DATA).json()
+
+        assert compiled_result["risk_level"] == sklearn_result["risk_level"]
+        assert compiled_result["risk_probability"] == pytest.approx(sklearn_result["risk_probability"])
+
+    def test_large_batches_use_estimator(self, saved_model, compiled, set_model, monkeypatch):
+        from api.main import _compiled_engine
+        bundle = set_model(saved_model, compiled=compiled)
+        monkeypatch.setattr("api.main.COMPILED_MAX_ROWS", 4)
+        assert _compiled_engine(bundle, 4) is compiled
+        assert _compiled_engine(bundle, 5) is None
+
+
+class TestSharedArtifact:
+    def test_mmap_forest_matches_estimator(self, saved_model, tmp_path):
+        forest = load_shared_forest('models/best_model.joblib', str(tmp_path), 'v1')
+        assert isinstance(forest.feature, np.memmap)
+        assert isinstance(forest.value, np.memmap)
+        x = np.random.RandomState(2).normal(size=(64, 17))
+        np.testing.assert_allclose(forest.predict_proba(x), saved_model.predict_proba(x), atol=1e-12)
+        np.testing.assert_array_equal(forest.predict(x), saved_model.predict(x))
+
+    def test_existing_artifact_is_reused(self, tmp_path):
+        load_shared_forest('models/best_model.joblib', str(tmp_path), 'v1')
+        path = shared_artifact_path(str(tmp_path), 'v1')
+        written = os.stat(path).st_mtime_ns
+        load_shared_forest('models/best_model.joblib', str(tmp_path), 'v1')
+        assert os.stat(path).st_mtime_ns == written
+        assert [p.name for p in tmp_path.iterdir()] == ['v1.forest.joblib']
+
+    def test_unsupported_model_is_loaded_per_process(self, tmp_path):
+        x = np.random.RandomState(3).normal(size=(40, 17))
+        model = GradientBoostingClassifier(n_estimators=5).fit(x, (x[:, 0] > 0).astype(int))
+        model_path = tmp_path / "boosted.joblib"
+        joblib.dump(model, model_path)
+        bundle = load_bundle(
+            str(model_path), 'models/preprocessor.joblib', 'models/feature_names.joblib',
+            MODEL_FEATURES, shared_dir=str(tmp_path / "shared")
+        )
+        assert isinstance(bundle.model, GradientBoostingClassifier) and bundle.compiled is None
+        validate_bundle(bundle, MODEL_FEATURES, x[:4])
+        assert not (tmp_path / "shared").exists() or not list((tmp_path / "shared").iterdir())
+
+    def test_mmap_bundle_serves_without_estimator(self, tmp_path):
+        bundle = load_bundle(
+            'models/best_model.joblib', 'models/preprocessor.joblib', 'models/feature_names.joblib',
+            MODEL_FEATURES, shared_dir=str(tmp_path)
+        )
+        assert isinstance(bundle.model, CompiledForest)
+        assert bundle.compiled is bundle.model
+        validate_bundle(bundle, MODEL_FEATURES, _warm_up_matrix())